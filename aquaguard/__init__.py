@@ -0,0 +1,6 @@
+"""
+backend/ ve ml/ betiklerinin ortak kodu (artifact formatı, drift sketch'i,
+seyrek zaman serisi deposu, katkı açıklaması, aşama süreleri). İki dizin de script olarak çalıştığı için
+ilgili modüller (model_artifact.py, artifact.py, ...) repo kökünü sys.path'e
+ekleyip buradan import eder; format tek yerde tanımlıdır.
+"""
@@ -0,0 +1,102 @@
+"""
+Native model artifact formatının framework'ten bağımsız kısmı.
+
+  <ad>.<uzantı>       booster'ın native kaydı (XGBoost .ubj, LightGBM .txt)
+  <ad>.manifest.json  feature isimleri + sırası, eğitim verisi parmak izi,
+                      ufuk (gün), metrikler, model dosyasının sha256'sı
+
+Booster'ı kaydetme / yükleme backend/model_artifact.py (XGBoost) ve
+ml/artifact.py (LightGBM) içinde kalır; manifest, checksum ve feature sırası
+kontrolü buradadır.
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+FORMAT_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+class ArtifactError(ValueError):
+    pass
+
+
+def sha256_file(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def manifest_path(base) -> Path:
+    """model/aquaguard_model(.pkl) -> model/aquaguard_model.manifest.json"""
+    base = Path(base)
+    return base.with_name(base.name.split(".")[0] + MANIFEST_SUFFIX)
+
+
+def model_file_path(base, extension: str) -> Path:
+    """model_7d(.joblib) + ".txt" -> model_7d.txt (manifest'in yanındaki native dosya)"""
+    mpath = manifest_path(base)
+    return mpath.with_name(mpath.name.replace(MANIFEST_SUFFIX, extension))
+
+
+def write_manifest(model_file: Path, framework: str, feature_names: list, horizon_days: int,
+                   metrics: dict = None, training_fingerprint: str = None) -> Path:
+    """Native dosya yazıldıktan sonra manifest'i (atomik) yazar; manifest yolunu döner."""
+    mpath = manifest_path(model_file)
+    manifest = {
+        "format": FORMAT_VERSION,
+        "framework": framework,
+        "model_file": model_file.name,
+        "sha256": sha256_file(model_file),
+        "feature_names": list(feature_names),
+        "horizon_days": horizon_days,
+        "training_data_fingerprint": training_fingerprint,
+        "metrics": metrics or {},
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    # Manifest en son yazılır: okuyucu ya eski ya yeni tutarlı çifti görür
+    tmp = mpath.with_name(mpath.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, mpath)
+    return mpath
+
+
+def read_manifest(path, framework: str) -> dict:
+    manifest = json.loads(Path(path).read_text(encoding="utf-8"))
+    if manifest.get("format") != FORMAT_VERSION or manifest.get("framework") != framework:
+        raise ArtifactError(f"Desteklenmeyen artifact: format={manifest.get('format')}, "
+                            f"framework={manifest.get('framework')}")
+    return manifest
+
+
+def check_features(actual: list, expected: list, source: str):
+    if expected is not None and list(actual) != list(expected):
+        raise ArtifactError(
+            f"Feature sırası uyuşmuyor ({source}).\n  model:    {list(actual)}\n  beklenen: {list(expected)}"
+        )
+
+
+def verified_model_file(path, framework: str, expected_features: list = None):
+    """Manifest yolundan (native dosya yolu, manifest); checksum veya feature sırası tutmazsa ArtifactError."""
+    path = Path(path)
+    manifest = read_manifest(path, framework)
+    check_features(manifest["feature_names"], expected_features, path.name)
+    model_file = path.with_name(manifest["model_file"])
+    if sha256_file(model_file) != manifest["sha256"]:
+        raise ArtifactError(f"Checksum uyuşmuyor: {model_file.name}")
+    return model_file, manifest
+
+
+def fingerprint(path) -> str:
+    """
+    Modelin parmak izi: manifest ise taşıdığı model sha256'sı, değilse dosyanın
+    sha256'sı. Servis, shadow ve drift referansı aynı kaynağı kullanır.
+    """
+    path = Path(path)
+    if path.name.endswith(MANIFEST_SUFFIX):
+        return json.loads(path.read_text(encoding="utf-8"))["sha256"]
+    return sha256_file(path)
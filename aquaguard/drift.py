@@ -0,0 +1,156 @@
+"""
+Feature / tahmin drift sketch'i: backend/drift.py (canlı izleme) ve
+ml/drift.py (eğitim referansı + toplu skorlama raporu) için tek uygulama.
+
+- Referans: her kolon için BINS'lik quantile kenarları ve eğitim verisinin
+  bu kutulardaki sayıları; model artifact'ının yanına <model>.drift.json.
+- merge_reference: artımlı eğitimde önceki referansın sayılarına yeni satırlar eklenir.
+- count_columns: satır başına kolon başına tek searchsorted ile sabit boyutlu
+  (kolon, kutu + NaN) sayaç dizisi; sayaçlar toplanabilir (chunk / pencere).
+- report: kolon başına PSI (population stability index; < 0.1 ok, < 0.25
+  warn, üstü drift), NaN oranı ve kutulardan yaklaşık medyan.
+  MIN_ROWS altında insufficient_data.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+FORMAT = "aquaguard-drift-reference"
+FORMAT_VERSION = 1
+REFERENCE_SUFFIX = ".drift.json"
+BINS = 10
+PSI_WARN, PSI_DRIFT = 0.1, 0.25
+MIN_ROWS = 100
+STATUS_ORDER = ["insufficient_data", "ok", "warn", "drift"]
+_EPS = 1e-4  # boş kutular için (log(0) yerine)
+
+
+def reference_path(model_path) -> Path:
+    """model_7d(.joblib / .manifest.json) -> model_7d.drift.json"""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.name.split(".")[0] + REFERENCE_SUFFIX)
+
+
+def bin_counts(values, edges: np.ndarray) -> np.ndarray:
+    """Değerler -> [kutu sayıları (len(edges) + 1)..., NaN sayısı]."""
+    v = np.asarray(values, dtype=float).ravel()
+    nan = np.isnan(v)
+    counts = np.bincount(np.searchsorted(edges, v[~nan], side="right"), minlength=len(edges) + 1)
+    return np.append(counts, nan.sum())
+
+
+def build_reference(columns: dict, bins: int = BINS, **info) -> dict:
+    """{kolon: değerler} -> referans sketch (quantile kenarları + kutu sayıları)."""
+    out = {}
+    for name, values in columns.items():
+        v = np.asarray(values, dtype=float)
+        finite = v[np.isfinite(v)]
+        # Ayrık kolonlarda (çok sayıda 0 yağış vb.) tekrar eden kenarlar birleşir
+        edges = np.unique(np.quantile(finite, np.linspace(0.0, 1.0, bins + 1)[1:-1])) if len(finite) else np.empty(0)
+        out[name] = {"edges": edges.tolist(), "counts": bin_counts(v, edges).tolist()}
+    return {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "bins": bins,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **info,
+        "columns": out,
+    }
+
+
+def merge_reference(reference: dict, columns: dict, rows: int, **info) -> dict:
+    """
+    Önceki referansa yeni satırların sayıları eklenir; kenarlar aynı kalır
+    (artımlı eğitimde tüm eğitim verisi yeniden okunmaz). rows: yeni satır sayısı.
+    """
+    counts = count_columns(reference, columns)
+    merged = {}
+    for j, (name, ref) in enumerate(reference["columns"].items()):
+        old = np.asarray(ref["counts"], dtype=np.int64)
+        merged[name] = {"edges": ref["edges"], "counts": (old + counts[j, :len(old)]).tolist()}
+    return {
+        **{k: v for k, v in reference.items() if k != "columns"},
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rows": int(reference.get("rows", 0)) + int(rows),
+        **info,
+        "columns": merged,
+    }
+
+
+def save_reference(reference: dict, path) -> Path:
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(reference, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def load_reference(path) -> dict:
+    reference = json.loads(Path(path).read_text(encoding="utf-8"))
+    if reference.get("format") != FORMAT:
+        raise ValueError(f"{path}: drift referansı değil")
+    return reference
+
+
+def count_columns(reference: dict, columns: dict) -> np.ndarray:
+    """Referansın kutularına göre sayaçlar: (kolon, kutu + NaN); eksik kolonlar 0."""
+    names = list(reference["columns"])
+    edges = [np.asarray(reference["columns"][c]["edges"], dtype=float) for c in names]
+    out = np.zeros((len(names), max((len(e) + 2 for e in edges), default=2)), dtype=np.int64)
+    for j, name in enumerate(names):
+        if name in columns:
+            c = bin_counts(columns[name], edges[j])
+            out[j, :len(c)] = c
+    return out
+
+
+def psi(ref_counts: np.ndarray, live_counts: np.ndarray) -> float:
+    p = np.maximum(ref_counts / max(ref_counts.sum(), 1), _EPS)
+    q = np.maximum(live_counts / max(live_counts.sum(), 1), _EPS)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def approx_quantile(counts: np.ndarray, edges: np.ndarray, q: float):
+    """Kutu sayılarından (NaN hariç) yaklaşık quantile; kenarlar arasında doğrusal."""
+    finite = counts[:-1]
+    n = finite.sum()
+    if n == 0 or len(edges) == 0:
+        return None
+    cdf = np.cumsum(finite)[:-1] / n  # her kenarın solunda kalan oran
+    return float(np.interp(q, cdf, edges))
+
+
+def status_for(value: float, rows: int) -> str:
+    if rows < MIN_ROWS:
+        return "insufficient_data"
+    if value >= PSI_DRIFT:
+        return "drift"
+    return "warn" if value >= PSI_WARN else "ok"
+
+
+def report(reference: dict, counts: np.ndarray) -> dict:
+    columns = {}
+    for j, (name, ref) in enumerate(reference["columns"].items()):
+        edges = np.asarray(ref["edges"], dtype=float)
+        ref_counts = np.asarray(ref["counts"], dtype=float)
+        live = counts[j, :len(edges) + 2].astype(float)
+        n = int(live.sum())
+        value = psi(ref_counts, live) if n else 0.0
+        columns[name] = {
+            "psi": round(value, 4),
+            "status": status_for(value, n),
+            "rows": n,
+            "missing_rate": round(live[-1] / n, 4) if n else None,
+            "median": {
+                "reference": approx_quantile(ref_counts, edges, 0.5),
+                "live": approx_quantile(live, edges, 0.5),
+            },
+        }
+    return {
+        "status": max((c["status"] for c in columns.values()), key=STATUS_ORDER.index, default="insufficient_data"),
+        "reference": {k: v for k, v in reference.items() if k != "columns"},
+        "columns": columns,
+    }
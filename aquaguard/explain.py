@@ -0,0 +1,17 @@
+"""
+Feature katkılarından açıklama (backend/explain.py ve ml/inference.py ortak).
+
+Katkı matrisi (n, n_features) booster'ın native contribution çıktısıdır
+(XGBoost pred_contribs / LightGBM pred_contrib, bias kolonu atılmış).
+"""
+import numpy as np
+
+
+def top_factors(contrib: np.ndarray, feature_names: list, k: int = 3) -> list:
+    """Her satır için mutlak katkısı en büyük k feature (büyükten küçüğe)."""
+    if not len(contrib):
+        return []
+    k = min(k, contrib.shape[1])
+    idx = np.argsort(-np.abs(contrib), axis=1, kind="stable")[:, :k]
+    names = np.asarray(feature_names, dtype=object)
+    return names[idx].tolist()
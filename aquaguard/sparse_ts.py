@@ -0,0 +1,194 @@
+"""
+Seyrek zaman serisi deposu: NDVI gibi uydu geçişleri arasında tekrar eden
+(ileri doldurulmuş) ya da doğrusal doldurulmuş kolonlar için günlük değerler
+yerine sadece gerçek düğüm noktaları saklanır; günlük seri okuma anında
+vektörize olarak geri açılır.
+
+Format, yazıcı ve okuyucu backend/ ve ml/ için tek yerde (bkz. aquaguard/__init__.py).
+Dönüştürme CLI'ı ml/sparse_ts.py'de:
+  python sparse_ts.py data/parcels_timeseries.csv    # -> data/parcels_timeseries.sparse/
+
+Dizin yapısı:
+  meta.json        kolon sırası, seyrek kolonlar ve doldurma modları
+  daily.parquet    date, parcel_id + her gün gerçekten değişen kolonlar (meteo)
+  <kolon>.parquet  parcel_id, date, value: sadece düğümler
+
+- "ffill": değerin değiştiği günler (uydu geçişleri) saklanır, arası ileri doldurulur.
+- "linear": eğimin değiştiği günler saklanır, arası np.interp ile doldurulur.
+- Kolon başına daha az düğüm üreten mod seçilir; düğümler satırların
+  MAX_KNOT_FRACTION'ından fazlaysa kolon daily.parquet'te yoğun kalır.
+- Her parselin ilk ve son günü daima düğümdür. Yazarken geri açılan seri
+  orijinalle bit bit karşılaştırılır, tutmayan günler düğüme eklenir:
+  read_timeseries() çıktısı yoğun CSV ile birebir aynıdır (date datetime64 olarak).
+- Geri açma tüm parseller için tek searchsorted / np.interp çağrısıdır;
+  anahtar = parsel_kodu * STRIDE + gün.
+"""
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMAT = "aquaguard-sparse-ts"
+FORMAT_VERSION = 1
+SPARSE_SUFFIX = ".sparse"
+STRIDE = 1 << 20  # gün ofseti bundan küçük (~2800 yıl); anahtar float64'te tam sayı kalır
+MAX_KNOT_FRACTION = 0.5
+
+
+def sparse_path(path) -> Path:
+    """data/parcels_timeseries.csv -> data/parcels_timeseries.sparse"""
+    path = Path(path)
+    return path.with_name(path.stem + SPARSE_SUFFIX)
+
+
+def is_sparse(path) -> bool:
+    return (Path(path) / "meta.json").is_file()
+
+
+def meta_path(path) -> Path:
+    """Deponun değişim damgası için: yazıcı meta.json'ı en son yazar."""
+    return Path(path) / "meta.json"
+
+
+def _same(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+def _keys(parcel_codes: np.ndarray, dates: np.ndarray, origin: np.datetime64) -> np.ndarray:
+    days = (dates - origin).astype("timedelta64[D]").astype(np.int64)
+    return parcel_codes.astype(np.int64) * STRIDE + days
+
+
+def _expand(keys: np.ndarray, knot_keys: np.ndarray, knot_values: np.ndarray, mode: str) -> np.ndarray:
+    if mode == "ffill":
+        return knot_values[np.searchsorted(knot_keys, keys, side="right") - 1]
+    return np.interp(keys, knot_keys, knot_values)
+
+
+def _knot_mask(keys: np.ndarray, values: np.ndarray, edges: np.ndarray, mode: str) -> np.ndarray:
+    """Anahtara göre sıralı satırlar için saklanacak düğümler (edges: parsel ilk/son günleri)."""
+    keep = edges.copy()
+    if mode == "ffill":
+        keep[1:] |= ~_same(values[1:], values[:-1])
+        return keep  # düğüm değerleri aynen kopyalandığı için geri açma zaten birebir
+
+    slope = np.diff(values) / np.diff(keys)
+    keep[1:-1] |= ~np.isclose(slope[:-1], slope[1:], rtol=0.0, atol=1e-12)
+    # Kayan nokta farkı kalan günleri de düğüm yap (düğümde np.interp değeri aynen döner)
+    while True:
+        bad = ~keep & ~_same(_expand(keys, keys[keep], values[keep], mode), values)
+        if not bad.any():
+            return keep
+        keep |= bad
+
+
+def write_sparse(df: pd.DataFrame, out) -> dict:
+    """Yoğun günlük tabloyu (date, parcel_id, ...) seyrek depoya yazar; kolon başına mod/düğüm sayısı döner."""
+    out = Path(out)
+    dates = pd.to_datetime(df["date"]).to_numpy(dtype="datetime64[ns]")
+    codes, _ = pd.factorize(df["parcel_id"])
+    origin = dates.min()
+    keys = _keys(codes, dates, origin)
+    order = np.argsort(keys, kind="stable")
+    k = keys[order]
+    if (np.diff(k) == 0).any():
+        raise ValueError("Aynı (parcel_id, date) için birden fazla satır var; seyrek depo tekil gün ister.")
+
+    pid = codes[order]
+    edges = np.zeros(len(k), dtype=bool)
+    if len(k):
+        edges[0] = edges[-1] = True
+        change = pid[1:] != pid[:-1]
+        edges[1:] |= change
+        edges[:-1] |= change
+
+    out.mkdir(parents=True, exist_ok=True)
+    sparse, report = {}, {}
+    candidates = [c for c in df.columns if c not in ("date", "parcel_id") and df[c].dtype.kind == "f"]
+    for col in candidates:
+        v = df[col].to_numpy(dtype=float)[order]
+        modes = ["ffill"] if np.isnan(v).any() else ["ffill", "linear"]
+        masks = {m: _knot_mask(k, v, edges, m) for m in modes}
+        mode = min(masks, key=lambda m: masks[m].sum())
+        mask = masks[mode]
+        report[col] = {"mode": mode, "knots": int(mask.sum()), "rows": len(k)}
+        if mask.sum() > MAX_KNOT_FRACTION * len(k):
+            report[col]["mode"] = "dense"
+            continue
+        sparse[col] = mode
+        rows = order[mask]
+        pd.DataFrame(
+            {"parcel_id": df["parcel_id"].to_numpy()[rows], "date": dates[rows], "value": v[mask]}
+        ).to_parquet(out / f"{col}.parquet", index=False)
+
+    daily = df.drop(columns=list(sparse)).assign(date=dates)
+    daily.to_parquet(out / "daily.parquet", index=False)
+    meta = {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "columns": list(df.columns),
+        "sparse": sparse,
+        "rows": len(df),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(out / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return report
+
+
+class SparseTimeseries:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT:
+            raise ValueError(f"{self.path}: seyrek zaman serisi deposu değil")
+        self._knots = {}
+
+    def _load_knots(self, col: str) -> pd.DataFrame:
+        if col not in self._knots:
+            self._knots[col] = pd.read_parquet(self.path / f"{col}.parquet")
+        return self._knots[col]
+
+    def expand(self, daily: pd.DataFrame) -> pd.DataFrame:
+        """daily.parquet satırları (tamamı ya da bir kısmı) -> yoğun tablo, orijinal kolon sırasıyla."""
+        out = daily.copy()
+        dates = out["date"].to_numpy(dtype="datetime64[ns]")
+        # parquet'ten [us] gelebilir; CSV yolu (pd.to_datetime) ile aynı dtype
+        out["date"] = dates
+        for col, mode in self.meta["sparse"].items():
+            knots = self._load_knots(col)
+            # Parsel kodları düğüm tablosundan: iki tarafta aynı kod, aynı parsel
+            uniques = pd.Index(knots["parcel_id"].unique())
+            knot_dates = knots["date"].to_numpy(dtype="datetime64[ns]")
+            origin = min(knot_dates.min(), dates.min()) if len(dates) else knot_dates.min()
+            kk = _keys(uniques.get_indexer(knots["parcel_id"]), knot_dates, origin)
+            order = np.argsort(kk, kind="stable")
+            codes = uniques.get_indexer(out["parcel_id"])
+            values = _expand(_keys(codes, dates, origin), kk[order], knots["value"].to_numpy(dtype=float)[order], mode)
+            values[codes < 0] = np.nan
+            out[col] = values
+        return out[self.meta["columns"]]
+
+    def read(self, parcel_ids=None) -> pd.DataFrame:
+        filters = None if parcel_ids is None else [("parcel_id", "in", list(parcel_ids))]
+        return self.expand(pd.read_parquet(self.path / "daily.parquet", filters=filters))
+
+    def iter_batches(self, batch_rows: int):
+        """Yoğun tabloyu daily.parquet batch'leri halinde açar (düğümler küçük, bir kez okunur)."""
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(self.path / "daily.parquet")
+        for batch in pf.iter_batches(batch_size=batch_rows):
+            yield self.expand(batch.to_pandas())
+
+
+def read_timeseries(path) -> pd.DataFrame:
+    """Yoğun CSV / parquet ya da seyrek depo dizini -> yoğun günlük tablo."""
+    if is_sparse(path):
+        return SparseTimeseries(path).read()
+    if str(path).endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
@@ -0,0 +1,25 @@
+"""
+Aşama süresi ölçümü (backend/timing.py stage() ve ml/inference.py ortak).
+"""
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def measure(sink, name: str):
+    """
+    Bloğun süresini ms olarak sink'e yazar. sink: dict (aynı isimler toplanır),
+    add(name, ms) metodu olan nesne ya da None (no-op, ölçüm yapılmaz).
+    """
+    if sink is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - start) * 1000.0
+        if isinstance(sink, dict):
+            sink[name] = sink.get(name, 0.0) + ms
+        else:
+            sink.add(name, ms)
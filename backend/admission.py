@@ -0,0 +1,173 @@
+"""
+Admission control / load shedding.
+
+/predict, /predict/batch ve /timeseries önünde rota başına eşzamanlılık limiti ve
+kuyruk sınırı. Eşleme path segmentlerinde en uzun önekle yapılır: /predict/x
+limiti olmayan bir alt yolsa /predict limitine sayılır.
+Kuyruk doluysa ya da istek gecikme bütçesi içinde slot bulamazsa hızlıca
+503 + Retry-After döner; threadpool'da birikip timeout olmasını beklemeyiz.
+Limitli olmayan rotalar (/health vb.) hiç etkilenmez.
+"""
+import asyncio
+import json
+import math
+import os
+import threading
+
+
+# Kuyrukta bekleme bütçesi: istemci timeout'larından çok kısa olmalı, yoksa
+# reddetmek yerine geciktirmiş oluruz. Rota bazında _QUEUE_TIMEOUT_S ile de ezilir.
+DEFAULT_QUEUE_TIMEOUT_S = float(os.environ.get("AQUAGUARD_ADMISSION_QUEUE_TIMEOUT_S", 0.25))
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+class RouteLimiter:
+    """Tek rota için eşzamanlılık + bekleme kuyruğu limiti."""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout_s: float):
+        if max_concurrency < 1:
+            raise ValueError(f"{name}: max_concurrency >= 1 olmalı")
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    @classmethod
+    def from_env(cls, name: str, max_concurrency: int, max_queue: int, queue_timeout_s: float):
+        """AQUAGUARD_<NAME>_MAX_CONCURRENCY / _MAX_QUEUE / _QUEUE_TIMEOUT_S ile override."""
+        prefix = f"AQUAGUARD_{name.upper()}"
+        return cls(
+            name,
+            _env_int(f"{prefix}_MAX_CONCURRENCY", max_concurrency),
+            _env_int(f"{prefix}_MAX_QUEUE", max_queue),
+            _env_float(f"{prefix}_QUEUE_TIMEOUT_S", queue_timeout_s),
+        )
+
+    async def acquire(self) -> bool:
+        """Slot alındıysa True, istek reddedilmeliyse False."""
+        # Boş slot varsa kuyruğa hiç girmeden geç
+        if not self._sem.locked():
+            await self._sem.acquire()
+            return self._admit()
+
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                return False
+            self.waiting += 1
+
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout=self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.shed_timeout += 1
+            return False
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+        return self._admit()
+
+    def _admit(self) -> bool:
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._sem.release()
+
+    def retry_after_s(self) -> int:
+        # Kuyruğun boşalması için kaba tahmin: en az 1 sn
+        return max(1, math.ceil(self.queue_timeout_s))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queue_timeout_s": self.queue_timeout_s,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "shed_queue_full": self.shed_queue_full,
+                "shed_timeout": self.shed_timeout,
+                "shed_total": self.shed_queue_full + self.shed_timeout,
+            }
+
+
+class AdmissionMiddleware:
+    """
+    Saf ASGI middleware: path öneki -> RouteLimiter eşlemesi.
+    Reddedilen istek uygulamaya hiç ulaşmaz (threadpool slotu harcamaz).
+    """
+
+    def __init__(self, app, limiters: dict):
+        self.app = app
+        self.limiters = limiters
+
+    def match(self, path: str):
+        """En uzun segment önekiyle eşleşen limiter; yoksa None."""
+        while path:
+            limiter = self.limiters.get(path)
+            if limiter is not None:
+                return limiter
+            path = path.rpartition("/")[0]
+        return None
+
+    async def __call__(self, scope, receive, send):
+        limiter = self.match(scope.get("path", "")) if scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await _send_overloaded(send, limiter)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+async def _send_overloaded(send, limiter: RouteLimiter):
+    body = json.dumps({"error": "overloaded", "route": limiter.name}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            (b"retry-after", str(limiter.retry_after_s()).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def default_limiters() -> dict:
+    """Varsayılan limitler; env ile ayarlanabilir."""
+    timeout = DEFAULT_QUEUE_TIMEOUT_S
+    return {
+        "/predict": RouteLimiter.from_env("predict", max_concurrency=8, max_queue=32, queue_timeout_s=timeout),
+        # Batch isteği çok satır skorlar: ayrı ve daha dar limit, /predict slotlarını yemesin
+        "/predict/batch": RouteLimiter.from_env("predict_batch", max_concurrency=2, max_queue=8, queue_timeout_s=timeout),
+        "/timeseries": RouteLimiter.from_env("timeseries", max_concurrency=8, max_queue=32, queue_timeout_s=timeout),
+    }
@@ -0,0 +1,84 @@
+"""
+Frontend asset build'i: içerik hash'li isimler + önceden sıkıştırılmış kopyalar.
+
+  python build_assets.py            # proj/ -> proj/dist/
+
+- app.js, styles.css -> app.<hash>.js, styles.<hash>.css (sha256'nın ilk 10 hanesi);
+  index.html bu isimleri gösterecek şekilde yeniden yazılır (kendisi hash'lenmez).
+- Her dosyanın yanına .gz (gzip -9) ve brotli paketi kuruluysa .br yazılır.
+- static_assets.PrecompressedStaticFiles Accept-Encoding'e göre varyantı seçer;
+  hash'li dosyalar immutable, index.html no-cache servis edilir.
+- dist/ her build'de sıfırdan kurulur; main.py dist/index.html varsa onu mount eder.
+"""
+import argparse
+import gzip
+import hashlib
+import re
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # opsiyonel: yoksa sadece gzip varyantı üretilir
+    brotli = None
+
+
+FRONTEND_DIR = Path(__file__).resolve().parents[1] / "proj"
+HASHED_ASSETS = ["app.js", "styles.css"]
+ENTRYPOINT = "index.html"
+
+
+def hashed_name(name: str, content: bytes) -> str:
+    stem, ext = name.rsplit(".", 1)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}.{ext}"
+
+
+def write_variants(path: Path, content: bytes) -> list:
+    path.write_bytes(content)
+    written = [path]
+    gz = path.with_name(path.name + ".gz")
+    # mtime=0: aynı içerik -> aynı .gz (tekrarlanabilir build)
+    gz.write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+    written.append(gz)
+    if brotli is not None:
+        br = path.with_name(path.name + ".br")
+        br.write_bytes(brotli.compress(content, quality=11))
+        written.append(br)
+    return written
+
+
+def build(src: Path, out: Path) -> dict:
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+
+    mapping = {}
+    for name in HASHED_ASSETS:
+        content = (src / name).read_bytes()
+        mapping[name] = hashed_name(name, content)
+        write_variants(out / mapping[name], content)
+
+    html = (src / ENTRYPOINT).read_text(encoding="utf-8")
+    for name, hashed in mapping.items():
+        # Sadece src/href="app.js" gibi yerel referanslar (CDN linkleri etkilenmez)
+        html = re.sub(rf'((?:src|href)=")(?:\./)?{re.escape(name)}(")', rf"\g<1>{hashed}\g<2>", html)
+    write_variants(out / ENTRYPOINT, html.encode("utf-8"))
+    return mapping
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frontend asset build (hash + gzip/brotli)")
+    parser.add_argument("--src", default=str(FRONTEND_DIR))
+    parser.add_argument("--out", default=str(FRONTEND_DIR / "dist"))
+    args = parser.parse_args()
+
+    mapping = build(Path(args.src), Path(args.out))
+    for name, hashed in mapping.items():
+        print(f"  {name} -> {hashed}")
+    if brotli is None:
+        print("⚠️ brotli paketi yok: sadece .gz varyantları üretildi (pip install brotli)")
+    print(f"✅ Assets built: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Parsel kataloğu: veri yüklenirken bir kez sıralanır, listeleme ve arama
+sıralı dizi üzerinde searchsorted ile yapılır (istek başına unique/sort yok).
+
+- Sıralama anahtarı "küçük harf id + \\0 + id": büyük/küçük harf duyarsız
+  sıralama, ama her parsel için benzersiz (cursor çakışmaz).
+- Cursor = son dönen parcel_id; araya parsel eklense de sayfa kaymaz.
+- Prefix araması: [q, q + U+FFFF) aralığı iki searchsorted ile bulunur.
+"""
+import numpy as np
+
+
+class ParcelCatalog:
+    def __init__(self, parcel_ids, names: dict = None):
+        ids = np.asarray([str(p) for p in parcel_ids], dtype=object)
+        keys = np.asarray([self._key(p) for p in ids])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.ids = ids[order]
+        names = names or {}
+        self.names = np.asarray([names.get(p) or p for p in self.ids], dtype=object)
+        self._all = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _key(parcel_id: str) -> str:
+        return parcel_id.casefold() + "\0" + parcel_id
+
+    def _range(self, prefix: str = None):
+        if not prefix:
+            return 0, len(self.keys)
+        q = prefix.casefold()
+        lo = int(np.searchsorted(self.keys, q, side="left"))
+        hi = int(np.searchsorted(self.keys, q + "\uffff", side="left"))
+        return lo, hi
+
+    def page(self, prefix: str = None, cursor: str = None, limit: int = 100):
+        """(sayfadaki pozisyonlar, next_cursor veya None, eşleşen toplam)."""
+        lo, hi = self._range(prefix)
+        start = lo
+        if cursor:
+            start = max(lo, int(np.searchsorted(self.keys, self._key(cursor), side="right")))
+        end = min(hi, start + max(0, limit))
+        next_cursor = str(self.ids[end - 1]) if end < hi and end > start else None
+        return np.arange(start, end), next_cursor, hi - lo
+
+    def all(self) -> list:
+        if self._all is None:
+            self._all = [{"parcel_id": p, "name": n} for p, n in zip(self.ids, self.names)]
+        return self._all
@@ -0,0 +1,147 @@
+"""
+Feature / tahmin drift izleme: canlı dağılım modelin eğitildiği veriden kayıyor mu?
+
+- Referans (eğitim anı): her kolon için BINS'lik quantile kenarları ve eğitim
+  verisinin bu kutulardaki sayıları; model artifact'ının yanına
+  <model>.drift.json olarak yazılır:
+    python drift.py          # ml_ready_data.parquet + servis edilen model
+- Canlı: skorlanan her satır kolon başına tek searchsorted ile kutusuna
+  sayılır (kutu sayısı sabit -> satır başına O(1)). Sayaçlar `windows` adet
+  halka pencerede tutulur, pencere dolunca en eskisi sıfırlanıp yeniden
+  kullanılır: bellek kolon x pencere x kutu ile sabit, trafikten bağımsız.
+- report(): son pencerelerin toplamı ile referans arasında PSI (population
+  stability index), NaN oranı ve kutulardan yaklaşık medyan.
+  PSI < 0.1 ok, < 0.25 warn, üstü drift; MIN_ROWS altında insufficient_data.
+Referans formatı, kutulama ve rapor ml/ ile ortak (../aquaguard/drift.py);
+burada canlı pencereler ve referans üreten CLI var.
+
+AQUAGUARD_DRIFT_WINDOW_ROWS (10000) ve AQUAGUARD_DRIFT_WINDOWS (6) ile ayarlanır.
+"""
+import argparse
+import os
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import model_artifact
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # ortak aquaguard/ paketi
+
+from aquaguard import drift as _sketch  # noqa: E402
+from aquaguard.drift import (  # noqa: E402,F401
+    BINS,
+    FORMAT,
+    REFERENCE_SUFFIX,
+    bin_counts,
+    build_reference,
+    load_reference,
+    reference_path,
+    save_reference,
+)
+
+
+class DriftMonitor:
+    def __init__(self, reference: dict, window_rows: int = 10000, windows: int = 6):
+        self.reference = reference
+        self.window_rows = window_rows
+        self.columns = list(reference["columns"])
+        self._index = {name: j for j, name in enumerate(self.columns)}
+        self._edges = [np.asarray(reference["columns"][c]["edges"], dtype=float) for c in self.columns]
+        width = max((len(e) + 2 for e in self._edges), default=2)
+        # (pencere, kolon, kutu + NaN): boyut referansla sabitlenir
+        self._counts = np.zeros((windows, len(self.columns), width), dtype=np.int64)
+        self._window_fill = np.zeros(windows, dtype=np.int64)
+        self._slot = 0
+        self.rows = 0
+        self.rotations = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, reference_file):
+        if not Path(reference_file).exists():
+            return None
+        return cls(
+            load_reference(reference_file),
+            window_rows=int(os.environ.get("AQUAGUARD_DRIFT_WINDOW_ROWS", 10000)),
+            windows=int(os.environ.get("AQUAGUARD_DRIFT_WINDOWS", 6)),
+        )
+
+    def observe(self, X: np.ndarray, feature_names: list, **outputs):
+        """Skorlanan satırlar: X (satır, feature) + tahmin kolonları (örn. risk_7d=...)."""
+        X = np.asarray(X, dtype=float)
+        if X.ndim != 2 or not len(X):
+            return
+        columns = {name: X[:, j] for j, name in enumerate(feature_names)}
+        columns.update(outputs)
+        with self._lock:
+            if self._window_fill[self._slot] >= self.window_rows:
+                self._slot = (self._slot + 1) % len(self._counts)
+                self._counts[self._slot] = 0
+                self._window_fill[self._slot] = 0
+                self.rotations += 1
+            for name, values in columns.items():
+                j = self._index.get(name)
+                if j is None:
+                    continue
+                c = bin_counts(values, self._edges[j])
+                self._counts[self._slot, j, :len(c)] += c
+            self._window_fill[self._slot] += len(X)
+            self.rows += len(X)
+
+    def report(self) -> dict:
+        with self._lock:
+            total = self._counts.sum(axis=0)
+            in_windows = int(self._window_fill.sum())
+        rep = _sketch.report(self.reference, total)
+        return {
+            "status": rep["status"],
+            "rows_seen": self.rows,
+            "rows_in_windows": in_windows,
+            "window_rows": self.window_rows,
+            "windows": len(self._counts),
+            "reference": rep["reference"],
+            "columns": rep["columns"],
+        }
+
+    def stats(self) -> dict:
+        return {"rows_seen": self.rows, "rotations": self.rotations, "columns": len(self.columns)}
+
+
+def main():
+    base = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Servis edilen model için drift referansı üret")
+    parser.add_argument("--data", default=str(base / "data" / "ml_ready_data.parquet"))
+    parser.add_argument("--model", default=str(base / "model" / "aquaguard_model.pkl"),
+                        help="Pickle yolu; yanında manifest varsa o kullanılır")
+    parser.add_argument("--bins", type=int, default=BINS)
+    args = parser.parse_args()
+
+    manifest = model_artifact.manifest_path(args.model)
+    if manifest.exists():
+        meta = model_artifact.read_manifest(manifest)
+        features, model_file = list(meta["feature_names"]), manifest
+    else:
+        import joblib
+
+        model_file = Path(args.model)
+        features = list(joblib.load(model_file).get_booster().feature_names)
+    info = {"model_sha256": model_artifact.fingerprint(model_file)}
+    model = model_artifact.load_model_file(model_file, features)
+
+    df = pd.read_parquet(args.data).dropna(subset=features)
+    X = df[features].to_numpy(dtype=float)
+    preds = np.asarray(model.predict(X), dtype=float)
+    columns = {name: X[:, j] for j, name in enumerate(features)}
+    # /predict ile aynı dönüşüm
+    columns["risk_7d"] = np.clip((1.0 - preds) * 100.0, 0.0, 100.0)
+
+    reference = build_reference(columns, args.bins, source=Path(args.data).name, rows=len(df), **info)
+    out = save_reference(reference, reference_path(args.model))
+    print(f"✅ {len(df)} satır, {len(columns)} kolon -> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Server-Sent Events: veri veya model değişince risk farklarını bağlı
+dashboard'lara iter.
+
+- Her olay bir kez encode edilir, tüm client kuyruklarına aynı bytes gider.
+- Her client'ın kendi sınırlı kuyruğu var (backpressure): kuyruk doluysa
+  (yavaş client) bekleyen olaylar atılır, yerine tek bir "resync" olayı
+  konur; client tam listeyi yeniden çeker. Yayıncı hiçbir client için beklemez.
+- Tüm kuyruk işlemleri event loop thread'inde yapılır; başka thread'ler
+  notify() ile (call_soon_threadsafe) izleyiciyi uyandırır.
+"""
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def encode(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+HEARTBEAT = b": ping\n\n"
+
+
+class Broadcaster:
+    def __init__(self, client_queue_size: int = 16):
+        self.client_queue_size = client_queue_size
+        self._clients = set()
+        self._resync = encode("resync", {})
+        self.published = 0
+        self.resyncs = 0
+        self._loop = None
+        self._wakeup = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def subscribe(self) -> asyncio.Queue:
+        q = asyncio.Queue(maxsize=self.client_queue_size)
+        self._clients.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self._clients.discard(q)
+
+    def publish(self, payload: bytes):
+        self.published += 1
+        for q in list(self._clients):
+            try:
+                q.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Yavaş client: farklar artık eksik, baştan senkron olması gerek
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(self._resync)
+                self.resyncs += 1
+
+    def notify(self):
+        """Herhangi bir thread'den: izleyiciyi poll aralığını beklemeden uyandır."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def stats(self) -> dict:
+        return {
+            "clients": self.clients,
+            "published": self.published,
+            "resyncs": self.resyncs,
+            "queued": sum(q.qsize() for q in self._clients),
+        }
+
+
+def _risk_values(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else v for v in np.round(values, 1).tolist()]
+
+
+def risk_diff(old: pd.Series, new: pd.Series, min_change: float = 0.1):
+    """
+    İki risk serisi (index: parcel_id) arasındaki fark:
+    (değişen/yeni parseller -> yeni risk, kaldırılan parseller).
+    """
+    n = new.to_numpy(dtype=float)
+    if old is None:
+        return dict(zip(new.index.tolist(), _risk_values(n))), []
+    o = old.reindex(new.index).to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        changed = (np.isnan(o) != np.isnan(n)) | (np.abs(n - o) >= min_change)
+    removed = old.index.difference(new.index).tolist()
+    return dict(zip(new.index[changed].tolist(), _risk_values(n[changed]))), removed
@@ -0,0 +1,40 @@
+"""
+Tahmin başına feature katkıları (booster'ın native contribution çıktısı).
+
+XGBoost: Booster.predict(DMatrix, pred_contribs=True)
+LightGBM: model.predict(X, pred_contrib=True)
+Her ikisi de (n, n_features + 1) döner; son kolon bias, satır toplamı = tahmin.
+Tek vektörize çağrı tüm batch için katkıları verir.
+Katkılardan top_factors sıralaması ml/ ile ortak (../aquaguard/explain.py).
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # ortak aquaguard/ paketi
+
+from aquaguard.explain import top_factors  # noqa: E402,F401
+
+
+def contributions(model, X: np.ndarray, feature_names: list):
+    """(katkılar (n, n_features), bias (n,)) ya da model desteklemiyorsa None."""
+    X = np.asarray(X, dtype=float)
+    if hasattr(model, "get_booster"):
+        import xgboost as xgb
+
+        booster = model.get_booster()
+        names = booster.feature_names or feature_names
+        out = booster.predict(xgb.DMatrix(X, feature_names=names), pred_contribs=True)
+    elif hasattr(model, "booster_"):
+        out = model.predict(X, pred_contrib=True)
+    else:
+        return None
+    out = np.asarray(out, dtype=float)
+    return out[:, :-1], out[:, -1]
+
+
+def risk_contributions(contrib: np.ndarray) -> np.ndarray:
+    """NDVI katkısı -> risk puanı katkısı (risk = (1 - ndvi) * 100)."""
+    return -contrib * 100.0
+
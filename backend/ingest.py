@@ -0,0 +1,448 @@
+"""
+Günlük NDVI + meteo gözlem ingest'i.
+
+Dosyaları (parcels_timeseries1.csv, ml_ready_data.parquet) komple değiştirmek
+yerine yeni satırlar append-only log'a yazılır ve bellekteki veriye artımlı
+olarak eklenir:
+
+  data/ingest/log-<seq>.jsonl    aktif / henüz sıkıştırılmamış segmentler
+  data/ingest/part-<seq>.parquet sıkıştırılmış (kolonsal) segmentler
+
+- Yazma ve segment döndürme aynı flock altında yapılır (çok worker güvenli).
+- Okuyucu bir cursor (seq, satır sayısı, byte offset) tutar; sadece yeni
+  satırları okur. Sıkıştırma satır sırasını korur, cursor geçerli kalır.
+- Feature'lar sadece etkilenen parsellerin kuyruk penceresi için yeniden
+  hesaplanır (en uzun lag/rolling/target ufku WINDOW gün).
+- Meteo'su gridden gelen satırlar log'a değer değil hücre indeksi (weather_cell)
+  olarak yazılır; değerler okuma anında grid'den birleştirilir (join_weather).
+
+CLI:
+  python ingest.py yeni_gozlemler.csv     # log'a ekle (çalışan servis kendisi alır)
+  python ingest.py ndvi.csv --weather data/weather/grid.npz   # meteo'yu gridden doldur
+  python ingest.py --compact              # log'u parquet'e sıkıştır
+"""
+import argparse
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: tek process varsayımı
+    fcntl = None
+
+
+RAW_COLUMNS = [
+    "date", "parcel_id", "ndvi",
+    "precipitation_sum", "temperature_2m_max", "et0_fao_evapotranspiration",
+]
+REQUIRED_COLUMNS = set(RAW_COLUMNS)
+# Meteo gridden doldurulacaksa (weather) sadece bunlar zorunlu
+OBSERVATION_COLUMNS = {"date", "parcel_id", "ndvi"}
+METEO_COLUMNS = RAW_COLUMNS[3:]
+# Log satırı: meteo gridden geliyorsa değer yerine parselin grid hücresi (yoksa -1)
+LOG_COLUMNS = RAW_COLUMNS + ["weather_cell"]
+
+ML_FEATURE_COLUMNS = [
+    "ndvi_lag_1", "ndvi_lag_7", "rain_lag_1", "rain_sum_7d", "temp_mean_7d", "evap_sum_7d", "target_ndvi_7d",
+]
+
+# ndvi_lag_7, 7 günlük rolling'ler ve target_ndvi_7d (shift -7) en fazla 7 gün geriye/ileriye bakar
+WINDOW = 7
+
+_SEGMENT_RE = re.compile(r"^(log|part)-(\d+)\.(jsonl|parquet)$")
+
+
+def validate_rows(rows, weather=None, strict: bool = True) -> pd.DataFrame:
+    """
+    list[dict] veya DataFrame -> normalize edilmiş ham gözlem tablosu (LOG_COLUMNS).
+    Hatalar istemciye gösterilebilir ValueError mesajlarıdır (pandas iç metni değil).
+
+    weather: ParcelWeather; verilirse meteo kolonları zorunlu değildir. Eksik meteo
+    satıra yazılmaz, parselin hücresi weather_cell'e yazılır; değerler okuma anında
+    join_weather ile gelir.
+    strict: istemci girdisi. Batch içinde tekrar eden (parcel_id, date) ve gridden de
+    doldurulamayan meteo (tarih grid dışında, parsel bilinmiyor / grid dışında) reddedilir.
+    Log'dan okurken kapalı: farklı append'lerdeki düzeltmeler upsert'tir (merge'de son gelen geçerli).
+    """
+    if isinstance(rows, pd.DataFrame):
+        df = rows.copy()
+    else:
+        if not isinstance(rows, (list, tuple)) or not all(isinstance(r, dict) for r in rows):
+            raise ValueError("rows bir nesne listesi olmalı: [{date, parcel_id, ndvi, ...}, ...]")
+        df = pd.DataFrame(list(rows))
+    if df.empty:
+        return pd.DataFrame(columns=LOG_COLUMNS)
+
+    # Log satırlarında gridden gelen meteo yazılı değil
+    required = REQUIRED_COLUMNS if weather is None and strict else OBSERVATION_COLUMNS
+    missing = required - set(df.columns)
+    if missing:
+        raise ValueError(f"Eksik kolon(lar): {sorted(missing)}. Beklenen: {sorted(required)}")
+
+    for col in METEO_COLUMNS:
+        if col not in df.columns:
+            df[col] = float("nan")
+    if strict or "weather_cell" not in df.columns:
+        df["weather_cell"] = -1
+
+    df = df[LOG_COLUMNS].copy()
+    if df["parcel_id"].isna().any():
+        raise ValueError(f"parcel_id boş olamaz (satır: {_positions(df['parcel_id'].isna())})")
+    dates = pd.to_datetime(df["date"], errors="coerce")
+    if dates.isna().any():
+        bad = dates.isna()
+        raise ValueError(f"Geçersiz date değeri: {df['date'][bad].head(3).tolist()} (satır: {_positions(bad)})")
+    df["date"] = dates.dt.normalize()
+    df["parcel_id"] = df["parcel_id"].astype(str)
+    for col in RAW_COLUMNS[2:]:
+        values = pd.to_numeric(df[col], errors="coerce")
+        bad = values.isna() & df[col].notna()
+        if bad.any():
+            raise ValueError(f"{col} sayısal olmalı: {df[col][bad].head(3).tolist()} (satır: {_positions(bad)})")
+        df[col] = values.astype(float)
+    df["weather_cell"] = pd.to_numeric(df["weather_cell"], errors="coerce").fillna(-1).astype("int64")
+    if not strict:
+        return df
+
+    dup = df.duplicated(["parcel_id", "date"], keep=False)
+    if dup.any():
+        raise ValueError(f"Aynı parcel_id + date birden fazla kez gönderildi (satır: {_positions(dup)})")
+
+    needs = df[METEO_COLUMNS].isna().any(axis=1)
+    if weather is not None and needs.any():
+        df.loc[needs, "weather_cell"] = weather.cell_of(df.loc[needs, "parcel_id"])
+    if needs.any():
+        unfilled = join_weather(df, weather.grid if weather is not None else None)[METEO_COLUMNS].isna().any(axis=1)
+        if unfilled.any():
+            raise ValueError(
+                f"Meteo değeri yok ve grid'den doldurulamadı (tarih grid aralığı dışında ya da parsel "
+                f"bilinmiyor / grid dışında): {df['parcel_id'][unfilled].head(3).tolist()} (satır: {_positions(unfilled)})"
+            )
+    return df
+
+
+def join_weather(rows: pd.DataFrame, grid=None) -> pd.DataFrame:
+    """Log satırları -> meteo'su weather_cell ile grid'den doldurulmuş ham gözlemler (RAW_COLUMNS)."""
+    if grid is not None and "weather_cell" in rows.columns and (rows["weather_cell"] >= 0).any():
+        from weather import join_cells
+
+        rows = join_cells(grid, rows, rows["weather_cell"].to_numpy())
+    return rows[RAW_COLUMNS]
+
+
+def _positions(mask: pd.Series, limit: int = 5) -> list:
+    return [int(i) for i in mask.to_numpy().nonzero()[0][:limit]]
+
+
+def _daily(df: pd.DataFrame) -> pd.DataFrame:
+    """Parsel başına ilk-son gün arası her gün bir satır; eksik günler NaN, _observed=False."""
+    span = df.groupby("parcel_id", observed=True)["date"].agg(["min", "max"])
+    n = ((span["max"] - span["min"]).dt.days + 1).to_numpy()
+    offset = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    days = pd.DataFrame({
+        "parcel_id": np.repeat(span.index.to_numpy(), n),
+        "date": np.repeat(span["min"].to_numpy(), n) + offset.astype("timedelta64[D]"),
+    })
+    return days.merge(df.assign(_observed=True), on=["parcel_id", "date"], how="left").fillna({"_observed": False})
+
+
+def build_ml_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    ml_ready_data.parquet ile aynı feature tanımları (parsel başına).
+    shift/rolling satır bazlı: önce günlük satırlara açılır ki lag_7 gerçekten 7 gün
+    öncesi olsun; eksik günlere değen feature'lar NaN kalır, dönüşte sadece gözlenen günler tutulur.
+    """
+    if df.empty:
+        return df.reindex(columns=list(df.columns) + ML_FEATURE_COLUMNS)
+    df = _daily(df.sort_values(["parcel_id", "date"]))
+    g = df.groupby("parcel_id", observed=True)
+
+    df["ndvi_lag_1"] = g["ndvi"].shift(1)
+    df["ndvi_lag_7"] = g["ndvi"].shift(7)
+    df["rain_lag_1"] = g["precipitation_sum"].shift(1)
+    df["rain_sum_7d"] = g["precipitation_sum"].rolling(7).sum().reset_index(level=0, drop=True)
+    df["temp_mean_7d"] = g["temperature_2m_max"].rolling(7).mean().reset_index(level=0, drop=True)
+    df["evap_sum_7d"] = g["et0_fao_evapotranspiration"].rolling(7).sum().reset_index(level=0, drop=True)
+    df["target_ndvi_7d"] = g["ndvi"].shift(-7)
+    return df[df.pop("_observed").astype(bool)].reset_index(drop=True)
+
+
+def merge_ml(store: pd.DataFrame, batch: pd.DataFrame, grid=None) -> pd.DataFrame:
+    """
+    Yeni gözlemleri feature tablosuna ekle (aynı parsel+tarih varsa yenisi geçerli).
+    Meteo'su gridden gelen satırlar (weather_cell) feature'lardan önce grid ile birleştirilir:
+    meteo kolonları modelin girdisi olduğu için feature tablosunda değer olarak durur.
+    Sadece etkilenen parsellerde, en erken yeni tarihten WINDOW gün öncesinden
+    itibaren satırlar yeniden hesaplanır; bağlam için 2*WINDOW gün geçmiş okunur.
+    target_ndvi_7d (7 gün sonraki NDVI) o gün eldeyse yeniden hesaplanır; değilse
+    (gelecek henüz gelmedi) saklanan hedef korunur, NaN'a çevrilmez.
+    """
+    if batch.empty:
+        return store
+    batch = join_weather(batch, grid)
+
+    first_new = batch.groupby("parcel_id")["date"].min()
+    in_aff = store["parcel_id"].isin(first_new.index)
+    aff = store[in_aff]
+    aff_first = pd.to_datetime(aff["parcel_id"].astype(str).map(first_new))
+
+    context = aff[aff["date"] >= aff_first - pd.Timedelta(days=2 * WINDOW)][RAW_COLUMNS]
+    merged = pd.concat([context.astype({"parcel_id": str}), batch], ignore_index=True)
+    merged = merged.drop_duplicates(["parcel_id", "date"], keep="last")
+    feat = build_ml_features(merged)
+
+    splice_from = pd.to_datetime(feat["parcel_id"].map(first_new)) - pd.Timedelta(days=WINDOW)
+    fresh = feat[feat["date"] >= splice_from].copy()
+
+    # Hedef günü merged'de yoksa shift(-7) NaN'ı "bilinmiyor" demektir: saklananı koru
+    known = pd.MultiIndex.from_arrays([merged["parcel_id"], merged["date"]])
+    future = pd.MultiIndex.from_arrays([fresh["parcel_id"], fresh["date"] + pd.Timedelta(days=WINDOW)])
+    no_future = ~future.isin(known)
+    if no_future.any():
+        stored = aff.assign(parcel_id=aff["parcel_id"].astype(str)).set_index(["parcel_id", "date"])["target_ndvi_7d"]
+        here = pd.MultiIndex.from_arrays([fresh["parcel_id"], fresh["date"]])[no_future]
+        fresh.loc[no_future, "target_ndvi_7d"] = stored.reindex(here).to_numpy()
+
+    stale = in_aff.copy()
+    stale[in_aff] = (aff["date"] >= aff_first - pd.Timedelta(days=WINDOW)).to_numpy()
+    keep = store[~stale]
+
+    out = pd.concat([keep.astype({"parcel_id": str}), fresh[store.columns]], ignore_index=True)
+    return out.sort_values(["parcel_id", "date"]).reset_index(drop=True)
+
+
+_TIMESERIES_NAMES = {"precipitation_sum": "rain_mm", "temperature_2m_max": "temp_c"}
+
+
+def merge_timeseries(store: pd.DataFrame, batch: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frontend serisi (rain_mm/temp_c isimli) için upsert. Gridden gelen meteo
+    satırda tutulmaz (weather_cell); değerler okuma anında join_timeseries ile gelir.
+    """
+    if batch.empty:
+        return store
+    rows = batch.rename(columns=_TIMESERIES_NAMES)
+    rows = rows[[c for c in rows.columns if c in store.columns or c == "weather_cell"]]
+    out = pd.concat([store.astype({"parcel_id": str}), rows], ignore_index=True)
+    out = out.drop_duplicates(["parcel_id", "date"], keep="last")
+    return out.sort_values(["parcel_id", "date"]).reset_index(drop=True)
+
+
+def join_timeseries(series: pd.DataFrame, grid=None) -> pd.DataFrame:
+    """merge_timeseries çıktısından bir dilim (örn. tek parsel) -> meteo'su doldurulmuş seri."""
+    if grid is None or "weather_cell" not in series.columns:
+        return series
+    cell = series["weather_cell"].fillna(-1).to_numpy(dtype=np.int64)
+    if not (cell >= 0).any():
+        return series
+    from weather import join_cells
+
+    names = {v: k for k, v in _TIMESERIES_NAMES.items()}
+    raw = series[["date", *names]].rename(columns=names)
+    joined = join_cells(grid, raw, cell)
+    out = series.copy()
+    for src, dst in _TIMESERIES_NAMES.items():
+        out[dst] = joined[src].to_numpy()
+    return out
+
+
+class _FileLock:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self):
+        self._f = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._f, fcntl.LOCK_UN)
+        self._f.close()
+
+
+class IngestLog:
+    def __init__(self, log_dir):
+        self.dir = Path(log_dir)
+        self._lock_path = self.dir / "log.lock"
+
+    def _segments(self) -> dict:
+        """seq -> {"jsonl": Path, "parquet": Path} (hangisi varsa)."""
+        segs = {}
+        if not self.dir.exists():
+            return segs
+        for name in os.listdir(self.dir):
+            m = _SEGMENT_RE.match(name)
+            if m:
+                segs.setdefault(int(m.group(2)), {})[m.group(3)] = self.dir / name
+        return segs
+
+    def _active_seq(self, segs: dict) -> int:
+        return max(segs) if segs else 0
+
+    def append(self, batch: pd.DataFrame) -> int:
+        """Doğrulanmış satırları aktif segmente tek write ile ekle."""
+        if batch.empty:
+            return 0
+        self.dir.mkdir(parents=True, exist_ok=True)
+        out = batch.assign(date=batch["date"].dt.strftime("%Y-%m-%d"))
+        # NaN (gridden okunacak meteo) ve -1 hücre yazılmaz: satır sadece gözlemi taşır
+        payload = "".join(
+            json.dumps({k: v for k, v in r.items() if v == v and not (k == "weather_cell" and v < 0)},
+                       ensure_ascii=False) + "\n"
+            for r in out.to_dict(orient="records")
+        )
+
+        with _FileLock(self._lock_path):
+            seq = self._active_seq(self._segments())
+            fd = os.open(self.dir / f"log-{seq}.jsonl", os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, payload.encode("utf-8"))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        return len(batch)
+
+    def end_marker(self) -> tuple:
+        """Ucuz değişiklik kontrolü: (aktif seq, aktif segment byte boyu)."""
+        segs = self._segments()
+        if not segs:
+            return (0, 0)
+        seq = self._active_seq(segs)
+        path = segs[seq].get("jsonl")
+        return (seq, path.stat().st_size if path is not None else -1)
+
+    def read_since(self, cursor: tuple = None):
+        """
+        cursor'dan sonraki satırlar: (DataFrame, yeni cursor).
+        cursor = (seq, tüketilen satır, byte offset); None = baştan.
+        """
+        seq0, rows0, off0 = cursor if cursor is not None else (0, 0, 0)
+        segs = self._segments()
+        frames = []
+        cur = (seq0, rows0, off0)
+
+        for seq in sorted(s for s in segs if s >= seq0):
+            skip_rows = rows0 if seq == seq0 else 0
+            skip_bytes = off0 if seq == seq0 else 0
+            paths = segs[seq]
+
+            data = None
+            if "jsonl" in paths:
+                try:
+                    with open(paths["jsonl"], "rb") as f:
+                        f.seek(skip_bytes)
+                        data = f.read()
+                except FileNotFoundError:
+                    # Okurken sıkıştırıldı: parquet kopyasından devam
+                    paths = {"parquet": self.dir / f"part-{seq}.parquet"}
+
+            if data is not None:
+                # Yarım yazılmış son satırı bir sonraki okumaya bırak
+                data = data[:data.rfind(b"\n") + 1]
+                lines = [json.loads(l) for l in data.decode("utf-8").splitlines() if l.strip()]
+                if lines:
+                    frames.append(pd.DataFrame(lines))
+                cur = (seq, skip_rows + len(lines), skip_bytes + len(data))
+            else:
+                part = pd.read_parquet(paths["parquet"])
+                if len(part) > skip_rows:
+                    frames.append(part.iloc[skip_rows:])
+                # Sıkıştırılmış segment kapandı: byte offset'in anlamı kalmadı
+                cur = (seq, len(part), -1)
+
+        if not frames:
+            return validate_rows([]), cur
+        return validate_rows(pd.concat(frames, ignore_index=True), strict=False), cur
+
+    def compact(self) -> int:
+        """Aktif segmenti döndür, kapanan jsonl segmentlerini parquet'e çevir."""
+        with _FileLock(self._lock_path):
+            segs = self._segments()
+            if not segs:
+                return 0
+            active = self._active_seq(segs)
+            active_path = segs[active].get("jsonl")
+            if active_path is not None and active_path.stat().st_size > 0:
+                # Yeni yazmalar bundan sonra yeni segmente gider
+                (self.dir / f"log-{active + 1}.jsonl").touch()
+                active += 1
+
+        n = 0
+        for seq, paths in sorted(self._segments().items()):
+            if seq >= active or "jsonl" not in paths:
+                continue
+            if "parquet" not in paths:
+                rows, _ = self.read_since((seq, 0, 0))
+                tmp = self.dir / f"part-{seq}.parquet.tmp"
+                rows.to_parquet(tmp, index=False)
+                os.replace(tmp, self.dir / f"part-{seq}.parquet")
+            paths["jsonl"].unlink(missing_ok=True)
+            n += 1
+        return n
+
+    def start_compactor(self, interval_s: float) -> threading.Event:
+        """Arka planda periyodik sıkıştırma; dönen Event set edilince durur."""
+        stop = threading.Event()
+
+        def _loop():
+            while not stop.wait(interval_s):
+                try:
+                    self.compact()
+                except Exception:
+                    # Sıkıştırma başarısızsa log olduğu gibi kalır, bir sonraki turda tekrar denenir
+                    pass
+
+        threading.Thread(target=_loop, name="ingest-compactor", daemon=True).start()
+        return stop
+
+
+def _parcel_weather(raw: pd.DataFrame, grid_path: str, parcels_path: str):
+    from weather import ParcelWeather, WeatherGrid
+
+    # Merkezler: parcels.json, yoksa girdideki latitude/longitude
+    centers = pd.DataFrame(columns=["parcel_id", "lat", "lon"])
+    if os.path.exists(parcels_path):
+        with open(parcels_path, encoding="utf-8") as f:
+            centers = pd.DataFrame(
+                [{"parcel_id": p["parcel_id"], "lat": p["center"][0], "lon": p["center"][1]} for p in json.load(f)]
+            )
+    if {"latitude", "longitude"} <= set(raw.columns):
+        own = (raw.groupby("parcel_id")[["latitude", "longitude"]].first().reset_index()
+               .rename(columns={"latitude": "lat", "longitude": "lon"}))
+        own["parcel_id"] = own["parcel_id"].astype(str)
+        centers = pd.concat([centers, own[~own["parcel_id"].isin(centers["parcel_id"])]], ignore_index=True)
+
+    return ParcelWeather(WeatherGrid.load(grid_path), centers["parcel_id"], centers["lat"], centers["lon"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AquaGuard gözlem ingest'i")
+    parser.add_argument("path", nargs="?", help="Yeni gözlemler (CSV veya parquet)")
+    parser.add_argument("--log-dir", default=str(Path(__file__).parent / "data" / "ingest"))
+    parser.add_argument("--compact", action="store_true", help="Log'u parquet segmentlerine sıkıştır")
+    parser.add_argument("--weather", help="Eksik meteo kolonları için grid (.npz/.parquet/.nc, bkz. weather.py)")
+    parser.add_argument("--parcels", default=str(Path(__file__).parent / "data" / "parcels.json"),
+                        help="Grid eşlemesi için parsel merkezleri")
+    args = parser.parse_args()
+
+    log = IngestLog(args.log_dir)
+    if args.path:
+        src = Path(args.path)
+        raw = pd.read_parquet(src) if src.suffix == ".parquet" else pd.read_csv(src)
+        weather = _parcel_weather(raw, args.weather, args.parcels) if args.weather else None
+        n = log.append(validate_rows(raw, weather=weather))
+        print(f"✅ {n} satır log'a eklendi: {args.log_dir}")
+    if args.compact:
+        print(f"✅ {log.compact()} segment sıkıştırıldı")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,53 @@
+import asyncio
+import json
+import os
+import threading
 
-import joblib
 import numpy as np
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pathlib import Path
 import pandas as pd
 
+from admission import AdmissionMiddleware, default_limiters
+from timing import TimingMiddleware, is_admin, profile_report, stage, timed
+from result_cache import ResultCache, file_stamp
+import shared_data
+from model_server import ModelServer
+from spatial import GridIndex
+from tiles import RiskPyramid
+import ingest
+import explain
+import model_artifact
+from shadow import ShadowScorer
+import planner
+from catalog import ParcelCatalog
+import events
+from static_assets import NegotiatedGZipMiddleware, PrecompressedStaticFiles
+import sparse_ts
+from drift import DriftMonitor, reference_path
+from weather import ParcelWeather, WeatherGrid
+
 app = FastAPI(title="AquaGuard AI Backend (MVP)")
 
 
 FRONTEND_DIR = Path(__file__).resolve().parents[1] / "proj"
-if FRONTEND_DIR.exists():
-    # root "/" üzerinden proj/index.html servisi
-    app.mount("/", StaticFiles(directory=str(FRONTEND_DIR), html=True), name="frontend")
+# build_assets.py çıktısı (hash'li + .gz/.br); yoksa kaynak klasör olduğu gibi servis edilir
+FRONTEND_DIST_DIR = FRONTEND_DIR / "dist"
+
+# Büyük JSON cevapları (toplu tahmin, plan, katalog) gzip'lenir; SSE atlanır,
+# statik mount'un cevaplarına hiç dokunulmaz (bkz. static_assets.py)
+app.add_middleware(NegotiatedGZipMiddleware, router=app.router,
+                   minimum_size=int(os.environ.get("AQUAGUARD_GZIP_MIN_BYTES", 1024)))
+
+# Aşırı yükte /predict ve /timeseries hızlı 503 döner; /health etkilenmez
+ADMISSION_LIMITERS = default_limiters()
+app.add_middleware(AdmissionMiddleware, limiters=ADMISSION_LIMITERS)
+
+# Aşama süreleri -> Server-Timing header'ı, ?profile=1 (admin) ve yavaş istek logu
+app.add_middleware(TimingMiddleware)
 
 # Frontend rahatça çağırabilsin (hackathon için)
 app.add_middleware(
@@ -26,118 +60,705 @@ app.add_middleware(
 
 DATA_DIR = Path(__file__).parent / "data"
 CSV_PATH = DATA_DIR / "parcels_timeseries1.csv"
+# Varsa seyrek depo (bkz. sparse_ts.py, ../ml/sparse_ts.py) CSV'ye tercih edilir
+SPARSE_TS_PATH = sparse_ts.sparse_path(CSV_PATH)
+PARCELS_JSON_PATH = DATA_DIR / "parcels.json"
+INGEST_DIR = DATA_DIR / "ingest"
+
+# Günlük gözlemler için append-only log (bkz. ingest.py)
+_ingest_log = ingest.IngestLog(INGEST_DIR)
+_data_lock = threading.RLock()
 
 ML_PARQUET_PATH = DATA_DIR / "ml_ready_data.parquet"
 MODEL_PATH = Path(__file__).parent / "model" / "aquaguard_model.pkl"
+# Varsa native artifact (bkz. model_artifact.py) pickle'a tercih edilir
+MODEL_MANIFEST_PATH = model_artifact.manifest_path(MODEL_PATH)
 
 _model_cache = None
+_model_stamp = None
+_model_fingerprint = None
 _ml_df_cache = None
+_ml_df_stamp = None
+_ml_df_version = 0  # her yeniden yükleme / ingest'te artar
+_ml_ingest_cursor = None
+_ml_ingest_marker = None
+_ml_latest_dates = {}  # parcel_id -> en güncel feature tarihi (ISO)
+
+# /predict sonuç cache'i: (parcel_id, son feature tarihi, model parmak izi)
+# -> (sonuç, feature satırı, ham tahmin); satır hit'lerde drift sayacı için tutulur
+_predict_cache = ResultCache(
+    maxsize=int(os.environ.get("AQUAGUARD_PREDICT_CACHE_SIZE", 4096)),
+    ttl_s=float(os.environ.get("AQUAGUARD_PREDICT_CACHE_TTL_S", 3600)),
+)
 
 FEATURES = [
     'temperature_2m_max', 'precipitation_sum', 'et0_fao_evapotranspiration',
     'ndvi', 'ndvi_lag_1', 'rain_lag_1', 'rain_sum_7d', 'temp_mean_7d', 'evap_sum_7d'
 ]
 
+# Model katkı çıktısı vermiyorsa kullanılan sabit açıklama
+DEFAULT_TOP_FACTORS = ["rain_sum_7d", "temp_mean_7d", "evap_sum_7d"]
+CONTRIB_COLUMNS = [f"contrib_{f}" for f in FEATURES]
+
+def active_model_path() -> Path:
+    return MODEL_MANIFEST_PATH if MODEL_MANIFEST_PATH.exists() else MODEL_PATH
+
 def load_model():
-    global _model_cache
-    if _model_cache is None:
-        _model_cache = joblib.load(MODEL_PATH)
+    """Model dosyası değiştiyse (mtime/size) yeniden yükler ve predict cache'ini boşaltır."""
+    global _model_cache, _model_stamp, _model_fingerprint
+    path = active_model_path()
+    stamp = (path.name,) + file_stamp(path)
+    if _model_cache is None or stamp != _model_stamp:
+        # Feature sırası FEATURES ile uyuşmazsa ArtifactError (sessizce yanlış tahmin yerine)
+        _model_cache = model_artifact.load_model_file(path, FEATURES)
+        # Shadow ve drift referansıyla aynı kaynak (manifest'teki sha256 ya da pickle'ın sha256'sı)
+        _model_fingerprint = model_artifact.fingerprint(path)[:12]
+        _model_stamp = stamp
+        _predict_cache.clear()
     return _model_cache
 
+def model_fingerprint() -> str:
+    load_model()
+    return _model_fingerprint
+
+# Opsiyonel process-pool inference (AQUAGUARD_INFERENCE_WORKERS > 0)
+_model_server = None
+
+@app.on_event("startup")
+def _start_model_server():
+    global _model_server
+    # Yol her gönderimde çözülür: manifest sonradan yazılırsa havuz ona geçer
+    _model_server = ModelServer.from_env(active_model_path, FEATURES)
+
+@app.on_event("shutdown")
+def _stop_model_server():
+    # Tek kapatma noktası: aday skorlama havuzu kullandığı için önce shadow durur
+    if _shadow is not None:
+        _shadow.shutdown()
+    if _model_server is not None:
+        _model_server.shutdown()
+
+# Opsiyonel shadow (aday) model (AQUAGUARD_SHADOW_MODEL, bkz. shadow.py)
+_shadow = None
+
+@app.on_event("startup")
+def _start_shadow():
+    global _shadow
+    # Inference havuzu açıksa aday model de orada skorlanır (GIL dışında)
+    _shadow = ShadowScorer.from_env(FEATURES, DATA_DIR / "shadow" / "predictions.jsonl", _model_server)
+
+# Drift izleme: model yanındaki referans varsa (python drift.py) açılır, bkz. drift.py
+DRIFT_REFERENCE_PATH = reference_path(MODEL_PATH)
+_drift = None
+_drift_stamp = None
+
+def load_drift():
+    """Referans dosyası değişince (yeni model) canlı sayaçlar sıfırdan başlar; yoksa None."""
+    global _drift, _drift_stamp
+    if not DRIFT_REFERENCE_PATH.exists():
+        return None
+    stamp = file_stamp(DRIFT_REFERENCE_PATH)
+    if _drift is None or stamp != _drift_stamp:
+        _drift = DriftMonitor.from_env(DRIFT_REFERENCE_PATH)
+        _drift_stamp = stamp
+    return _drift
+
+def predict_ndvi(X: np.ndarray) -> np.ndarray:
+    """Feature matrisi -> 7 gün sonrası NDVI tahmini (pool açıksa GIL dışında)."""
+    if _model_server is not None:
+        return _model_server.predict(X)
+    return np.asarray(load_model().predict(X), dtype=float)
+
+def observe_drift(X: np.ndarray, ndvi_pred):
+    """
+    Servis edilen tahminleri drift sayaçlarına ekler. Handler'lardan çağrılır:
+    /predict tablo / cache hit'leri de sayılır; /predict/batch her tablo satırını
+    veri/model sürümü başına bir kez sayar; risk tablosunun yeniden hesaplanması sayılmaz.
+    """
+    monitor = load_drift()
+    if monitor is not None and len(X):
+        risk_7d = np.clip((1.0 - np.asarray(ndvi_pred, dtype=float)) * 100.0, 0.0, 100.0)
+        monitor.observe(X, FEATURES, risk_7d=risk_7d)
+
+def _read_ml_df() -> pd.DataFrame:
+    df = pd.read_parquet(ML_PARQUET_PATH)
+    df["date"] = pd.to_datetime(df["date"])
+    return df.sort_values(["parcel_id", "date"]).reset_index(drop=True)
+
+def _latest_dates(df: pd.DataFrame) -> dict:
+    return {
+        str(pid): d.strftime("%Y-%m-%d")
+        for pid, d in df.groupby("parcel_id", observed=True)["date"].max().items()
+    }
+
 def load_ml_df():
-    global _ml_df_cache
-    if _ml_df_cache is None:
-        if not ML_PARQUET_PATH.exists():
-            raise FileNotFoundError(f"ml_ready_data.parquet bulunamadı: {ML_PARQUET_PATH}")
-        df = pd.read_parquet(ML_PARQUET_PATH)
-        df["date"] = pd.to_datetime(df["date"])
-        df = df.sort_values(["parcel_id", "date"]).reset_index(drop=True)
+    """
+    Parquet değiştiyse (mtime/size) yeniden okur; ingest log'unda yeni satır varsa
+    sadece onları artımlı olarak ekler. Her iki durumda predict cache'i boşalır.
+    Paylaşımlı modda birleştirilmiş tablo (parquet + log ucu damgasıyla) yeniden
+    yayınlanır: worker'lar ingest sonrası da aynı memmap'i kullanır.
+    """
+    global _ml_df_cache, _ml_df_stamp, _ml_latest_dates, _ml_ingest_cursor, _ml_ingest_marker, _ml_df_version
+    if not ML_PARQUET_PATH.exists():
+        raise FileNotFoundError(f"ml_ready_data.parquet bulunamadı: {ML_PARQUET_PATH}")
+    stamp = file_stamp(ML_PARQUET_PATH)
+    marker = _ingest_log.end_marker()
+    if _ml_df_cache is not None and stamp == _ml_df_stamp and marker == _ml_ingest_marker:
+        return _ml_df_cache
+
+    grid = load_weather_grid()
+    with _data_lock:
+        if _ml_df_cache is not None and stamp == _ml_df_stamp and marker == _ml_ingest_marker:
+            return _ml_df_cache
+        incremental = _ml_df_cache is not None and stamp == _ml_df_stamp
+
+        def build():
+            if incremental:
+                rows, cursor = _ingest_log.read_since(_ml_ingest_cursor)
+                df = ingest.merge_ml(_ml_df_cache, rows, grid)
+            else:
+                rows, cursor = _ingest_log.read_since(None)
+                df = ingest.merge_ml(_read_ml_df(), rows, grid)
+            return df, {"cursor": list(cursor), "parcels": rows["parcel_id"].unique().tolist()}
+
+        if shared_data.enabled():
+            # Yayınlayan worker başka bir cursor'dan başlamış olabilir: son tarihler baştan
+            df, state = shared_data.load_shared_state("ml_ready_data", (*stamp, *marker), build)
+            latest = _latest_dates(df)
+        else:
+            df, state = build()
+            latest = dict(_ml_latest_dates) if incremental else _latest_dates(df)
+            if incremental:
+                # Sadece yeni satırların parselleri değişti
+                latest.update(_latest_dates(df[df["parcel_id"].isin(state["parcels"])]))
+
         _ml_df_cache = df
+        _ml_latest_dates = latest
+        _ml_df_stamp = stamp
+        _ml_ingest_cursor = tuple(state["cursor"])
+        _ml_ingest_marker = marker
+        _ml_df_version += 1
+        _predict_cache.clear()
     return _ml_df_cache
 
 
 _df_cache = None  # CSV'yi her istekte tekrar okumamak için
+_df_stamp = None
+_df_ingest_cursor = None
+_df_ingest_marker = None
 
 def load_df() -> pd.DataFrame:
-    """CSV'yi oku, kolonları normalize et, cache'le."""
-    global _df_cache
-    if _df_cache is None:
-        if not CSV_PATH.exists():
+    """
+    Normalize edilmiş CSV'yi cache'le + ingest edilen satırlar.
+    Paylaşımlı modda (kaynak + log ucu damgasıyla) memmap; ingest sonrası yeniden yayınlanır.
+    """
+    global _df_cache, _df_stamp, _df_ingest_cursor, _df_ingest_marker
+    marker = _ingest_log.end_marker()
+    if _df_cache is not None and marker == _df_ingest_marker:
+        return _df_cache
+
+    with _data_lock:
+        if _df_cache is not None and marker == _df_ingest_marker:
+            return _df_cache
+        if _df_cache is None and not CSV_PATH.exists() and not sparse_ts.is_sparse(SPARSE_TS_PATH):
             raise FileNotFoundError(f"CSV bulunamadı: {CSV_PATH}")
+        stamp = _timeseries_stamp() if _df_cache is None else _df_stamp
+        incremental = _df_cache is not None
 
+        def build():
+            if incremental:
+                rows, cursor = _ingest_log.read_since(_df_ingest_cursor)
+                return ingest.merge_timeseries(_df_cache, rows), {"cursor": list(cursor)}
+            rows, cursor = _ingest_log.read_since(None)
+            return ingest.merge_timeseries(_read_df(), rows), {"cursor": list(cursor)}
+
+        if shared_data.enabled():
+            # Worker'lar arası tek kopya (memmap)
+            df, state = shared_data.load_shared_state("timeseries", (*stamp, *marker), build)
+        else:
+            df, state = build()
+        _df_cache = df
+        _df_stamp = stamp
+        _df_ingest_cursor = tuple(state["cursor"])
+        _df_ingest_marker = marker
+
+    return _df_cache
+
+def _timeseries_stamp() -> tuple:
+    if sparse_ts.is_sparse(SPARSE_TS_PATH):
+        return file_stamp(sparse_ts.meta_path(SPARSE_TS_PATH))
+    return file_stamp(CSV_PATH)
+
+def _read_df() -> pd.DataFrame:
+    """CSV'yi (ya da seyrek depoyu, günlük seriye açarak) oku, kolonları normalize et."""
+    if sparse_ts.is_sparse(SPARSE_TS_PATH):
+        df = sparse_ts.SparseTimeseries(SPARSE_TS_PATH).read()
+    else:
         df = pd.read_csv(CSV_PATH)
 
-        # date sütunu şart
-        if "date" not in df.columns:
-            raise ValueError("CSV içinde 'date' kolonu yok.")
+    # date sütunu şart
+    if "date" not in df.columns:
+        raise ValueError("CSV içinde 'date' kolonu yok.")
 
-        df["date"] = pd.to_datetime(df["date"])
+    # CSV ve seyrek depo aynı dtype'ı versin (pandas sürümüne göre to_datetime [us] dönebilir)
+    df["date"] = pd.to_datetime(df["date"]).astype("datetime64[ns]")
 
-        # Kolon isimlerini frontend için sadeleştir
-        rename_map = {
-            "precipitation_sum": "rain_mm",
-            "temperature_2m_max": "temp_c",
-        }
-        df = df.rename(columns=rename_map)
+    # Kolon isimlerini frontend için sadeleştir
+    rename_map = {
+        "precipitation_sum": "rain_mm",
+        "temperature_2m_max": "temp_c",
+    }
+    df = df.rename(columns=rename_map)
 
-        # Gerekli kolonlar var mı?
-        required = {"parcel_id", "ndvi", "rain_mm", "temp_c", "date"}
-        missing = required - set(df.columns)
-        if missing:
-            raise ValueError(f"CSV eksik kolonlar: {missing}")
+    # Gerekli kolonlar var mı?
+    required = {"parcel_id", "ndvi", "rain_mm", "temp_c", "date"}
+    missing = required - set(df.columns)
+    if missing:
+        raise ValueError(f"CSV eksik kolonlar: {missing}")
 
-        # Sıralama (grafik düzgün çizilsin)
-        df = df.sort_values(["parcel_id", "date"]).reset_index(drop=True)
-        _df_cache = df
+    # Sıralama (grafik düzgün çizilsin)
+    df = df.sort_values(["parcel_id", "date"]).reset_index(drop=True)
+    return df
 
-    return _df_cache
+# (anahtar, tablo, X): tek atamayla yayınlanır; X tablo satırlarıyla aynı sırada feature matrisi
+_risk_state = None
+
+def load_risk_table() -> pd.DataFrame:
+    """
+    Tüm parsellerin en güncel risk tahmini (index: parcel_id).
+    Tek matris ile toplu skorlanır; veri veya model değişince yeniden hesaplanır.
+    """
+    return load_risk_state()[1]
+
+def load_risk_state():
+    """(anahtar (veri sürümü, model), risk tablosu, feature matrisi) — birbiriyle tutarlı anlık görüntü."""
+    global _risk_state
+    df = load_ml_df()
+    load_model()
+    key = (_ml_df_version, _model_fingerprint)
+    state = _risk_state
+    if state is None or key != state[0]:
+        # Parsel başına feature'ları tam olan en güncel satır (train.py'deki dropna ile aynı);
+        # hiç tam satırı olmayan (geçmişi kısa) parsel tabloda yok, /predict fallback'e düşer
+        complete = df[FEATURES].notna().all(axis=1).to_numpy()
+        last = df[complete].groupby("parcel_id", observed=True).tail(1)
+        X = last[FEATURES].to_numpy(dtype=float)
+        preds = predict_ndvi(X) if len(last) else np.empty(0)
+        risk_7d = np.clip((1.0 - preds) * 100.0, 0.0, 100.0)
+        # Açıklamalar da aynı batch için tek vektörize geçişte hesaplanır
+        contrib, factors = explain_risk(X)
+
+        table = pd.DataFrame(
+            {
+                "date": last["date"].to_numpy(),
+                "ndvi_7d_pred": preds,
+                "risk_7d": risk_7d,
+                "risk_14d": np.minimum(100.0, risk_7d + 8.0),
+                "top_factors": factors,
+            },
+            index=pd.Index(last["parcel_id"].astype(str).to_numpy(), name="parcel_id"),
+        )
+        if contrib is not None:
+            table[CONTRIB_COLUMNS] = contrib
+        state = (key, table, X)
+        _risk_state = state
+    return state
+
+
+def explain_risk(X: np.ndarray):
+    """
+    Feature matrisi -> (risk puanı katkıları (n, len(FEATURES)) veya None, top_factors listeleri).
+    """
+    if not len(X):
+        out = None
+    elif _model_server is not None:
+        # pred_contrib de GIL dışında, tahminle aynı havuzda
+        out = _model_server.contributions(X)
+    else:
+        out = explain.contributions(load_model(), X, FEATURES)
+    if out is None:
+        return None, [list(DEFAULT_TOP_FACTORS) for _ in range(len(X))]
+    contrib = explain.risk_contributions(out[0])
+    return contrib, explain.top_factors(contrib, FEATURES)
+
+def _contrib_dict(values) -> dict:
+    return {f: round(float(v), 2) for f, v in zip(FEATURES, values)}
+
+
+_parcel_spatial = None  # (meta, GridIndex)
+_parcel_meta_src = None  # (parcels.json stamp, load_df() çerçevesi)
+
+def _read_parcel_meta(df: pd.DataFrame) -> pd.DataFrame:
+    rows = []
+    if PARCELS_JSON_PATH.exists():
+        for p in json.loads(PARCELS_JSON_PATH.read_text(encoding="utf-8")):
+            lat, lon = p.get("center", [None, None])
+            rows.append({"parcel_id": p["parcel_id"], "name": p.get("name") or p["parcel_id"], "lat": lat, "lon": lon})
+    meta = pd.DataFrame(rows, columns=["parcel_id", "name", "lat", "lon"])
+
+    if {"latitude", "longitude"} <= set(df.columns):
+        centers = (
+            df.groupby("parcel_id", observed=True)[["latitude", "longitude"]].first()
+            .reset_index()
+            .rename(columns={"latitude": "lat", "longitude": "lon"})
+        )
+        centers["parcel_id"] = centers["parcel_id"].astype(str)
+        centers = centers[~centers["parcel_id"].isin(meta["parcel_id"])]
+        centers["name"] = centers["parcel_id"]
+        meta = pd.concat([meta, centers[meta.columns]], ignore_index=True)
+
+    return meta.dropna(subset=["lat", "lon"]).reset_index(drop=True)
+
+def load_parcel_meta() -> pd.DataFrame:
+    """
+    Parsel metadata'sı (parcel_id, name, lat, lon) + spatial index.
+    parcels.json birincil kaynak; orada olmayan parseller için CSV'deki latitude/longitude kullanılır.
+    parcels.json ya da zaman serisi (ingest) değişince yeniden okunur; içerik aynıysa
+    aynı nesne döner. Sadece yeni parsel geldiyse mevcut satırlar yerinde kalır, yeniler
+    sona eklenir (spatial index ve karo piramidi artımlı genişler).
+    """
+    return _load_spatial()[0]
+
+def _load_spatial():
+    """(meta, spatial index) çifti; ikisi hep birlikte değişir."""
+    global _parcel_spatial, _parcel_meta_src
+    df = load_df()
+    stamp = file_stamp(PARCELS_JSON_PATH) if PARCELS_JSON_PATH.exists() else None
+    src = _parcel_meta_src
+    if _parcel_spatial is not None and src[0] == stamp and src[1] is df:
+        return _parcel_spatial
+
+    with _data_lock:
+        src = _parcel_meta_src
+        if _parcel_spatial is None or src[0] != stamp or src[1] is not df:
+            meta = _read_parcel_meta(df)
+            old = _parcel_spatial[0] if _parcel_spatial is not None else None
+            if old is None:
+                _parcel_spatial = (meta, GridIndex(meta["lat"].to_numpy(), meta["lon"].to_numpy()))
+            else:
+                added = meta[~meta["parcel_id"].isin(old["parcel_id"])]
+                kept = meta.set_index("parcel_id").reindex(old["parcel_id"]).reset_index()[meta.columns]
+                if kept.equals(old):
+                    if len(added):
+                        meta = pd.concat([old, added], ignore_index=True)
+                        index = _parcel_spatial[1].extended(added["lat"].to_numpy(), added["lon"].to_numpy())
+                        _parcel_spatial = (meta, index)
+                elif not meta.equals(old):
+                    # Parsel silindi / taşındı: tam kurulum
+                    _parcel_spatial = (meta, GridIndex(meta["lat"].to_numpy(), meta["lon"].to_numpy()))
+            _parcel_meta_src = (stamp, df)
+    return _parcel_spatial
+
+_catalog = None
+_catalog_src = None
+
+def load_catalog() -> ParcelCatalog:
+    """Sıralı parsel kataloğu; zaman serisi (ingest dahil) değişince yeniden kurulur."""
+    global _catalog, _catalog_src
+    df = load_df()
+    if _catalog is None or df is not _catalog_src:
+        with _data_lock:
+            names = {}
+            if PARCELS_JSON_PATH.exists():
+                names = {
+                    p["parcel_id"]: p.get("name")
+                    for p in json.loads(PARCELS_JSON_PATH.read_text(encoding="utf-8"))
+                }
+            _catalog = ParcelCatalog(df["parcel_id"].astype(str).unique(), names)
+            _catalog_src = df
+    return _catalog
+
+WEATHER_GRID_PATH = Path(os.environ.get("AQUAGUARD_WEATHER_GRID", DATA_DIR / "weather" / "grid.npz"))
+_weather_grid = None
+_weather_grid_stamp = None
+_parcel_weather = None
+_parcel_weather_key = None  # (grid, meta) nesneleri
+
+def load_weather_grid():
+    """Gridli meteo (bkz. weather.py); dosya yoksa None, değişince (mtime/size) yeniden okunur."""
+    global _weather_grid, _weather_grid_stamp
+    if not WEATHER_GRID_PATH.exists():
+        return None
+    stamp = file_stamp(WEATHER_GRID_PATH)
+    if _weather_grid is None or stamp != _weather_grid_stamp:
+        _weather_grid = WeatherGrid.load(WEATHER_GRID_PATH)
+        _weather_grid_stamp = stamp
+    return _weather_grid
+
+def load_parcel_weather():
+    """
+    Grid + parsel -> hücre indeksi; grid dosyası yoksa None.
+    İndeks grid ya da parsel metadata'sı (parcels.json / ingest) değişince yeniden kurulur.
+    """
+    global _parcel_weather, _parcel_weather_key
+    grid = load_weather_grid()
+    if grid is None:
+        return None
+    meta = load_parcel_meta()
+    key = _parcel_weather_key
+    if _parcel_weather is None or key[0] is not grid or key[1] is not meta:
+        _parcel_weather = ParcelWeather(grid, meta["parcel_id"], meta["lat"], meta["lon"])
+        _parcel_weather_key = (grid, meta)
+    return _parcel_weather
+
+_risk_pyramid = None
+_risk_pyramid_key = None
+_risk_pyramid_lock = threading.Lock()
+
+def load_risk_pyramid() -> RiskPyramid:
+    """
+    Zoom seviyeleri için risk karo piramidi. İlk seferde tam kurulur;
+    risk tablosu değişince sadece değişen parsellerin karoları güncellenir.
+    Yeni parseller sona eklenir; parsel silinir / taşınırsa piramit yeniden kurulur.
+    """
+    global _risk_pyramid, _risk_pyramid_key
+    meta = load_parcel_meta()
+    table_key, table, _ = load_risk_state()
+    key = (table_key, meta)
+
+    def fresh():
+        k = _risk_pyramid_key
+        return _risk_pyramid is not None and k[0] == key[0] and k[1] is meta
+
+    if fresh():
+        return _risk_pyramid
+
+    # Kontrol + güncelleme tek lock altında (sync endpoint'ler threadpool'da eşzamanlı)
+    with _risk_pyramid_lock:
+        if fresh():
+            return _risk_pyramid
+        risk = table["risk_7d"].reindex(meta["parcel_id"]).to_numpy(dtype=float)
+        prev = _risk_pyramid_key[1] if _risk_pyramid is not None else None
+        if prev is not None and prev is not meta and _extends(prev, meta):
+            n = len(prev)
+            _risk_pyramid.add_parcels(meta["lat"].to_numpy()[n:], meta["lon"].to_numpy()[n:], risk[n:])
+            prev = meta
+        if prev is not meta:
+            pyramid = RiskPyramid(
+                meta["lat"].to_numpy(), meta["lon"].to_numpy(),
+                max_zoom=int(os.environ.get("AQUAGUARD_TILE_MAX_ZOOM", 12)),
+            )
+            pyramid.build(risk)
+            _risk_pyramid = pyramid
+        else:
+            _risk_pyramid.update(risk)
+        _risk_pyramid_key = key
+    return _risk_pyramid
+
+def _extends(old: pd.DataFrame, new: pd.DataFrame) -> bool:
+    return len(new) >= len(old) and new.iloc[:len(old)].equals(old)
+
+def _parcels_with_risk(meta: pd.DataFrame, idx: np.ndarray, dist_km: np.ndarray = None) -> list:
+    meta = meta.iloc[idx]
+    try:
+        risk = load_risk_table()["risk_7d"].reindex(meta["parcel_id"]).to_numpy()
+    except Exception:
+        # Model/parquet yoksa konumlar yine dönsün
+        risk = np.full(len(meta), np.nan)
+
+    out = []
+    for i, (pid, name, lat, lon) in enumerate(zip(meta["parcel_id"], meta["name"], meta["lat"], meta["lon"])):
+        item = {"parcel_id": pid, "name": name, "lat": float(lat), "lon": float(lon),
+                "risk_7d": None if np.isnan(risk[i]) else round(float(risk[i]), 1)}
+        if dist_km is not None:
+            item["distance_km"] = round(float(dist_km[i]), 3)
+        out.append(item)
+    return out
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/stats")
+def stats():
+    """Kapasite planlaması için sayaçlar (reddedilen istekler vb.)."""
+    return {
+        "admission": {route: lim.stats() for route, lim in ADMISSION_LIMITERS.items()},
+        "predict_cache": _predict_cache.stats(),
+        "model_server": _model_server.stats() if _model_server is not None else None,
+        "shadow": _shadow.stats() if _shadow is not None else None,
+        "events": _events.stats(),
+        "drift": _drift.stats() if _drift is not None else None,
+    }
+
+@app.get("/drift")
+def get_drift():
+    """Canlı feature / risk dağılımının eğitim referansına göre kayması (PSI, bkz. drift.py)."""
+    monitor = load_drift()
+    if monitor is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": f"drift referansı yok: {DRIFT_REFERENCE_PATH.name} (python drift.py ile üretin)"},
+        )
+    return monitor.report()
+
+@app.get("/admin/profiles/{name}")
+def get_profile(name: str, request: Request):
+    """?profile=1 ile kaydedilen profilin özeti (X-Admin-Token gerekli)."""
+    if not is_admin(request.headers):
+        return JSONResponse(status_code=403, content={"error": "admin token required"})
+    try:
+        return PlainTextResponse(profile_report(name))
+    except FileNotFoundError:
+        return JSONResponse(status_code=404, content={"error": "profile not found"})
+
 @app.get("/parcels")
 def get_parcels():
     """
-    CSV'deki parcel_id'lerin listesini döndürür.
-    Frontend buradan seçim listesi/map için veri alır.
+    CSV'deki parcel_id'lerin listesini döndürür (tamamı; büyük listeler için /parcels/catalog).
     """
-    df = load_df()
-    parcel_ids = sorted(df["parcel_id"].unique().tolist())
-    return [{"parcel_id": pid, "name": pid} for pid in parcel_ids]
+    return load_catalog().all()
+
+@app.get("/parcels/catalog")
+@timed
+def get_parcel_catalog(q: str = None, cursor: str = None, limit: int = 100, include: str = ""):
+    """
+    Sayfalı parsel listesi + prefix araması (type-ahead).
+    q: parcel_id prefix'i (büyük/küçük harf duyarsız), cursor: önceki sayfanın next_cursor'ı,
+    include: "risk" ve/veya "meta" (virgülle), örn. include=risk,meta
+    """
+    cat = load_catalog()
+    pos, next_cursor, total = cat.page(q, cursor, min(max(1, limit), 1000))
+    ids = cat.ids[pos]
+    items = [{"parcel_id": p, "name": n} for p, n in zip(ids, cat.names[pos])]
+
+    parts = {s.strip() for s in include.split(",") if s.strip()}
+    if "risk" in parts and len(items):
+        try:
+            table = load_risk_table().reindex(ids)
+            for item, r7, d in zip(items, table["risk_7d"].to_numpy(), table["date"]):
+                item["risk_7d"] = None if np.isnan(r7) else round(float(r7), 1)
+                item["date"] = None if pd.isna(d) else pd.Timestamp(d).strftime("%Y-%m-%d")
+        except Exception:
+            # Model/parquet yoksa liste yine dönsün
+            for item in items:
+                item["risk_7d"] = item["date"] = None
+    if "meta" in parts and len(items):
+        meta = load_parcel_meta().set_index("parcel_id").reindex(ids)
+        for item, lat, lon in zip(items, meta["lat"].to_numpy(), meta["lon"].to_numpy()):
+            item["lat"] = None if np.isnan(lat) else float(lat)
+            item["lon"] = None if np.isnan(lon) else float(lon)
+
+    return {"items": items, "next_cursor": next_cursor, "total": int(total)}
+
+@app.get("/parcels/bbox")
+@timed
+def get_parcels_bbox(min_lat: float, min_lon: float, max_lat: float, max_lon: float, limit: int = 5000):
+    """
+    Harita görünür alanındaki parseller (+ cache'lenmiş risk).
+    """
+    meta, index = _load_spatial()
+    idx = index.bbox(min_lat, min_lon, max_lat, max_lon)[:max(0, limit)]
+    return _parcels_with_risk(meta, idx)
+
+@app.get("/parcels/nearby")
+@timed
+def get_parcels_nearby(lat: float, lon: float, radius_km: float = None, n: int = 10):
+    """
+    radius_km verilirse yarıçap içindekiler (en fazla n), verilmezse en yakın n parsel.
+    """
+    meta, index = _load_spatial()
+    if radius_km is not None:
+        idx, dist = index.radius(lat, lon, radius_km)
+        idx, dist = idx[:max(0, n)], dist[:max(0, n)]
+    else:
+        idx, dist = index.nearest(lat, lon, n)
+    return _parcels_with_risk(meta, idx, dist)
+
+@app.get("/risk-tiles/{z}")
+@timed
+def get_risk_tiles(z: int, min_lat: float = None, min_lon: float = None,
+                   max_lat: float = None, max_lon: float = None):
+    """
+    Verilen zoom seviyesindeki agrege risk karoları (mean/max/count).
+    bbox verilirse sadece görünür karolar.
+    """
+    bbox = None
+    if None not in (min_lat, min_lon, max_lat, max_lon):
+        bbox = (min_lat, min_lon, max_lat, max_lon)
+    pyramid = load_risk_pyramid()
+    return {"z": min(max(0, z), pyramid.max_zoom), "cells": pyramid.cells(z, bbox)}
 
 @app.get("/timeseries")
+@timed
 def get_timeseries(parcel_id: str):
     """
     Seçilen parselin NDVI + meteo serisini döndürür.
     """
-    df = load_df()
-    sub = df[df["parcel_id"] == parcel_id].copy()
+    with stage("load"):
+        df = load_df()
+    with stage("parcel_filter"):
+        sub = df[df["parcel_id"] == parcel_id].copy()
 
     if sub.empty:
         return {"parcel_id": parcel_id, "ndvi": [], "meteo": []}
 
-    ndvi_series = [
-        {"date": d.strftime("%Y-%m-%d"), "value": float(v)}
-        for d, v in zip(sub["date"], sub["ndvi"])
-    ]
+    with stage("weather"):
+        # Ingest edilen satırların meteo'su satırda değil, grid hücresinde
+        sub = ingest.join_timeseries(sub, load_weather_grid())
+
+    with stage("build_series"):
+        ndvi_series = [
+            {"date": d.strftime("%Y-%m-%d"), "value": float(v)}
+            for d, v in zip(sub["date"], sub["ndvi"])
+        ]
 
-    meteo_series = [
-        {"date": d.strftime("%Y-%m-%d"), "rain_mm": float(r), "temp_c": float(t)}
-        for d, r, t in zip(sub["date"], sub["rain_mm"], sub["temp_c"])
-    ]
+        meteo_series = [
+            {"date": d.strftime("%Y-%m-%d"), "rain_mm": float(r), "temp_c": float(t)}
+            for d, r, t in zip(sub["date"], sub["rain_mm"], sub["temp_c"])
+        ]
 
     return {"parcel_id": parcel_id, "ndvi": ndvi_series, "meteo": meteo_series}
 
 @app.post("/predict")
+@timed
 def predict(payload: dict):
     parcel_id = payload.get("parcel_id")
     if not parcel_id:
         return {"error": "parcel_id required"}
 
     try:
-        df = load_ml_df()
-        sub = df[df["parcel_id"] == parcel_id]
+        with stage("load"):
+            df = load_ml_df()
+            model = load_model()
+
+        # Aynı parsel + aynı veri günü + aynı model => aynı sonuç
+        with stage("cache"):
+            latest = _ml_latest_dates.get(parcel_id)
+            cache_key = (parcel_id, latest, _model_fingerprint)
+            cached = _predict_cache.get(cache_key) if latest is not None else None
+        if cached is not None:
+            result, x, pred = cached
+            if x is not None:
+                observe_drift(x[None, :], [pred])
+            return dict(result)
+
+        # Risk tablosu bu veri+model için hazırsa tahmin ve açıklama oradan gelir
+        state = _risk_state
+        fresh = state is not None and state[0] == (_ml_df_version, _model_fingerprint)
+        table, table_X = (state[1], state[2]) if fresh else (None, None)
+        if table is not None and parcel_id in table.index:
+            with stage("risk_table"):
+                rec = table.loc[parcel_id]
+                result = {
+                    "parcel_id": parcel_id,
+                    "ndvi_7d_pred": round(float(rec["ndvi_7d_pred"]), 4),
+                    "risk_7d": round(float(rec["risk_7d"]), 1),
+                    "risk_14d": round(float(rec["risk_14d"]), 1),
+                    "top_factors": list(rec["top_factors"]),
+                }
+                if CONTRIB_COLUMNS[0] in table.columns:
+                    result["contributions"] = _contrib_dict(rec[CONTRIB_COLUMNS])
+            x = table_X[table.index.get_loc(parcel_id)]
+            pred = float(rec["ndvi_7d_pred"])
+            observe_drift(x[None, :], [pred])
+            if _shadow is not None:
+                _shadow.submit(parcel_id, x, pred, _model_fingerprint)
+            _predict_cache.put(cache_key, (result, x, pred))
+            return dict(result)
+
+        with stage("parcel_filter"):
+            sub = df[df["parcel_id"] == parcel_id].dropna(subset=FEATURES)
         if sub.empty:
             return {
                 "parcel_id": parcel_id,
@@ -146,26 +767,37 @@ def predict(payload: dict):
                 "top_factors": ["no_ml_data_for_parcel"]
             }
 
-        # En güncel satır = en güncel feature set
-        row = sub.iloc[-1]
+        with stage("features"):
+            # Feature'ları tam olan en güncel satır
+            row = sub.iloc[-1]
 
-        # Modelin beklediği feature sırasıyla X oluştur
-        X = np.array([[float(row[f]) for f in FEATURES]], dtype=float)
+            # Modelin beklediği feature sırasıyla X oluştur
+            X = np.array([[float(row[f]) for f in FEATURES]], dtype=float)
 
-        model = load_model()
-        ndvi_7d_pred = float(model.predict(X)[0])
+        with stage("model"):
+            ndvi_7d_pred = float(predict_ndvi(X)[0])
+
+        with stage("explain"):
+            contrib, factors = explain_risk(X)
 
         # NDVI tahmini -> risk skoru (MVP dönüşümü)
         risk_7d = max(0.0, min(100.0, (1.0 - ndvi_7d_pred) * 100.0))
         risk_14d = min(100.0, risk_7d + 8.0)
 
-        return {
+        result = {
             "parcel_id": parcel_id,
             "ndvi_7d_pred": round(ndvi_7d_pred, 4),
             "risk_7d": round(risk_7d, 1),
             "risk_14d": round(risk_14d, 1),
-            "top_factors": ["rain_sum_7d", "temp_mean_7d", "evap_sum_7d"]
+            "top_factors": factors[0],
         }
+        if contrib is not None:
+            result["contributions"] = _contrib_dict(contrib[0])
+        observe_drift(X, [ndvi_7d_pred])
+        if _shadow is not None:
+            _shadow.submit(parcel_id, X[0], ndvi_7d_pred, _model_fingerprint)
+        _predict_cache.put(cache_key, (result, X[0], ndvi_7d_pred))
+        return dict(result)
 
     except Exception:
         # Model/parquet patlarsa demo çökmesin
@@ -177,34 +809,264 @@ def predict(payload: dict):
         }
 
 
+_risk_batch_seen = None  # (risk anahtarı, satır başına "drift'e sayıldı" maskesi)
+_risk_batch_seen_lock = threading.Lock()
+
+@app.post("/predict/batch")
+@timed
+def predict_batch(payload: dict):
+    """
+    Birden çok parselin risk tahmini, risk tablosundan (bkz. load_risk_table: veri ya da
+    model değişince tüm parseller bir kez toplu skorlanır; istek başına model çağrısı yok).
+    parcel_ids verilmezse tüm parseller.
+    """
+    try:
+        parcel_ids = _parcel_ids_arg(payload)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    global _risk_batch_seen
+    key, full, X = load_risk_state()
+    rows = np.flatnonzero(full.index.isin(parcel_ids)) if parcel_ids else np.arange(len(full))
+    table = full.iloc[rows]
+
+    # Drift'e her tablo satırı veri/model sürümü başına bir kez: aynı tabloyu yoklayan
+    # panolar pencereleri aynı satırlarla doldurmasın
+    with _risk_batch_seen_lock:
+        if _risk_batch_seen is None or _risk_batch_seen[0] != key:
+            _risk_batch_seen = (key, np.zeros(len(full), dtype=bool))
+        seen = _risk_batch_seen[1]
+        new = rows[~seen[rows]]
+        seen[new] = True
+    if len(new):
+        observe_drift(X[new], full["ndvi_7d_pred"].to_numpy()[new])
+
+    has_contrib = CONTRIB_COLUMNS[0] in table.columns
+    contrib = table[CONTRIB_COLUMNS].to_numpy() if has_contrib else [None] * len(table)
+    out = []
+    for pid, p, r7, r14, tf, c in zip(
+        table.index, table["ndvi_7d_pred"], table["risk_7d"], table["risk_14d"], table["top_factors"], contrib
+    ):
+        item = {
+            "parcel_id": pid,
+            "ndvi_7d_pred": round(float(p), 4),
+            "risk_7d": round(float(r7), 1),
+            "risk_14d": round(float(r14), 1),
+            "top_factors": list(tf),
+        }
+        if c is not None:
+            # /predict ile aynı şekil: risk puanı katkıları
+            item["contributions"] = _contrib_dict(c)
+        out.append(item)
+    return out
+
+
+@app.post("/ingest")
+@timed
+def ingest_observations(payload: dict):
+    """
+    Günlük gözlem batch'i: {"rows": [{date, parcel_id, ndvi, precipitation_sum,
+    temperature_2m_max, et0_fao_evapotranspiration}, ...]}
+    Meteo kolonları eksikse (sadece NDVI) gridli meteo'dan doldurulur (bkz. weather.py).
+    Satırlar log'a yazılır, sonra sadece etkilenen parsellerin feature'ları güncellenir.
+    """
+    try:
+        # Grid varsa eksik meteo hücreden okunur; doldurulamayan satır varsa 400
+        batch = ingest.validate_rows(payload.get("rows") or [], weather=load_parcel_weather())
+    except (ValueError, TypeError) as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    n = _ingest_log.append(batch)
+    load_ml_df()
+    load_df()
+    _events.notify()
+    return {
+        "ingested": n,
+        "parcels": sorted(batch["parcel_id"].unique().tolist()),
+        "data_version": _ml_df_version,
+    }
+
+_ingest_compactor_stop = None
+
+@app.on_event("startup")
+def _start_ingest_compactor():
+    global _ingest_compactor_stop
+    _ingest_compactor_stop = _ingest_log.start_compactor(
+        float(os.environ.get("AQUAGUARD_INGEST_COMPACT_S", 300))
+    )
+
+@app.on_event("shutdown")
+def _stop_ingest_compactor():
+    if _ingest_compactor_stop is not None:
+        _ingest_compactor_stop.set()
+
+
+# ---- Canlı güncellemeler (SSE) ----
+
+_events = events.Broadcaster(int(os.environ.get("AQUAGUARD_EVENTS_CLIENT_QUEUE", 16)))
+EVENTS_POLL_S = float(os.environ.get("AQUAGUARD_EVENTS_POLL_S", 5))
+EVENTS_HEARTBEAT_S = 15.0
+# Bundan fazla parsel değiştiyse (örn. yeni model) fark yerine "reload" gönderilir
+EVENTS_MAX_DIFF = int(os.environ.get("AQUAGUARD_EVENTS_MAX_DIFF", 5000))
+_events_task = None
+
+def _risk_snapshot():
+    key, table, _ = load_risk_state()
+    return key, table["risk_7d"]
+
+async def _watch_risk():
+    """Risk tablosunu izler; anahtar (veri sürümü, model) değişince farkı yayınlar."""
+    last_key, last_risk = None, None
+    while True:
+        await _events.wait(EVENTS_POLL_S)
+        if not _events.clients:
+            # Dinleyen yok: iş yapma, bağlanan client zaten güncel listeyi REST'ten çeker
+            last_key, last_risk = None, None
+            continue
+        try:
+            key, risk = await run_in_threadpool(_risk_snapshot)
+        except Exception:
+            continue
+        if key == last_key:
+            continue
+        if last_key is not None:
+            changed, removed = events.risk_diff(last_risk, risk)
+            meta = {"data_version": key[0], "model": key[1]}
+            if len(changed) + len(removed) > EVENTS_MAX_DIFF:
+                _events.publish(events.encode("reload", meta))
+            elif changed or removed:
+                _events.publish(events.encode("risk", {**meta, "changed": changed, "removed": removed}))
+        last_key, last_risk = key, risk
+
+@app.on_event("startup")
+async def _start_events():
+    global _events_task
+    _events.bind(asyncio.get_running_loop())
+    _events_task = asyncio.create_task(_watch_risk())
+
+@app.on_event("shutdown")
+async def _stop_events():
+    if _events_task is not None:
+        _events_task.cancel()
+
+@app.get("/events")
+async def stream_events(request: Request):
+    """
+    text/event-stream: "risk" (changed: {parcel_id: risk_7d}, removed, data_version, model),
+    "reload" (çok fazla değişiklik) ve "resync" (client geride kaldı) olayları.
+    """
+    queue = _events.subscribe()
+
+    async def _stream():
+        try:
+            yield events.encode("hello", {"data_version": _ml_df_version, "model": _model_fingerprint})
+            _events.notify()  # İzleyici başlangıç durumunu hemen alsın
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), EVENTS_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield events.HEARTBEAT
+        finally:
+            _events.unsubscribe(queue)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# /recommend gerekçeleri, planner.RISK_BANDS pencere etiketine göre
+RECOMMEND_RATIONALE = {
+    "izlemede kal": "NDVI stabil, kısa vadede ciddi su stresi beklenmiyor.",
+    "5–7 gün içinde": "Orta seviye stres sinyali: yağış azalmaya başladı ve sıcaklık yükseliyor.",
+    "3 gün içinde": "Yüksek su stresi riski: düşük yağış, yüksek sıcaklık ve NDVI düşüş trendi.",
+}
+
 @app.post("/recommend")
 def recommend(payload: dict):
     """
-    Basit kural tabanlı öneri. Hackathon için yeterli.
+    Basit kural tabanlı öneri. Eşikler /plan ile aynı (planner.RISK_BANDS).
     """
     parcel_id = payload.get("parcel_id", "UNKNOWN")
-    risk_7d = payload.get("risk_7d", 0)
+    try:
+        risk_7d = float(payload.get("risk_7d", 0))
+    except (TypeError, ValueError):
+        risk_7d = float("nan")
+    if not np.isfinite(risk_7d):
+        return JSONResponse(status_code=400, content={"error": "risk_7d sonlu bir sayı olmalı"})
 
-    if risk_7d < 40:
-        return {
-            "parcel_id": parcel_id,
-            "window": "izlemede kal",
-            "amount_mm": 0,
-            "rationale": "NDVI stabil, kısa vadede ciddi su stresi beklenmiyor."
-        }
+    mm, window = planner.demand_mm([risk_7d])
+    amount = float(mm[0])
+    return {
+        "parcel_id": parcel_id,
+        "window": str(window[0]),
+        "amount_mm": int(amount) if amount.is_integer() else amount,
+        "rationale": RECOMMEND_RATIONALE.get(str(window[0]), ""),
+    }
 
-    elif risk_7d < 60:
-        return {
-            "parcel_id": parcel_id,
-            "window": "5–7 gün içinde",
-            "amount_mm": 10,
-            "rationale": "Orta seviye stres sinyali: yağış azalmaya başladı ve sıcaklık yükseliyor."
-        }
 
-    else:
-        return {
-            "parcel_id": parcel_id,
-            "window": "3 gün içinde",
-            "amount_mm": 18,
-            "rationale": "Yüksek su stresi riski: düşük yağış, yüksek sıcaklık ve NDVI düşüş trendi."
-        }
+def _parcel_ids_arg(payload: dict):
+    """payload["parcel_ids"] -> string listesi ya da None (boş / verilmemiş = tüm parseller)."""
+    ids = payload.get("parcel_ids")
+    if ids is None:
+        return None
+    if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+        raise ValueError("parcel_ids string listesi olmalı: [\"P1\", \"P2\", ...]")
+    return ids or None
+
+
+@app.post("/plan")
+@timed
+def plan_irrigation(payload: dict):
+    """
+    Ortak su bütçesiyle öncelikli sulama planı (bkz. planner.py):
+    {"total_volume_m3": 50000, "areas_ha": {"P1": 12.5, ...}, "default_area_ha": 1.0,
+     "parcel_ids": [...]}   # parcel_ids verilmezse tüm parseller
+    Riskler tahmin yolundaki risk tablosundan gelir.
+    """
+    try:
+        total = float(payload["total_volume_m3"])
+        default_area = float(payload.get("default_area_ha", 1.0))
+        areas_in = payload.get("areas_ha") or {}
+        # Liste vb. sessizce yok sayılmasın (pd.Series onu 0..n index'iyle kabul ederdi)
+        if not isinstance(areas_in, dict):
+            raise TypeError("areas_ha")
+        areas = pd.Series(areas_in, dtype=float)
+    except (KeyError, TypeError, ValueError):
+        return JSONResponse(
+            status_code=400,
+            content={"error": "total_volume_m3 (sayı) gerekli; areas_ha {parcel_id: hektar} olmalı"},
+        )
+    # float() "Infinity" / "NaN" kabul eder; planner'a sonlu olmayan değer gitmesin
+    values = np.append(areas.to_numpy(), [total, default_area])
+    if not np.isfinite(values).all():
+        return JSONResponse(status_code=400, content={"error": "hacim ve alanlar sonlu sayı olmalı"})
+    if (values < 0).any():
+        return JSONResponse(status_code=400, content={"error": "hacim ve alanlar negatif olamaz"})
+
+    try:
+        parcel_ids = _parcel_ids_arg(payload)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    with stage("risk_table"):
+        table = load_risk_table()
+        if parcel_ids:
+            table = table[table.index.isin(parcel_ids)]
+
+    with stage("allocate"):
+        area = areas.reindex(table.index).fillna(default_area).to_numpy()
+        result = planner.plan(table.index.to_numpy(), table["risk_7d"].to_numpy(), area, total)
+    # Sonuç zaten saf python tipleri: jsonable_encoder'ın satır satır dolaşmasını atla
+    return JSONResponse(content=result)
+
+
+# Frontend mount en sonda olmalı: "/" mount'u tüm path'leri yakaladığı için
+# önce tanımlanırsa API rotalarını gölgeler.
+_frontend_root = FRONTEND_DIST_DIR if (FRONTEND_DIST_DIR / "index.html").exists() else FRONTEND_DIR
+if _frontend_root.exists():
+    # root "/" üzerinden index.html servisi
+    app.mount("/", PrecompressedStaticFiles(directory=str(_frontend_root), html=True), name="frontend")
@@ -0,0 +1,97 @@
+"""
+Native model artifact formatı (XGBoost).
+
+Pickle yerine iki parça:
+  <ad>.ubj            booster'ın native binary (UBJSON) kaydı
+  <ad>.manifest.json  feature isimleri + sırası, eğitim verisi parmak izi,
+                      ufuk (gün), metrikler, model dosyasının sha256'sı
+
+Manifest, checksum ve feature sırası kontrolü ml/ ile ortak (../aquaguard/artifact.py);
+burada sadece XGBoost booster'ını kaydetme / yükleme var.
+Pickle yolu (aquaguard_model.pkl) geriye dönük uyumluluk için load_model_file'da kalır.
+
+.ubj + manifest repoda tutulmaz, pickle'dan build/deploy adımında üretilir:
+  python model_artifact.py model/aquaguard_model.pkl --training-data data/ml_ready_data.parquet
+Üretilmemişse servis pickle ile çalışır.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # ortak aquaguard/ paketi
+
+from aquaguard import artifact as _artifact  # noqa: E402
+from aquaguard.artifact import (  # noqa: E402,F401
+    MANIFEST_SUFFIX,
+    ArtifactError,
+    check_features,
+    fingerprint,
+    manifest_path,
+    sha256_file,
+)
+
+FRAMEWORK = "xgboost"
+
+
+def save(model, base, feature_names: list, horizon_days: int, metrics: dict = None,
+         training_fingerprint: str = None) -> Path:
+    """Booster'ı native formatta, ardından manifest'i (atomik) yazar; manifest yolunu döner."""
+    model_file = _artifact.model_file_path(base, ".ubj")
+    booster = model.get_booster()
+    booster.feature_names = list(feature_names)
+    booster.save_model(str(model_file))
+    return _artifact.write_manifest(model_file, FRAMEWORK, feature_names, horizon_days, metrics,
+                                    training_fingerprint)
+
+
+def read_manifest(path) -> dict:
+    return _artifact.read_manifest(path, FRAMEWORK)
+
+
+def load(path, expected_features: list = None):
+    """Manifest yolundan (model, manifest); checksum veya feature sırası tutmazsa ArtifactError."""
+    import xgboost as xgb
+
+    model_file, manifest = _artifact.verified_model_file(path, FRAMEWORK, expected_features)
+    model = xgb.XGBRegressor()
+    model.load_model(str(model_file))
+    check_features(model.get_booster().feature_names or [], manifest["feature_names"], model_file.name)
+    return model, manifest
+
+
+def load_model_file(path, expected_features: list = None):
+    """Manifest (.manifest.json) ise native yükleme, değilse eski pickle."""
+    if str(path).endswith(MANIFEST_SUFFIX):
+        return load(path, expected_features)[0]
+
+    import joblib
+
+    model = joblib.load(path)
+    names = model.get_booster().feature_names if hasattr(model, "get_booster") else None
+    if names:
+        check_features(names, expected_features, Path(path).name)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pickle modeli native artifact'a dönüştür")
+    parser.add_argument("pickle", help="joblib/pickle model (XGBRegressor)")
+    parser.add_argument("--training-data", help="Parmak izi için eğitim verisi dosyası")
+    parser.add_argument("--horizon-days", type=int, default=7)
+    parser.add_argument("--metrics", default="{}", help='JSON, örn. {"rmse": 0.04}')
+    args = parser.parse_args()
+
+    import joblib
+
+    model = joblib.load(args.pickle)
+    names = model.get_booster().feature_names
+    if not names:
+        raise ArtifactError("Booster feature isimleri yok; feature sırası belirlenemiyor.")
+    fp = sha256_file(args.training_data)[:16] if args.training_data else None
+    out = save(model, args.pickle, names, args.horizon_days, json.loads(args.metrics), fp)
+    print(f"✅ Artifact yazıldı: {out}")
+
+
+if __name__ == "__main__":
+    main()
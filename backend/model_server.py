@@ -0,0 +1,260 @@
+"""
+Process-pool model server: inference'ı GIL dışına taşır.
+
+AQUAGUARD_INFERENCE_WORKERS > 0 ise:
+  - her worker process modeli (native artifact veya pickle) bir kez yükler
+    (dosya damgası değişirse kendi kendine yeniden yükler),
+  - API feature matrisini SharedMemory'ye yazar, worker oradan kopyasız okur,
+  - küçük eşzamanlı istekler (tek parsel /predict) dispatcher thread'inde
+    micro-batch olarak birleştirilir (max_batch satır veya max_wait_ms),
+  - büyük matrisler chunk_rows'luk parçalara bölünüp worker'lara paralel dağıtılır,
+  - predict_file() aynı havuzda başka bir model dosyasını (shadow aday modeli)
+    skorlar; worker'lar model dosyası başına bir kopya tutar,
+  - contributions() feature katkılarını (explain.py) da worker'da hesaplar.
+Servis edilen model yolu her gönderimde yeniden çözülür (model_path bir
+fonksiyon olabilir): yeni manifest / artifact'e geçiş havuzu yeniden başlatmaz.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import explain
+import model_artifact
+
+
+# ---- worker process tarafı ----
+
+_worker_models = {}  # model yolu -> (dosya damgası, model)
+_worker_features = None
+
+
+def _init_worker(feature_names: list):
+    global _worker_features
+    _worker_features = feature_names
+
+
+def _worker_model(model_path: str, model_stamp: tuple):
+    stamp, model = _worker_models.get(model_path, (None, None))
+    if model is None or stamp != model_stamp:
+        model = model_artifact.load_model_file(model_path, _worker_features)
+        _worker_models[model_path] = (model_stamp, model)
+    return model
+
+
+def _score(shm_name: str, shape: tuple, model_stamp: tuple, model_path: str) -> np.ndarray:
+    model = _worker_model(model_path, model_stamp)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        X = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        preds = np.asarray(model.predict(X), dtype=np.float64)
+        del X  # buffer'a referans kalmazsa close() hata vermez
+        return preds
+    finally:
+        shm.close()
+
+
+def _contributions(shm_name: str, shape: tuple, model_stamp: tuple, model_path: str):
+    """explain.contributions'ın worker karşılığı: (katkılar, bias) ya da None."""
+    model = _worker_model(model_path, model_stamp)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        X = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        out = explain.contributions(model, X, _worker_features)
+        del X
+        return out
+    finally:
+        shm.close()
+
+
+# ---- API process tarafı ----
+
+class _Pending:
+    __slots__ = ("X", "future")
+
+    def __init__(self, X: np.ndarray):
+        self.X = X
+        self.future = Future()
+
+
+class ModelServer:
+    def __init__(self, model_path, n_workers: int, max_batch: int = 256,
+                 max_wait_ms: float = 2.0, chunk_rows: int = 4096, feature_names: list = None):
+        # model_path: yol ya da servis edilen güncel yolu döndüren fonksiyon
+        self._model_path = model_path if callable(model_path) else (lambda: model_path)
+        self.feature_names = feature_names
+        self.n_workers = n_workers
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.chunk_rows = chunk_rows
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.feature_names,),
+        )
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.requests = 0
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="model-server-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    @classmethod
+    def from_env(cls, model_path, feature_names: list = None):
+        n = int(os.environ.get("AQUAGUARD_INFERENCE_WORKERS", 0))
+        if n <= 0:
+            return None
+        return cls(
+            model_path,
+            n_workers=n,
+            max_batch=int(os.environ.get("AQUAGUARD_INFERENCE_MAX_BATCH", 256)),
+            max_wait_ms=float(os.environ.get("AQUAGUARD_INFERENCE_MAX_WAIT_MS", 2.0)),
+            chunk_rows=int(os.environ.get("AQUAGUARD_INFERENCE_CHUNK_ROWS", 4096)),
+            feature_names=feature_names,
+        )
+
+    @property
+    def model_path(self) -> str:
+        return str(self._model_path())
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        with self._lock:
+            self.requests += 1
+
+        if len(X) >= self.chunk_rows:
+            # Büyük batch: chunk'lara böl, tüm worker'larda paralel skorla
+            futures = [self._submit(X[i:i + self.chunk_rows]) for i in range(0, len(X), self.chunk_rows)]
+            return np.concatenate([f.result() for f in futures])
+
+        pending = _Pending(X)
+        with self._lock:
+            # shutdown() kuyruğu boşalttıktan sonra gelen istek sonsuza kadar beklemesin
+            if self._closed:
+                raise RuntimeError("model server kapandı")
+            self._queue.put(pending)
+        return pending.future.result()
+
+    def contributions(self, X: np.ndarray):
+        """explain.contributions(model, X) worker'da: (katkılar, bias) ya da None (chunk'lı, micro-batch'siz)."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        step = max(1, self.chunk_rows)
+        futures = [self._submit(X[i:i + step], fn=_contributions) for i in range(0, len(X), step)]
+        parts = [f.result() for f in futures]
+        if not parts or parts[0] is None:
+            return None
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def predict_file(self, model_path, X: np.ndarray) -> np.ndarray:
+        """Servis edilen model yerine model_path ile skorlar (micro-batch'e girmez, çağıran bekler)."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        return self._submit(X, str(model_path)).result()
+
+    def _submit(self, X: np.ndarray, model_path: str = None, fn=_score) -> Future:
+        """X'i SharedMemory'ye kopyala ve bir worker'a gönder; bitince segmenti sil."""
+        model_path = model_path or self.model_path
+        shm = shared_memory.SharedMemory(create=True, size=max(1, X.nbytes))
+
+        def _cleanup(_=None):
+            shm.close()
+            shm.unlink()
+
+        try:
+            np.ndarray(X.shape, dtype=np.float64, buffer=shm.buf)[:] = X
+            stamp = os.stat(model_path)
+            fut = self._pool.submit(fn, shm.name, X.shape, (stamp.st_mtime_ns, stamp.st_size), model_path)
+        except BaseException:
+            # Gönderilemeyen segment hiçbir callback'e bağlanmadı: burada sil
+            _cleanup()
+            raise
+
+        fut.add_done_callback(_cleanup)
+        with self._lock:
+            self.batches += 1
+            self.rows += len(X)
+        return fut
+
+    def _dispatch_loop(self):
+        while not self._closed:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if first is None:
+                break
+
+            # max_wait_s içinde gelen diğer istekleri aynı batch'e topla
+            batch = [first]
+            n_rows = len(first.X)
+            wait_until = time.monotonic() + self.max_wait_s
+            while n_rows < self.max_batch:
+                remaining = wait_until - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._closed = True
+                    break
+                batch.append(item)
+                n_rows += len(item.X)
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: list):
+        try:
+            fut = self._submit(np.concatenate([p.X for p in batch]))
+        except Exception as e:
+            for p in batch:
+                p.future.set_exception(e)
+            return
+
+        def _fan_out(f):
+            exc = RuntimeError("model server kapandı") if f.cancelled() else f.exception()
+            if exc is not None:
+                for p in batch:
+                    p.future.set_exception(exc)
+                return
+            preds = f.result()
+            start = 0
+            for p in batch:
+                end = start + len(p.X)
+                p.future.set_result(preds[start:end])
+                start = end
+
+        fut.add_done_callback(_fan_out)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.n_workers,
+                "requests": self.requests,
+                "batches": self.batches,
+                "rows": self.rows,
+                "avg_batch_rows": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            self._queue.put(None)
+        self._dispatcher.join(timeout=5.0)
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+        # Dispatcher'ın almadığı istekler: çağıranlar beklemede kalmasın
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item.future.set_exception(RuntimeError("model server kapandı"))
@@ -0,0 +1,83 @@
+"""
+Ortak su bütçesi altında sulama planı.
+
+Her parselin ihtiyacı /recommend ile aynı risk eşiklerinden gelir
+(mm -> m³: 1 mm * 1 ha = 10 m³). Parseller risk_7d'ye göre azalan sırada
+önceliklendirilir ve bütçe bu sırayla dağıtılır: kümülatif ihtiyaç bütçeyi
+aşana kadar tam, sınırdaki parsele kalan kadar, sonrakilere sıfır.
+Tamamen numpy (sort + cumsum + clip); 100k parsel milisaniyeler mertebesinde.
+"""
+import numpy as np
+
+
+# /recommend eşikleri: (risk üst sınırı, mm, pencere)
+RISK_BANDS = [
+    (40.0, 0.0, "izlemede kal"),
+    (60.0, 10.0, "5–7 gün içinde"),
+    (np.inf, 18.0, "3 gün içinde"),
+]
+M3_PER_MM_HA = 10.0
+
+
+def demand_mm(risk: np.ndarray):
+    """Risk -> (ihtiyaç mm, pencere etiketi)."""
+    risk = np.asarray(risk, dtype=float)
+    conds, prev = [], -np.inf
+    for upper, _, _ in RISK_BANDS:
+        conds.append((risk >= prev) & (risk < upper))
+        prev = upper
+    mm = np.select(conds, [b[1] for b in RISK_BANDS], default=0.0)
+    window = np.select(conds, [b[2] for b in RISK_BANDS], default=RISK_BANDS[0][2])
+    return mm, window
+
+
+def allocate(priority: np.ndarray, demand: np.ndarray, total: float):
+    """
+    Öncelik sırasına göre açgözlü dağıtım.
+    Dönüş: (sıra indeksleri, o sıradaki tahsisler).
+    """
+    order = np.argsort(-np.asarray(priority, dtype=float), kind="stable")
+    d = np.asarray(demand, dtype=float)[order]
+    before = np.cumsum(d) - d  # bu parselden önce dağıtılan toplam ihtiyaç
+    alloc = np.clip(total - before, 0.0, d)
+    return order, alloc
+
+
+def plan(parcel_ids: np.ndarray, risk: np.ndarray, area_ha: np.ndarray, total_m3: float) -> dict:
+    mm, window = demand_mm(risk)
+    demand = mm * np.asarray(area_ha, dtype=float) * M3_PER_MM_HA
+    order, alloc = allocate(risk, demand, total_m3)
+
+    d = demand[order]
+    need = d > 0
+    order, alloc, d = order[need], alloc[need], d[need]
+    area = np.asarray(area_ha, dtype=float)[order]
+    alloc_mm = np.divide(alloc, area * M3_PER_MM_HA, out=np.zeros_like(alloc), where=area > 0)
+
+    # tolist() ile python tiplerine toplu çevrim (satır satır float() yerine)
+    cols = {
+        "parcel_id": np.asarray(parcel_ids)[order].astype(str).tolist(),
+        "risk_7d": np.round(np.asarray(risk, dtype=float)[order], 1).tolist(),
+        "window": window[order].astype(str).tolist(),
+        "area_ha": area.tolist(),
+        "demand_m3": np.round(d, 1).tolist(),
+        "allocated_m3": np.round(alloc, 1).tolist(),
+        "amount_mm": np.round(alloc_mm, 1).tolist(),
+    }
+    keys = list(cols)
+    schedule = [
+        {"priority": i + 1, **dict(zip(keys, row))}
+        for i, row in enumerate(zip(*cols.values()))
+    ]
+    allocated = float(alloc.sum())
+    return {
+        "total_volume_m3": float(total_m3),
+        "requested_m3": round(float(d.sum()), 1),
+        "allocated_m3": round(allocated, 1),
+        "unallocated_m3": round(max(0.0, float(total_m3) - allocated), 1),
+        "parcels": int(len(parcel_ids)),
+        "parcels_needing_water": int(len(d)),
+        "parcels_fully_served": int(np.count_nonzero(alloc >= d)),
+        "parcels_partially_served": int(np.count_nonzero((alloc > 0) & (alloc < d))),
+        "schedule": schedule,
+    }
@@ -0,0 +1,68 @@
+"""
+Küçük, thread-safe LRU + TTL sonuç cache'i (hit/miss sayaçlı).
+
+/predict sonucu aynı (parcel_id, son feature tarihi, model parmak izi) için
+değişmediğinden her istekte modeli tekrar çalıştırmaya gerek yok.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def file_stamp(path) -> tuple:
+    """Dosya değişti mi kontrolü için ucuz damga: (mtime_ns, size)."""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 4096, ttl_s: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
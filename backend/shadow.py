@@ -0,0 +1,183 @@
+"""
+Shadow model: aday modeli canlı trafikte, cevap süresine dokunmadan çalıştırır.
+
+AQUAGUARD_SHADOW_MODEL (manifest veya pickle yolu) verilmişse:
+  - /predict hesapladığı feature satırını + canlı tahmini submit() ile
+    sınırlı kuyruğa bırakır (put_nowait; kuyruk doluysa satır atılır ve
+    "dropped" sayılır, istek asla beklemez),
+  - ayrı bir worker thread kuyruğu max_batch'lik parçalar halinde boşaltır,
+    aday modelle tek predict çağrısında skorlar,
+  - her satır için canlı ve aday çıktı JSONL karşılaştırma log'una eklenir;
+    log AQUAGUARD_SHADOW_LOG_MAX_BYTES'ı aşacaksa .1, .2, ... olarak döndürülür
+    (en fazla AQUAGUARD_SHADOW_LOG_BACKUPS eski dosya, 0 = döndürme yok).
+Cache hit'leri tekrar gönderilmez (aynı feature satırı zaten loglandı).
+
+Skorlama nerede çalışır:
+  - AQUAGUARD_INFERENCE_WORKERS > 0 ise aday model model_server.py'nin process
+    havuzunda skorlanır (ModelServer.predict_file); thread sadece kuyruğu
+    boşaltıp sonucu bekler ve log yazar, API process'inin GIL'ini tutmaz.
+  - Havuz yoksa predict bu process'teki thread'de çalışır. XGBoost predict'in
+    C++ kısmı GIL'i bırakır ama batch hazırlığı ve log yazımı istek
+    thread'leriyle GIL için yarışır: trafik başına ek CPU, aday modelin canlı
+    modelle yaklaşık aynı tahmin maliyeti kadardır. Kuyruk
+    (AQUAGUARD_SHADOW_QUEUE_SIZE) sınırlıdır; yetişemezse satırlar atılır
+    ("dropped"), bekleyen iş ve bellek büyümez. Yüksek trafikte havuzu açın
+    ya da kuyruğu küçültün.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+import model_artifact
+
+
+class ShadowScorer:
+    def __init__(self, model_path, feature_names: list, log_path, max_queue: int = 4096,
+                 max_batch: int = 256, server=None, max_log_bytes: int = 64 * 1024 * 1024,
+                 log_backups: int = 3):
+        self.model_path = Path(model_path)
+        self.server = server  # model_server.ModelServer veya None (thread içinde skorla)
+        self.feature_names = feature_names
+        self.log_path = Path(log_path)
+        self.max_batch = max_batch
+        self.max_log_bytes = max_log_bytes
+        self.log_backups = log_backups
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._model = None
+        self.model_fingerprint = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.scored = 0
+        self.batches = 0
+        self.errors = 0
+        self._sum_abs_diff = 0.0
+
+        self._worker = threading.Thread(target=self._loop, name="shadow-scorer", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_env(cls, feature_names: list, default_log_path, server=None):
+        path = os.environ.get("AQUAGUARD_SHADOW_MODEL")
+        if not path:
+            return None
+        return cls(
+            path,
+            feature_names,
+            os.environ.get("AQUAGUARD_SHADOW_LOG", str(default_log_path)),
+            max_queue=int(os.environ.get("AQUAGUARD_SHADOW_QUEUE_SIZE", 4096)),
+            max_batch=int(os.environ.get("AQUAGUARD_SHADOW_MAX_BATCH", 256)),
+            server=server,
+            max_log_bytes=int(os.environ.get("AQUAGUARD_SHADOW_LOG_MAX_BYTES", 64 * 1024 * 1024)),
+            log_backups=int(os.environ.get("AQUAGUARD_SHADOW_LOG_BACKUPS", 3)),
+        )
+
+    def submit(self, parcel_id: str, x: np.ndarray, live_pred: float, live_model: str = None) -> bool:
+        """Request path'inden çağrılır: asla bloklamaz; kuyruk doluysa False."""
+        try:
+            self._queue.put_nowait((time.time(), parcel_id, x, live_pred, live_model))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _predict(self, X: np.ndarray) -> np.ndarray:
+        # İlk batch'te (worker thread'inde) yüklenir: startup ve istekler etkilenmez
+        if self.model_fingerprint is None:
+            self.model_fingerprint = model_artifact.fingerprint(self.model_path)[:12]
+        if self.server is not None:
+            return self.server.predict_file(self.model_path, X)
+        if self._model is None:
+            self._model = model_artifact.load_model_file(self.model_path, self.feature_names)
+        return np.asarray(self._model.predict(X), dtype=float)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._score(batch)
+            except Exception:
+                # Aday model bozuksa canlı servis etkilenmez; sadece sayılır
+                with self._lock:
+                    self.errors += len(batch)
+
+    def _score(self, batch: list):
+        X = np.vstack([item[2] for item in batch]).astype(float, copy=False)
+        shadow = self._predict(X)
+        live = np.array([item[3] for item in batch], dtype=float)
+        diff = shadow - live
+
+        lines = []
+        for (ts, pid, _, _, live_model), lv, sv, d in zip(batch, live, shadow, diff):
+            lines.append(json.dumps({
+                "ts": round(ts, 3),
+                "parcel_id": pid,
+                "live_model": live_model,
+                "shadow_model": self.model_fingerprint,
+                "live": round(float(lv), 6),
+                "shadow": round(float(sv), 6),
+                "diff": round(float(d), 6),
+            }, ensure_ascii=False) + "\n")
+        payload = "".join(lines).encode("utf-8")
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._rotate(len(payload))
+        with open(self.log_path, "ab") as f:
+            f.write(payload)
+
+        with self._lock:
+            self.scored += len(batch)
+            self.batches += 1
+            self._sum_abs_diff += float(np.abs(diff).sum())
+
+    def _rotate(self, incoming: int):
+        """Log + incoming byte max_log_bytes'ı aşacaksa log -> .1 -> .2 ... (en eskisi silinir)."""
+        if self.log_backups <= 0:
+            return
+        try:
+            size = self.log_path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size == 0 or size + incoming <= self.max_log_bytes:
+            return
+        for i in range(self.log_backups - 1, 0, -1):
+            src = self.log_path.with_name(f"{self.log_path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.log_path.with_name(f"{self.log_path.name}.{i + 1}"))
+        os.replace(self.log_path, self.log_path.with_name(f"{self.log_path.name}.1"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "model": str(self.model_path),
+                "model_fingerprint": self.model_fingerprint,
+                "process_pool": self.server is not None,
+                "queue_depth": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "scored": self.scored,
+                "batches": self.batches,
+                "errors": self.errors,
+                "mean_abs_diff": round(self._sum_abs_diff / self.scored, 6) if self.scored else None,
+            }
+
+    def shutdown(self, timeout: float = 5.0):
+        self._stop.set()
+        self._worker.join(timeout)
@@ -0,0 +1,169 @@
+"""
+Çok worker'lı (uvicorn --workers N) çalışmada ortak, salt-okunur veri düzlemi.
+
+Normal modda her worker kendi _df_cache / _ml_df_cache kopyasını tutar.
+AQUAGUARD_SHARED_DATA_DIR ayarlıysa:
+  - kaynak dosya damgası için ilk gelen worker normalize edilmiş DataFrame'i
+    kolon kolon .npy dosyalarına yazar (flock ile tek yazıcı; yazıcı çökerse
+    kilidi OS bırakır, bekleyen worker'lardan biri yazıcı olur),
+  - tüm worker'lar bu dosyaları np.load(mmap_mode="r") ile map eder.
+Sayfalar OS page cache'inde tek kopya durur; worker ekledikçe RSS artmaz.
+
+Ingest sonrası: damga ingest log'unun ucunu da içerir (load_shared_state). Yeni
+satırlar gelince ilk worker birleştirilmiş tabloyu yeni damgayla yeniden yayınlar,
+diğerleri onu map eder; her worker'ın pd.concat ile özel tam kopya tutması yerine
+ingest başına bir disk yazımı. Yazıcının log cursor'ı manifest'te (extra) taşınır.
+
+Kolon kodlaması:
+  - sayısal / bool  -> olduğu gibi
+  - datetime64      -> int64 (ns) görünümü
+  - string / object -> categorical kodları (int8/16/32/64) + kategori listesi manifest'te
+"""
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: tek process varsayımı (ingest.py ile aynı)
+    fcntl = None
+
+
+SHARED_DATA_DIR = os.environ.get("AQUAGUARD_SHARED_DATA_DIR")
+_WAIT_TIMEOUT_S = float(os.environ.get("AQUAGUARD_SHARED_DATA_WAIT_S", 60))
+_MANIFEST = "manifest.json"
+
+
+def enabled() -> bool:
+    return bool(SHARED_DATA_DIR)
+
+
+def _codes_dtype(n_categories: int):
+    # pandas'ın Categorical için seçtiği dtype ile aynı olmalı, yoksa kodlar kopyalanır
+    for dt in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dt).max:
+            return dt
+    return np.int64
+
+
+def _write(df: pd.DataFrame, out_dir: Path, source_stamp: tuple, extra: dict = None):
+    columns = []
+    for i, col in enumerate(df.columns):
+        s = df[col]
+        fname = f"c{i}.npy"
+        entry = {"name": col, "file": fname}
+
+        if pd.api.types.is_datetime64_any_dtype(s):
+            arr = s.to_numpy(dtype="datetime64[ns]").view(np.int64)
+            entry["kind"] = "datetime64[ns]"
+        elif pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            arr = s.to_numpy()
+            entry["kind"] = "numeric"
+        else:
+            cat = pd.Categorical(s.astype(str))
+            arr = cat.codes.astype(_codes_dtype(len(cat.categories)))
+            entry["kind"] = "categorical"
+            entry["categories"] = [str(c) for c in cat.categories]
+
+        np.save(out_dir / fname, np.ascontiguousarray(arr))
+        columns.append(entry)
+
+    manifest = {
+        "source_stamp": list(source_stamp),
+        "n_rows": int(len(df)),
+        "columns": columns,
+        "extra": extra or {},
+    }
+    (out_dir / _MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+
+
+def _map(in_dir: Path):
+    """-> (DataFrame, manifest["extra"])"""
+    manifest = json.loads((in_dir / _MANIFEST).read_text(encoding="utf-8"))
+    data = {}
+    for entry in manifest["columns"]:
+        arr = np.load(in_dir / entry["file"], mmap_mode="r")
+        if entry["kind"] == "datetime64[ns]":
+            data[entry["name"]] = arr.view("datetime64[ns]")
+        elif entry["kind"] == "categorical":
+            data[entry["name"]] = pd.Categorical.from_codes(
+                arr, categories=pd.Index(entry["categories"]), validate=False
+            )
+        else:
+            data[entry["name"]] = arr
+    # copy=False: kolonlar blok birleştirmesi yapılmadan memmap üzerinde kalır
+    return pd.DataFrame(data, copy=False), manifest.get("extra", {})
+
+
+def load_shared(name: str, source_stamp: tuple, build) -> pd.DataFrame:
+    """
+    name: veri seti adı (dizin adı), source_stamp: kaynak dosyanın (mtime_ns, size) damgası,
+    build: normalize edilmiş DataFrame üreten fonksiyon (sadece yazıcı worker çağırır).
+    """
+    return load_shared_state(name, source_stamp, lambda: (build(), {}))[0]
+
+
+def load_shared_state(name: str, source_stamp: tuple, build):
+    """
+    load_shared + tabloyla birlikte yayınlanan küçük JSON durum (örn. ingest cursor'ı).
+    source_stamp: herhangi uzunlukta damga; build: () -> (DataFrame, dict). Döner: (DataFrame, dict).
+    """
+    base = Path(SHARED_DATA_DIR) / name
+    base.mkdir(parents=True, exist_ok=True)
+    token = "-".join(str(v) for v in source_stamp)
+    target = base / token
+
+    if (target / _MANIFEST).exists():
+        return _map(target)
+
+    # Aktif damganın kilit dosyası silinmez; flock'u tutan process ölünce kilit kendiliğinden açılır
+    with open(base / f"{token}.lock", "a+") as lock:
+        if not _acquire(lock):
+            # Yazıcı takıldıysa servis yine de çalışsın: yerel kopya
+            return build()
+        try:
+            # Beklerken başka worker yayınlamış olabilir
+            if (target / _MANIFEST).exists():
+                return _map(target)
+            # Yazıcı biz: geçici dizine yaz, atomik rename ile yayınla
+            tmp = base / f"{token}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir()
+            df, extra = build()
+            _write(df, tmp, source_stamp, extra)
+            os.rename(tmp, target)
+            _prune_old(base, keep=token)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    return _map(target)
+
+
+def _acquire(lock) -> bool:
+    """Özel kilidi _WAIT_TIMEOUT_S içinde al (yazıcı bitirene ya da ölene kadar bekler)."""
+    if fcntl is None:
+        return True
+    deadline = time.monotonic() + _WAIT_TIMEOUT_S
+    while True:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+
+def _prune_old(base: Path, keep: str):
+    """Eski damgalara ait dizinleri ve kilitleri sil (map etmiş worker'lar için inode yaşamaya devam eder)."""
+    for p in base.iterdir():
+        if p.is_dir() and p.name.split(".tmp-")[0] != keep:
+            # Çökmüş yazıcıların eski damgalı tmp dizinleri de gider
+            shutil.rmtree(p, ignore_errors=True)
+        elif p.suffix == ".lock" and p.stem != keep:
+            p.unlink(missing_ok=True)
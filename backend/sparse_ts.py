@@ -0,0 +1,26 @@
+"""
+Seyrek zaman serisi deposu (format, yazıcı ve okuyucu ../aquaguard/sparse_ts.py'de,
+ml/ ile ortak). Depo ml tarafındaki CLI ile üretilir:
+
+  python ../ml/sparse_ts.py data/parcels_timeseries1.csv   # -> data/parcels_timeseries1.sparse/
+
+Depoda NDVI gibi kolonlar için sadece düğüm günleri (uydu geçişleri / eğim
+değişimleri) saklanır; günlük seri okuma anında tüm parseller için tek
+searchsorted (ffill) ya da np.interp (linear) çağrısıyla geri açılır.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # ortak aquaguard/ paketi
+
+from aquaguard.sparse_ts import (  # noqa: E402,F401
+    FORMAT,
+    SPARSE_SUFFIX,
+    STRIDE,
+    SparseTimeseries,
+    is_sparse,
+    meta_path,
+    read_timeseries,
+    sparse_path,
+)
+
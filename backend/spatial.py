@@ -0,0 +1,134 @@
+"""
+Parsel merkezleri için basit grid (bucket) spatial index.
+
+Noktalar (iy, ix) hücre anahtarına göre sıralanır ve her dolu hücre için
+[start, end) aralığı tutulur (CSR düzeni). Sorgular sadece ilgili hücrelere
+bakar, sonra vektörize olarak kesin filtre uygulanır.
+
+Sonradan eklenen noktalar (extended) yeniden sıralanmaz: her sorguda taranan
+küçük bir ek listede durur; ek liste EXTRA_FRACTION'ı aşınca tam kurulur.
+"""
+import math
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+# Ek liste sıralı kısmın bu oranını aşarsa extended() tam kurulum yapar
+EXTRA_FRACTION = 0.1
+
+
+def haversine_km(lat, lon, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+
+
+class GridIndex:
+    def __init__(self, lats, lons, cell_deg: float = 0.1):
+        self.cell_deg = cell_deg
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+
+        iy = np.floor(lats / cell_deg).astype(np.int64)
+        ix = np.floor(lons / cell_deg).astype(np.int64)
+        order = np.lexsort((ix, iy))
+
+        # order: sıralı konum -> orijinal satır indeksi; [n_sorted:] ek liste (sırasız)
+        self.order = order
+        self.lats = lats[order]
+        self.lons = lons[order]
+        self.n_sorted = len(order)
+
+        self._cells = {}
+        if len(order):
+            keys = np.stack([iy[order], ix[order]], axis=1)
+            change = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+            starts = np.concatenate([[0], change])
+            ends = np.concatenate([change, [len(order)]])
+            for s, e in zip(starts, ends):
+                self._cells[(int(keys[s, 0]), int(keys[s, 1]))] = (int(s), int(e))
+
+    def __len__(self):
+        return len(self.order)
+
+    def extended(self, lats, lons) -> "GridIndex":
+        """
+        Sona yeni noktalar eklenmiş kopya (orijinal indeksleri len(self)'ten başlar).
+        Mevcut nesne değişmez: eşzamanlı sorgular eski indeksi güvenle kullanmaya devam eder.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        if len(self.order) + len(lats) - self.n_sorted > EXTRA_FRACTION * max(1, self.n_sorted):
+            all_lats, all_lons = np.empty(len(self.order)), np.empty(len(self.order))
+            all_lats[self.order], all_lons[self.order] = self.lats, self.lons
+            return GridIndex(np.concatenate([all_lats, lats]), np.concatenate([all_lons, lons]), self.cell_deg)
+
+        out = GridIndex.__new__(GridIndex)
+        out.cell_deg = self.cell_deg
+        out.order = np.concatenate([self.order, np.arange(len(self.order), len(self.order) + len(lats))])
+        out.lats = np.concatenate([self.lats, lats])
+        out.lons = np.concatenate([self.lons, lons])
+        out.n_sorted = self.n_sorted
+        out._cells = self._cells
+        return out
+
+    def _cell_range(self, min_lat, min_lon, max_lat, max_lon) -> np.ndarray:
+        """bbox'a değen hücrelerdeki noktaların sıralı konumları."""
+        y0, y1 = math.floor(min_lat / self.cell_deg), math.floor(max_lat / self.cell_deg)
+        x0, x1 = math.floor(min_lon / self.cell_deg), math.floor(max_lon / self.cell_deg)
+
+        n_query_cells = (y1 - y0 + 1) * (x1 - x0 + 1)
+        if n_query_cells > len(self._cells):
+            # Çok geniş bbox: hücreleri gezmek yerine tüm noktalar üzerinde tek maske
+            return np.arange(len(self.order))
+
+        # Ek liste her sorguda tümüyle taranır (kesin filtre çağıranda)
+        parts = [np.arange(self.n_sorted, len(self.order))]
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                rng = self._cells.get((y, x))
+                if rng is not None:
+                    parts.append(np.arange(rng[0], rng[1]))
+        return np.concatenate(parts)
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon) -> np.ndarray:
+        """bbox içindeki noktaların orijinal indeksleri."""
+        pos = self._cell_range(min_lat, min_lon, max_lat, max_lon)
+        la, lo = self.lats[pos], self.lons[pos]
+        mask = (la >= min_lat) & (la <= max_lat) & (lo >= min_lon) & (lo <= max_lon)
+        return self.order[pos[mask]]
+
+    def radius(self, lat, lon, radius_km: float):
+        """radius_km içindeki noktalar: (orijinal indeksler, mesafeler), yakından uzağa."""
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlon = radius_km / (KM_PER_DEG_LAT * max(1e-6, math.cos(math.radians(lat))))
+        pos = self._cell_range(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        dist = haversine_km(lat, lon, self.lats[pos], self.lons[pos])
+        keep = dist <= radius_km
+        pos, dist = pos[keep], dist[keep]
+        srt = np.argsort(dist, kind="stable")
+        return self.order[pos[srt]], dist[srt]
+
+    def nearest(self, lat, lon, n: int):
+        """En yakın n nokta: (orijinal indeksler, mesafeler)."""
+        if n <= 0 or not len(self.order):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        n = min(n, len(self.order))
+
+        # Halka halka büyüt: en az n aday bulununca n. adayın mesafesi kesin yarıçaptır
+        ring = 0
+        while True:
+            half = (ring + 0.5) * self.cell_deg
+            pos = self._cell_range(lat - half, lon - half, lat + half, lon + half)
+            if len(pos) >= n:
+                break
+            ring += 1
+
+        dist = haversine_km(lat, lon, self.lats[pos], self.lons[pos])
+        kth = float(np.partition(dist, n - 1)[n - 1])
+        idx, dist = self.radius(lat, lon, kth)
+        return idx[:n], dist[:n]
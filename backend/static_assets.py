@@ -0,0 +1,101 @@
+"""
+Önceden sıkıştırılmış (build_assets.py) frontend dosyalarını servis eden StaticFiles.
+
+- İstek Accept-Encoding'inde br / gzip varsa ve dosyanın .br / .gz kopyası
+  mevcutsa o kopya Content-Encoding ile döner (istek anında sıkıştırma yok).
+- İçerik hash'li isimler (app.<hash>.js) bir yıl immutable cache'lenir;
+  diğerleri (index.html) her seferinde ETag ile doğrulanır.
+- NegotiatedGZipMiddleware API cevaplarını sıkıştırır ama statik mount'a
+  dokunmaz: "gzip;q=0" isteyen istemciye .gz kopyası yoksa dosya olduğu gibi gider.
+"""
+import mimetypes
+import os
+import re
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+from starlette.responses import FileResponse
+from starlette.routing import Match, Mount
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+
+HASHED_RE = re.compile(r"\.[0-9a-f]{10}\.[a-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(header: str) -> set:
+    """'gzip, br;q=0.8, deflate;q=0' -> {"gzip", "br"} (q=0 kabul edilmemiş sayılır)."""
+    out = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            out.add(name.strip().lower())
+    return out
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+
+        response = None
+        for encoding, suffix in ENCODINGS:
+            variant = f"{full_path}{suffix}"
+            if encoding in accepted and os.path.isfile(variant):
+                response = FileResponse(variant, status_code=status_code,
+                                        stat_result=os.stat(variant), media_type=media_type)
+                response.headers["content-encoding"] = encoding
+                break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code,
+                                    stat_result=stat_result, media_type=media_type)
+
+        response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = IMMUTABLE if HASHED_RE.search(str(full_path)) else REVALIDATE
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class NegotiatedGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware, iki farkla:
+      - Accept-Encoding q değerleri dikkate alınır (Starlette sadece "gzip" alt
+        dizesine bakar, "gzip;q=0" için de sıkıştırırdı),
+      - router'da statik bir Mount'a düşen istekler hiç sarılmaz; müzakereyi
+        PrecompressedStaticFiles kendisi yapar.
+    """
+
+    def __init__(self, app, router=None, **kwargs):
+        super().__init__(app, **kwargs)
+        self.router = router
+
+    def _is_static(self, scope) -> bool:
+        if self.router is None:
+            return False
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match is Match.FULL:
+                return isinstance(route, Mount) and isinstance(route.app, StaticFiles)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._is_static(scope):
+            await self.app(scope, receive, send)
+            return
+        if "gzip" not in accepted_encodings(Headers(scope=scope).get("accept-encoding", "")):
+            responder = IdentityResponder(self.app, self.minimum_size,
+                                          exclude_content_types=self.exclude_content_types)
+            await responder(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
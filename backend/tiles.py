@@ -0,0 +1,176 @@
+"""
+Harita zoom seviyeleri için önceden hesaplanmış risk karo (tile) piramidi.
+
+Her zoom seviyesinde parseller web-mercator (slippy map) karolarına düşer;
+karo başına mean/max/count risk tutulur. Risk değerleri değiştiğinde sadece
+değişen parsellerin karoları güncellenir:
+  - sum/count farkla (delta) güncellenir,
+  - max sadece etkilenen karoların üyeleri üzerinden yeniden hesaplanır
+    (tek maximum.reduceat),
+  - parsellerin çoğu değiştiyse (model değişimi vb.) tam build daha ucuz.
+Yeni parseller (add_parcels) sona eklenir: karo listesi birleştirilir, mevcut
+agregeler yeni konumlarına taşınır, sadece yeni parsellerin riski eklenir.
+Güncelleme ve okuma aynı lock altında: eşzamanlı iki istek aynı farkı iki kez uygulamaz.
+"""
+import math
+import threading
+
+import numpy as np
+
+
+def lonlat_to_tile(lats: np.ndarray, lons: np.ndarray, z: int):
+    n = 2 ** z
+    lat_r = np.radians(np.clip(lats, -85.05112878, 85.05112878))
+    x = np.floor((lons + 180.0) / 360.0 * n).astype(np.int64)
+    y = np.floor((1.0 - np.arcsinh(np.tan(lat_r)) / math.pi) / 2.0 * n).astype(np.int64)
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+
+def tile_bounds(x: int, y: int, z: int) -> list:
+    """[south, west, north, east]"""
+    n = 2 ** z
+
+    def lat(yy):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * yy / n))))
+
+    return [lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0]
+
+
+class _Level:
+    """Tek zoom seviyesi: parsel -> karo eşlemesi (CSR) ve karo agregeleri."""
+
+    def __init__(self, lats, lons, z: int):
+        self.z = z
+        x, y = lonlat_to_tile(lats, lons, z)
+        keys = x * (2 ** z) + y
+        self.keys, self.inv = np.unique(keys, return_inverse=True)
+        self.members = np.argsort(self.inv, kind="stable")
+        self.starts = np.searchsorted(self.inv[self.members], np.arange(len(self.keys) + 1))
+
+        self.sum = np.zeros(len(self.keys))
+        self.count = np.zeros(len(self.keys), dtype=np.int64)
+        self.max = np.full(len(self.keys), np.nan)
+
+    def build(self, risk: np.ndarray):
+        valid = ~np.isnan(risk)
+        self.sum = np.bincount(self.inv, weights=np.where(valid, risk, 0.0), minlength=len(self.keys))
+        self.count = np.bincount(self.inv, weights=valid, minlength=len(self.keys)).astype(np.int64)
+        mx = np.full(len(self.keys), -np.inf)
+        np.maximum.at(mx, self.inv[valid], risk[valid])
+        self.max = np.where(np.isfinite(mx), mx, np.nan)
+
+    def extend(self, lats, lons, risk_new: np.ndarray):
+        x, y = lonlat_to_tile(lats, lons, self.z)
+        new_keys = x * (2 ** self.z) + y
+        keys = np.union1d(self.keys, new_keys)
+        moved, inv_new = np.searchsorted(keys, self.keys), np.searchsorted(keys, new_keys)
+
+        total, count = np.zeros(len(keys)), np.zeros(len(keys), dtype=np.int64)
+        mx = np.full(len(keys), -np.inf)
+        total[moved], count[moved] = self.sum, self.count
+        mx[moved] = np.where(np.isnan(self.max), -np.inf, self.max)
+
+        valid = ~np.isnan(risk_new)
+        np.add.at(total, inv_new[valid], risk_new[valid])
+        np.add.at(count, inv_new[valid], 1)
+        np.maximum.at(mx, inv_new[valid], risk_new[valid])
+
+        self.keys, self.inv = keys, np.concatenate([moved[self.inv], inv_new])
+        self.members = np.argsort(self.inv, kind="stable")
+        self.starts = np.searchsorted(self.inv[self.members], np.arange(len(self.keys) + 1))
+        self.sum, self.count = total, count
+        self.max = np.where(np.isfinite(mx), mx, np.nan)
+
+    def update(self, idx: np.ndarray, old: np.ndarray, new: np.ndarray, risk: np.ndarray):
+        cells = self.inv[idx]
+        old_valid, new_valid = ~np.isnan(old), ~np.isnan(new)
+        np.add.at(self.sum, cells, np.where(new_valid, new, 0.0) - np.where(old_valid, old, 0.0))
+        np.add.at(self.count, cells, new_valid.astype(np.int64) - old_valid.astype(np.int64))
+
+        # Etkilenen karoların üyeleri CSR'den tek dizide: karo başına bir segment
+        touched = np.unique(cells)
+        lengths = self.starts[touched + 1] - self.starts[touched]
+        seg = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        pos = np.repeat(self.starts[touched] - seg, lengths) + np.arange(lengths.sum())
+        vals = risk[self.members[pos]]
+        mx = np.maximum.reduceat(np.where(np.isnan(vals), -np.inf, vals), seg)
+        self.max[touched] = np.where(np.isfinite(mx), mx, np.nan)
+
+
+# Bu orandan fazla parsel değiştiyse artımlı güncelleme yerine tam build
+REBUILD_FRACTION = 0.5
+
+
+class RiskPyramid:
+    def __init__(self, lats, lons, max_zoom: int = 12):
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        self.max_zoom = max_zoom
+        self.levels = [_Level(lats, lons, z) for z in range(max_zoom + 1)]
+        self.risk = np.full(len(lats), np.nan)
+        self._lock = threading.Lock()
+
+    def build(self, risk: np.ndarray):
+        with self._lock:
+            self._build(risk)
+
+    def _build(self, risk: np.ndarray):
+        self.risk = np.asarray(risk, dtype=float).copy()
+        for level in self.levels:
+            level.build(self.risk)
+
+    def add_parcels(self, lats, lons, risk: np.ndarray):
+        """Sona yeni parseller (risk: sadece yenilerin riski, NaN olabilir)."""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        risk = np.asarray(risk, dtype=float)
+        with self._lock:
+            for level in self.levels:
+                level.extend(lats, lons, risk)
+            self.risk = np.concatenate([self.risk, risk])
+
+    def update(self, risk: np.ndarray) -> int:
+        """Yeni risk vektörü ile artımlı güncelleme; değişen parsel sayısını döner."""
+        risk = np.asarray(risk, dtype=float)
+        with self._lock:
+            # Fark lock içinde hesaplanır: ikinci istek ilkinin uyguladığı farkı görmez
+            changed = np.flatnonzero(~((risk == self.risk) | (np.isnan(risk) & np.isnan(self.risk))))
+            if not len(changed):
+                return 0
+            if len(changed) > REBUILD_FRACTION * len(risk):
+                self._build(risk)
+                return int(len(changed))
+
+            old = self.risk[changed]
+            self.risk[changed] = risk[changed]
+            for level in self.levels:
+                level.update(changed, old, risk[changed], self.risk)
+            return int(len(changed))
+
+    def cells(self, z: int, bbox: tuple = None) -> list:
+        with self._lock:
+            return self._cells(z, bbox)
+
+    def _cells(self, z: int, bbox: tuple = None) -> list:
+        level = self.levels[min(max(0, z), self.max_zoom)]
+        n = 2 ** level.z
+        xs, ys = level.keys // n, level.keys % n
+        mask = level.count > 0
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            x0, y1 = lonlat_to_tile(np.array([min_lat]), np.array([min_lon]), level.z)
+            x1, y0 = lonlat_to_tile(np.array([max_lat]), np.array([max_lon]), level.z)
+            mask &= (xs >= x0[0]) & (xs <= x1[0]) & (ys >= y0[0]) & (ys <= y1[0])
+
+        out = []
+        for c in np.flatnonzero(mask):
+            x, y = int(xs[c]), int(ys[c])
+            out.append({
+                "x": x,
+                "y": y,
+                "bounds": tile_bounds(x, y, level.z),
+                "mean": round(float(level.sum[c] / level.count[c]), 1),
+                "max": round(float(level.max[c]), 1),
+                "count": int(level.count[c]),
+            })
+        return out
@@ -0,0 +1,160 @@
+"""
+İstek başına aşama (stage) süreleri -> Server-Timing header'ı.
+
+- stage("ad") context manager'ı handler içinde süre ölçer; aktif istek yoksa no-op.
+- @timed handler'ın toplam süresini "handler" olarak kaydeder; ?profile=1 + geçerli
+  X-Admin-Token varsa handler'ı cProfile altında çalıştırır (sync handler'lar
+  threadpool'da koştuğu için profil handler'ın kendi thread'inde alınır ve
+  dosyaya da orada yazılır, event loop'ta disk I/O olmaz).
+- TimingMiddleware header'ı ekler, "serialize" (handler sonrası JSON encode vb.)
+  süresini hesaplar ve eşiği aşan istekleri loglar.
+Ölçüm ml/inference.py ile ortak (../aquaguard/timing.py).
+"""
+import contextvars
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import sys
+import time
+from pathlib import Path
+from urllib.parse import parse_qs
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # ortak aquaguard/ paketi
+
+from aquaguard.timing import measure  # noqa: E402
+
+
+logger = logging.getLogger("aquaguard.timing")
+
+ADMIN_TOKEN = os.environ.get("AQUAGUARD_ADMIN_TOKEN")
+SLOW_REQUEST_MS = float(os.environ.get("AQUAGUARD_SLOW_REQUEST_MS", 500))
+PROFILE_DIR = Path(os.environ.get("AQUAGUARD_PROFILE_DIR", Path(__file__).parent / "profiles"))
+
+_current = contextvars.ContextVar("aquaguard_request_timings", default=None)
+_current_path = contextvars.ContextVar("aquaguard_request_path", default="")
+
+
+class RequestTimings:
+    def __init__(self, profile: bool = False):
+        self.stages = []  # (ad, ms)
+        self.profile = profile
+        self.profile_name = None  # @timed'in yazdığı profil dosyası
+        self.streaming = False  # text/event-stream: süre bağlantı ömrü, yavaş istek değil
+
+    def add(self, name: str, ms: float):
+        self.stages.append((name, ms))
+
+    def total_of(self, name: str) -> float:
+        return sum(ms for n, ms in self.stages if n == name)
+
+
+def stage(name: str):
+    """Aktif isteğin aşama süresi; istek yoksa no-op."""
+    return measure(_current.get(), name)
+
+
+def timed(func):
+    """Sync handler dekoratörü: handler süresi + opsiyonel cProfile."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        t = _current.get()
+        if t is None:
+            return func(*args, **kwargs)
+
+        profiler = cProfile.Profile() if t.profile else None
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                return profiler.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            t.add("handler", (time.perf_counter() - start) * 1000.0)
+            if profiler is not None:
+                # Hâlâ threadpool'dayız: dosya yazımı handler süresine dahil değil, loop'u bloklamaz
+                t.profile_name = _dump_profile(profiler, _current_path.get())
+
+    return wrapper
+
+
+def is_admin(headers: dict) -> bool:
+    return bool(ADMIN_TOKEN) and headers.get("x-admin-token") == ADMIN_TOKEN
+
+
+def _server_timing(stages: list) -> bytes:
+    # Aynı isimli aşamaları topla (örn. batch içinde tekrar eden stage'ler)
+    totals = {}
+    for name, ms in stages:
+        totals[name] = totals.get(name, 0.0) + ms
+    return ", ".join(f"{n};dur={ms:.2f}" for n, ms in totals.items()).encode("ascii")
+
+
+def _dump_profile(profiler: cProfile.Profile, path: str) -> str:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}{path.replace('/', '_')}.prof"
+    profiler.dump_stats(str(PROFILE_DIR / name))
+    return name
+
+
+def profile_report(name: str, limit: int = 40) -> str:
+    """Kaydedilmiş profilin kümülatif süreye göre özeti."""
+    path = (PROFILE_DIR / name).resolve()
+    if path.parent != PROFILE_DIR.resolve() or not path.exists():
+        raise FileNotFoundError(name)
+    buf = io.StringIO()
+    pstats.Stats(str(path), stream=buf).sort_stats("cumulative").print_stats(limit)
+    return buf.getvalue()
+
+
+class TimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        profile = query.get("profile", ["0"])[0] == "1" and is_admin(headers)
+
+        t = RequestTimings(profile=profile)
+        token = _current.set(t)
+        path_token = _current_path.set(scope["path"])
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                t.streaming = any(
+                    k.lower() == b"content-type" and v.startswith(b"text/event-stream")
+                    for k, v in message.get("headers", [])
+                )
+                app_ms = (time.perf_counter() - start) * 1000.0
+                handler_ms = t.total_of("handler")
+                stages = list(t.stages)
+                if handler_ms:
+                    stages.append(("serialize", max(0.0, app_ms - handler_ms)))
+                stages.append(("total", app_ms))
+
+                extra = [(b"server-timing", _server_timing(stages))]
+                if t.profile_name is not None:
+                    extra.append((b"x-profile", t.profile_name.encode("ascii")))
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _current_path.reset(path_token)
+            total_ms = (time.perf_counter() - start) * 1000.0
+            if total_ms >= SLOW_REQUEST_MS and not t.streaming:
+                logger.warning(
+                    "slow request %s %s %.1fms stages=%s",
+                    scope.get("method"), scope["path"], total_ms,
+                    {n: round(ms, 2) for n, ms in t.stages},
+                )
@@ -0,0 +1,196 @@
+"""
+Gridli günlük meteo verisi (ERA5 / Open-Meteo grid export'ları vb.).
+
+Meteo'yu her parsel satırında ayrı ayrı saklamak yerine grid bir kez
+(hücre başına) saklanır, parsellere okuma anında dağıtılır:
+
+- WeatherGrid: dates (nt,), lats (ny,), lons (nx,), değişken başına (nt, ny, nx)
+  float32 dizi. Kaynak: .npz (bu modülün formatı), .parquet (uzun tablo:
+  date, lat, lon, değişkenler) veya .nc (xarray kuruluysa).
+- cell_index(): parsel merkezlerini en yakın grid hücresine eşler (searchsorted,
+  parsel başına bir kez); grid dışındakiler -1.
+- gather(): (gün, hücre) indeks çiftleriyle tek fancy-index okuması.
+  Depolama ve ingest süresi hücre sayısıyla ölçeklenir, parsel sayısıyla değil.
+- join_cells(): ingest log'u meteo yerine hücre indeksini saklar (weather_cell);
+  değerler okuma anında bu indeksle grid'den alınır. İndeks grid düzenine bağlı:
+  grid farklı boyutta bir dosyayla değişirse log'daki hücreler geçersiz kalır.
+
+CLI (grid'i normalize NPZ'ye çevirir):
+  python weather.py era5_2025.nc --out data/weather/grid.npz --var precipitation_sum=tp
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+VARIABLES = ["precipitation_sum", "temperature_2m_max", "et0_fao_evapotranspiration"]
+
+
+def _nearest(coords: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Artan sıralı merkez koordinatlarında en yakın indeks; yarım hücreden uzaksa -1."""
+    if len(coords) == 1:
+        idx, half = np.zeros(len(values), dtype=np.int64), np.inf
+    else:
+        i = np.clip(np.searchsorted(coords, values), 1, len(coords) - 1)
+        idx = np.where(np.abs(values - coords[i - 1]) <= np.abs(coords[i] - values), i - 1, i).astype(np.int64)
+        half = np.abs(np.diff(coords)).max() / 2.0
+    with np.errstate(invalid="ignore"):
+        idx[~(np.abs(coords[idx] - values) <= half)] = -1  # NaN koordinatlar da -1
+    return idx
+
+
+class WeatherGrid:
+    def __init__(self, dates, lats, lons, values: dict):
+        dates = pd.to_datetime(np.asarray(dates)).normalize().to_numpy()
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+
+        # NetCDF'lerde enlem çoğunlukla azalan: tek yönde (artan) tut
+        values = {name: np.asarray(arr, dtype=np.float32) for name, arr in values.items()}
+        # Sıralamadan önce: fancy index fazla büyük diziyi sessizce kırpardı
+        for name, arr in values.items():
+            if arr.shape != (len(dates), len(lats), len(lons)):
+                raise ValueError(f"{name}: beklenen şekil (gün, enlem, boylam), gelen {arr.shape}")
+        order_t, order_y, order_x = np.argsort(dates), np.argsort(lats), np.argsort(lons)
+        self.dates, self.lats, self.lons = dates[order_t], lats[order_y], lons[order_x]
+        self.values = {
+            name: np.ascontiguousarray(arr[order_t][:, order_y][:, :, order_x]) for name, arr in values.items()
+        }
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.lats) * len(self.lons)
+
+    # ---- okuma / yazma ----
+
+    @classmethod
+    def load(cls, path, var_map: dict = None):
+        """var_map: {bizim_ad: dosyadaki_ad} (verilmeyenler aynı isimle aranır)."""
+        path = Path(path)
+        names = {v: (var_map or {}).get(v, v) for v in VARIABLES}
+        if path.suffix == ".npz":
+            with np.load(path) as z:
+                return cls(z["dates"], z["lats"], z["lons"], {v: z[src] for v, src in names.items() if src in z})
+        if path.suffix == ".parquet":
+            return cls.from_long(pd.read_parquet(path), names)
+        if path.suffix in (".nc", ".nc4", ".netcdf"):
+            return cls._from_netcdf(path, names)
+        raise ValueError(f"Desteklenmeyen grid formatı: {path.suffix} (.npz, .parquet, .nc)")
+
+    @classmethod
+    def from_long(cls, df: pd.DataFrame, names: dict = None):
+        """Uzun tablo (date, lat, lon, değişkenler) -> grid; eksik hücreler NaN."""
+        names = names or {v: v for v in VARIABLES}
+        dates, t = np.unique(pd.to_datetime(df["date"]).dt.normalize().to_numpy(), return_inverse=True)
+        lats, y = np.unique(df["lat"].to_numpy(dtype=float), return_inverse=True)
+        lons, x = np.unique(df["lon"].to_numpy(dtype=float), return_inverse=True)
+        values = {}
+        for v, src in names.items():
+            if src not in df.columns:
+                continue
+            arr = np.full((len(dates), len(lats), len(lons)), np.nan, dtype=np.float32)
+            arr[t, y, x] = df[src].to_numpy(dtype=np.float32)
+            values[v] = arr
+        return cls(dates, lats, lons, values)
+
+    @classmethod
+    def _from_netcdf(cls, path, names: dict):
+        try:
+            import xarray as xr
+        except ImportError as e:
+            raise ImportError("NetCDF okumak için xarray (+ netCDF4) gerekli: pip install xarray netCDF4") from e
+        with xr.open_dataset(path) as ds:
+            tdim = "time" if "time" in ds.coords else "date"
+            ydim = "latitude" if "latitude" in ds.coords else "lat"
+            xdim = "longitude" if "longitude" in ds.coords else "lon"
+            values = {
+                v: ds[src].transpose(tdim, ydim, xdim).to_numpy()
+                for v, src in names.items() if src in ds.data_vars
+            }
+            return cls(ds[tdim].to_numpy(), ds[ydim].to_numpy(), ds[xdim].to_numpy(), values)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, dates=self.dates, lats=self.lats, lons=self.lons, **self.values)
+
+    # ---- parsel eşleme ----
+
+    def cell_index(self, lats, lons) -> np.ndarray:
+        """Parsel merkezleri -> düz hücre indeksi (y * nx + x), grid dışı -1."""
+        y = _nearest(self.lats, np.asarray(lats, dtype=float))
+        x = _nearest(self.lons, np.asarray(lons, dtype=float))
+        cell = y * len(self.lons) + x
+        cell[(y < 0) | (x < 0)] = -1
+        return cell
+
+    def time_index(self, dates) -> np.ndarray:
+        d = pd.to_datetime(np.asarray(dates)).normalize().to_numpy()
+        t = np.searchsorted(self.dates, d)
+        t_clip = np.minimum(t, len(self.dates) - 1)
+        return np.where((t < len(self.dates)) & (self.dates[t_clip] == d), t_clip, -1)
+
+    def gather(self, t: np.ndarray, cell: np.ndarray) -> dict:
+        """(gün, hücre) çiftleri -> değişken başına değerler; geçersiz indeksler NaN."""
+        ok = (t >= 0) & (cell >= 0)
+        tt, cc = np.where(ok, t, 0), np.where(ok, cell, 0)
+        out = {}
+        for name, arr in self.values.items():
+            vals = arr.reshape(len(self.dates), -1)[tt, cc].astype(float)
+            vals[~ok] = np.nan
+            out[name] = vals
+        return out
+
+
+class ParcelWeather:
+    """Grid + parsel -> hücre indeksi (bir kez hesaplanır)."""
+
+    def __init__(self, grid: WeatherGrid, parcel_ids, lats, lons):
+        self.grid = grid
+        self.cells = pd.Series(grid.cell_index(lats, lons), index=pd.Index(np.asarray(parcel_ids, dtype=str)))
+
+    def cell_of(self, parcel_ids) -> np.ndarray:
+        """Parsel id'leri -> hücre indeksi (bilinmeyen / grid dışı -1)."""
+        return self.cells.reindex(np.asarray(parcel_ids, dtype=str)).fillna(-1).to_numpy(dtype=np.int64)
+
+    def join(self, obs: pd.DataFrame) -> pd.DataFrame:
+        """Gözlemlerde (date, parcel_id, ...) eksik / NaN meteo kolonlarını parselin hücresinden doldurur."""
+        return join_cells(self.grid, obs, self.cell_of(obs["parcel_id"]))
+
+
+def join_cells(grid: WeatherGrid, obs: pd.DataFrame, cell) -> pd.DataFrame:
+    """
+    Gözlemlerde (date, ...) eksik / NaN meteo kolonlarını verilen hücre indekslerinden doldurur.
+    Satırda değer varsa korunur; hücre -1 ya da grid dışı (grid değişmiş) ise NaN kalır.
+    """
+    out = obs.copy()
+    cell = np.asarray(cell, dtype=np.int64)
+    cell = np.where(cell < grid.n_cells, cell, -1)
+    values = grid.gather(grid.time_index(out["date"]), cell)
+    for name, vals in values.items():
+        if name in out.columns:
+            own = out[name].to_numpy(dtype=float)
+            vals = np.where(np.isnan(own), vals, own)
+        out[name] = vals
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gridli meteo dosyasını normalize NPZ'ye çevir")
+    parser.add_argument("path", help=".nc, .parquet (date, lat, lon, ...) veya .npz")
+    parser.add_argument("--out", default=str(Path(__file__).parent / "data" / "weather" / "grid.npz"))
+    parser.add_argument("--var", action="append", default=[], help="bizim_ad=dosyadaki_ad, örn. precipitation_sum=tp")
+    args = parser.parse_args()
+
+    var_map = dict(v.split("=", 1) for v in args.var)
+    grid = WeatherGrid.load(args.path, var_map)
+    grid.save(args.out)
+    print(
+        f"✅ {len(grid.dates)} gün x {len(grid.lats)}x{len(grid.lons)} hücre, "
+        f"değişkenler: {sorted(grid.values)} -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Native model artifact formatı (LightGBM).
+
+  model_7d.txt            booster'ın native text kaydı (Booster.save_model)
+  model_7d.manifest.json  feature isimleri + sırası, eğitim verisi parmak izi,
+                          ufuk (gün), metrikler, model dosyasının sha256'sı
+
+Manifest, checksum ve feature sırası kontrolü backend ile ortak
+(../aquaguard/artifact.py). load() lgb.Booster döner; predict / pred_contrib
+LGBMRegressor ile aynı şekilde çalışır, sklearn wrapper'ı unpickle etmeye gerek kalmaz.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # ortak aquaguard/ paketi
+
+from aquaguard import artifact as _artifact  # noqa: E402
+from aquaguard.artifact import (  # noqa: E402,F401
+    MANIFEST_SUFFIX,
+    ArtifactError,
+    check_features,
+    fingerprint,
+    manifest_path,
+    sha256_file,
+)
+
+FRAMEWORK = "lightgbm"
+
+
+def save(model, base, feature_names: list, horizon_days: int, metrics: dict = None,
+         training_fingerprint: str = None) -> Path:
+    """Booster'ı native text olarak, ardından manifest'i (atomik) yazar; manifest yolunu döner."""
+    model_file = _artifact.model_file_path(base, ".txt")
+    booster = getattr(model, "booster_", model)
+    if list(booster.feature_name()) != list(feature_names):
+        raise ArtifactError(f"Booster feature sırası {booster.feature_name()} != {list(feature_names)}")
+    booster.save_model(str(model_file))
+    return _artifact.write_manifest(model_file, FRAMEWORK, feature_names, horizon_days, metrics,
+                                    training_fingerprint)
+
+
+def read_manifest(path) -> dict:
+    return _artifact.read_manifest(path, FRAMEWORK)
+
+
+def load(path, expected_features: list = None):
+    """Manifest yolundan (booster, manifest); checksum veya feature sırası tutmazsa ArtifactError."""
+    import lightgbm as lgb
+
+    model_file, manifest = _artifact.verified_model_file(path, FRAMEWORK, expected_features)
+    booster = lgb.Booster(model_file=str(model_file))
+    check_features(booster.feature_name(), manifest["feature_names"], model_file.name)
+    return booster, manifest
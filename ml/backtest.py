@@ -0,0 +1,174 @@
+"""
+Vectorized historical backtest: every parcel, every valid day.
+
+predict_7d_from_timeseries'i gün gün çağırmak yerine:
+  - parseller chunk'lara bölünür, her chunk bir worker process'te
+    build_features ile TEK SEFERDE (tüm geçmiş) feature'lanır,
+  - tüm geçerli satırlar tek model.predict çağrısıyla skorlanır,
+  - gerçekleşen hedef train.py ile aynı: 7 gün sonraki ndvi_anomaly,
+  - parsel bazlı metrikler chunk bittikçe parquet rapora akıtılır,
+    ay ve risk bandı metrikleri birleştirilebilir toplamlar (n, Σe, Σ|e|, Σe²)
+    olarak biriktirilip sonda yazılır.
+
+Kullanım (ml/ klasöründen):
+  python backtest.py --out backtest_report.parquet --workers 4
+  python backtest.py --data data/parcels_timeseries.sparse   # seyrek depo (bkz. sparse_ts.py)
+"""
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from features import build_features
+from inference import load_artifacts
+from sparse_ts import read_timeseries
+
+
+DATA_PATH = os.path.join("data", "parcels_timeseries.csv")
+REPORT_SCHEMA = pa.schema([
+    ("level", pa.string()),
+    ("key", pa.string()),
+    ("n", pa.int64()),
+    ("bias", pa.float64()),
+    ("mae", pa.float64()),
+    ("rmse", pa.float64()),
+])
+
+
+def risk_band(risk: np.ndarray) -> np.ndarray:
+    # Dashboard ile aynı eşikler (app.js stressBucket)
+    return np.where(risk >= 70, "high", np.where(risk >= 40, "medium", "low"))
+
+
+# ---- worker process tarafı ----
+
+_model = None
+_feature_cols = None
+
+
+def init_worker():
+    """ProcessPoolExecutor initializer: model worker başına bir kez yüklenir."""
+    global _model, _feature_cols
+    _model, _feature_cols = load_artifacts()
+
+
+def worker_model():
+    """init_worker'ın bu process'te yüklediği (model, feature_cols)."""
+    return _model, _feature_cols
+
+
+def score_chunk(df_chunk: pd.DataFrame) -> pd.DataFrame:
+    """Bir parsel chunk'ı: feature'lar bir kez, tüm geçerli günler tek predict ile."""
+    df = build_features(df_chunk)
+    df["target_7d"] = df.groupby("parcel_id")["ndvi_anomaly"].shift(-7)
+    df = df.dropna(subset=_feature_cols + ["target_7d"])
+    if df.empty:
+        return pd.DataFrame(columns=["parcel_id", "date", "pred", "target"])
+
+    pred = np.asarray(_model.predict(df[_feature_cols]), dtype=float)
+    return pd.DataFrame({
+        "parcel_id": df["parcel_id"].to_numpy(),
+        "date": df["date"].to_numpy(),
+        "pred": pred,
+        "target": df["target_7d"].to_numpy(dtype=float),
+    })
+
+
+# ---- metrik toplamları ----
+
+def _sums(err: np.ndarray, keys: np.ndarray) -> pd.DataFrame:
+    g = pd.DataFrame({"key": keys, "e": err, "ae": np.abs(err), "se": err ** 2}).groupby("key")
+    out = g.agg(n=("e", "size"), sum_e=("e", "sum"), sum_ae=("ae", "sum"), sum_se=("se", "sum"))
+    return out
+
+
+def _finalize(level: str, sums: pd.DataFrame) -> pa.Table:
+    n = sums["n"].to_numpy(dtype=float)
+    return pa.table({
+        "level": [level] * len(sums),
+        "key": sums.index.astype(str).tolist(),
+        "n": sums["n"].to_numpy(dtype=np.int64),
+        "bias": sums["sum_e"].to_numpy() / n,
+        "mae": sums["sum_ae"].to_numpy() / n,
+        "rmse": np.sqrt(sums["sum_se"].to_numpy() / n),
+    }, schema=REPORT_SCHEMA)
+
+
+def parcel_chunks(df: pd.DataFrame, chunk_parcels: int):
+    """Parsel hizalı chunk'lar (bir parsel asla iki chunk'a bölünmez)."""
+    ids = df["parcel_id"].unique()
+    groups = df.groupby("parcel_id", sort=False).indices
+    for i in range(0, len(ids), chunk_parcels):
+        idx = np.concatenate([groups[p] for p in ids[i:i + chunk_parcels]])
+        yield df.iloc[np.sort(idx)]
+
+
+def bounded_map(pool, fn, items, max_in_flight: int):
+    """pool.submit ile sırasız sonuç akışı; aynı anda en fazla max_in_flight iş (bellek sınırlı)."""
+    pending = set()
+    for item in items:
+        pending.add(pool.submit(fn, item))
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+    for fut in as_completed(pending):
+        yield fut.result()
+
+
+def run_backtest(df: pd.DataFrame, out_path: str, workers: int, chunk_parcels: int) -> dict:
+    t0 = time.perf_counter()
+    month_sums, band_sums = [], []
+    n_rows = 0
+
+    with pq.ParquetWriter(out_path, REPORT_SCHEMA) as writer, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        for scored in bounded_map(pool, score_chunk, parcel_chunks(df, chunk_parcels), 2 * workers):
+            if scored.empty:
+                continue
+            err = scored["pred"].to_numpy() - scored["target"].to_numpy()
+            n_rows += len(err)
+
+            # Parsel metrikleri bu chunk'ta tamamlandı: hemen yaz
+            writer.write_table(_finalize("parcel", _sums(err, scored["parcel_id"].to_numpy())))
+
+            month = pd.to_datetime(scored["date"]).dt.strftime("%Y-%m").to_numpy()
+            # anomaly_to_risk'in vektörize hali
+            band = risk_band(np.minimum(100, np.abs(scored["pred"].to_numpy()) * 30))
+            month_sums.append(_sums(err, month))
+            band_sums.append(_sums(err, band))
+
+        for level, parts in (("month", month_sums), ("risk_band", band_sums)):
+            if parts:
+                writer.write_table(_finalize(level, pd.concat(parts).groupby(level=0).sum()))
+
+    elapsed = time.perf_counter() - t0
+    return {"rows": n_rows, "seconds": elapsed, "rows_per_s": n_rows / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AquaGuard backtest (tüm parseller, tüm günler)")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--out", default="backtest_report.parquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-parcels", type=int, default=64)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        raise FileNotFoundError(f"Veri bulunamadı: {args.data}")
+
+    df = read_timeseries(args.data)
+    stats = run_backtest(df, args.out, args.workers, args.chunk_parcels)
+    print(
+        f"✅ Backtest done. {stats['rows']} satır, {stats['seconds']:.2f} sn "
+        f"({stats['rows_per_s']:.0f} satır/sn) -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Feature / tahmin drift referansı (LightGBM 7 günlük model); sketch backend
+ile ortak (../aquaguard/drift.py).
+
+- train.py eğitim satırlarından her kolon (FEATURE_COLUMNS + predicted_anomaly_7d
+  + risk_score) için referansı çıkarır, model artifact'ının yanına
+  <model>.drift.json olarak yazar.
+- score.py her chunk'ı worker'da count_columns ile aynı kutulara sayar; ana
+  process sadece sabit boyutlu sayaç dizisini toplar ve sonunda
+  <out>/drift.json raporunu (report) yazar.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # ortak aquaguard/ paketi
+
+from aquaguard.drift import (  # noqa: E402,F401
+    BINS,
+    FORMAT,
+    REFERENCE_SUFFIX,
+    build_reference,
+    count_columns,
+    load_reference,
+    merge_reference,
+    reference_path,
+    report,
+    save_reference,
+)
@@ -1,12 +1,23 @@
 import os
+import sys
+from pathlib import Path
+
 import joblib
+import numpy as np
 import pandas as pd
 
-from features import build_features
+import artifact
+from features import FEATURE_COLUMNS, build_features
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # ortak aquaguard/ paketi
+
+from aquaguard import explain as _explain  # noqa: E402
+from aquaguard.timing import measure as _timed  # noqa: E402
 
 
 MODEL_PATH = "model_7d.joblib"
 FEATURES_PATH = "feature_columns.joblib"
+MANIFEST_PATH = artifact.manifest_path(MODEL_PATH)
 
 
 def anomaly_to_risk(anomaly: float) -> int:
@@ -15,6 +26,12 @@ def anomaly_to_risk(anomaly: float) -> int:
 
 
 def load_artifacts():
+    # Native artifact varsa (train.py yazar) pickle yerine onu yükle: daha hızlı,
+    # feature sırası features.FEATURE_COLUMNS ile uyuşmazsa ArtifactError
+    if os.path.exists(MANIFEST_PATH):
+        booster, manifest = artifact.load(MANIFEST_PATH, FEATURE_COLUMNS)
+        return booster, list(manifest["feature_names"])
+
     if not os.path.exists(MODEL_PATH) or not os.path.exists(FEATURES_PATH):
         raise FileNotFoundError(
             "Model dosyaları bulunamadı. Önce train.py çalıştır:\n"
@@ -27,6 +44,19 @@ def load_artifacts():
     return model, list(feature_cols)
 
 
+def explain_batch(model, X: pd.DataFrame, feature_cols: list):
+    """
+    Satır başına feature katkıları (predicted anomaly birimi), tek vektörize çağrı.
+    LightGBM pred_contrib çıktısının son kolonu bias'tır, atılır.
+    Model desteklemiyorsa None.
+    """
+    try:
+        out = model.predict(X[feature_cols], pred_contrib=True)
+    except TypeError:
+        return None
+    return np.asarray(out, dtype=float)[:, : len(feature_cols)]
+
+
 def _min_history_hint() -> int:
     # ndvi anomaly needs min_periods=15, plus lag_21 => ~36
     return 36
@@ -67,22 +97,28 @@ def _debug_report(df_feat: pd.DataFrame, feature_cols: list) -> dict:
     return report
 
 
-def predict_7d_from_timeseries(df_timeseries: pd.DataFrame, debug: bool = False) -> dict:
+def predict_7d_from_timeseries(df_timeseries: pd.DataFrame, debug: bool = False, timings: dict = None) -> dict:
     """
     Input: A single parcel's time series dataframe with columns:
       date, parcel_id, ndvi, rain_mm, temp_c
 
     We generate features and pick the latest row where ALL model features exist (non-NA),
     consistent with train.py (dropna).
+
+    timings: verilirse aşama süreleri (ms) bu dict'e yazılır
+      (load_artifacts, build_features, select_row, predict, explain).
     """
-    model, feature_cols = load_artifacts()
+    with _timed(timings, "load_artifacts"):
+        model, feature_cols = load_artifacts()
 
-    df_feat = build_features(df_timeseries).sort_values("date").reset_index(drop=True)
+    with _timed(timings, "build_features"):
+        df_feat = build_features(df_timeseries).sort_values("date").reset_index(drop=True)
 
     dbg = _debug_report(df_feat, feature_cols) if debug else None
 
     # Consistent with training: drop rows where any feature is NA
-    df_valid = df_feat.dropna(subset=feature_cols)
+    with _timed(timings, "select_row"):
+        df_valid = df_feat.dropna(subset=feature_cols)
 
     if df_valid.empty:
         available_days = int(df_feat.shape[0])
@@ -106,13 +142,20 @@ def predict_7d_from_timeseries(df_timeseries: pd.DataFrame, debug: bool = False)
     last = df_valid.iloc[-1:]
     X = last[feature_cols]
 
-    pred_anom = float(model.predict(X)[0])
+    with _timed(timings, "predict"):
+        pred_anom = float(model.predict(X)[0])
     risk = anomaly_to_risk(pred_anom)
 
     top_factors = []
-    if hasattr(model, "feature_importances_"):
-        importances = dict(zip(feature_cols, model.feature_importances_))
-        top_factors = sorted(importances, key=importances.get, reverse=True)[:3]
+    contributions = None
+    with _timed(timings, "explain"):
+        contrib = explain_batch(model, X, feature_cols)
+        if contrib is not None:
+            contributions = {c: float(v) for c, v in zip(feature_cols, contrib[0])}
+            top_factors = _explain.top_factors(contrib, feature_cols)[0]
+        elif hasattr(model, "feature_importances_"):
+            importances = dict(zip(feature_cols, model.feature_importances_))
+            top_factors = sorted(importances, key=importances.get, reverse=True)[:3]
 
     used_features = {c: float(X.iloc[0][c]) for c in feature_cols}
     used_date = pd.to_datetime(last.iloc[0]["date"]).date().isoformat()
@@ -123,6 +166,7 @@ def predict_7d_from_timeseries(df_timeseries: pd.DataFrame, debug: bool = False)
         "predicted_anomaly_7d": pred_anom,
         "risk_score": risk,
         "top_factors": top_factors,
+        "contributions": contributions,
         "used_features": used_features,
     }
 
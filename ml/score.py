@@ -0,0 +1,193 @@
+"""
+Offline toplu skorlama (gece batch işleri için, web servisinden bağımsız).
+
+  python score.py arsiv.csv --out skorlar/ --workers 8
+  python score.py arsiv.parquet --out skorlar/ --mode latest
+  python score.py arsiv.sparse --out skorlar/        # seyrek depo (bkz. sparse_ts.py)
+
+- Girdi parsel hizalı chunk'lar halinde okunur (CSV: read_csv chunksize,
+  parquet / seyrek depo: iter_batches). Girdinin parcel_id'ye göre gruplu olması gerekir
+  (her parselin satırları ardışık); chunk sınırında kalan parselin satırları
+  bir sonraki chunk'a taşınır.
+- Her chunk bir worker process'te build_features + model.predict ile skorlanır
+  (model worker başına bir kez yüklenir, aynı anda en fazla 2*workers chunk).
+- Sonuçlar ay bazında bölümlenmiş parquet'e akıtılır:
+    <out>/month=YYYY-MM/part-<chunk>.parquet
+  <out>'ta önceki bir koşunun part dosyaları varsa iş reddedilir (--overwrite
+  ile önce silinir); aksi halde daha az chunk'lı yeni koşu eski skorlarla karışır.
+- Model yanında drift referansı (model_7d.drift.json, train.py yazar) varsa
+  worker'lar skorlanan satırları referans kutularına sayar; toplam
+  <out>/drift.json'a PSI raporu olarak yazılır (bkz. drift.py).
+Bellek chunk boyutu * uçuştaki chunk sayısı ile sınırlıdır.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import drift
+import sparse_ts
+from backtest import bounded_map, init_worker, worker_model
+from features import build_features
+from inference import MODEL_PATH
+
+
+def read_chunks(path: str, chunk_rows: int):
+    """Ham satırları chunk_rows'luk parçalar halinde okur."""
+    if sparse_ts.is_sparse(path):
+        yield from sparse_ts.SparseTimeseries(path).iter_batches(chunk_rows)
+    elif path.endswith(".parquet"):
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+def parcel_aligned(chunks):
+    """
+    Ham chunk'ları parsel hizalı chunk'lara çevirir: son parselin satırları,
+    devamı bir sonraki chunk'ta olabileceği için ertelenir.
+    """
+    carry = None
+    seen = set()
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            continue
+
+        ids = chunk["parcel_id"].to_numpy()
+        last_id = ids[-1]
+        tail_start = len(ids) - int(np.argmax(ids[::-1] != last_id)) if (ids != last_id).any() else 0
+        ready, carry = chunk.iloc[:tail_start], chunk.iloc[tail_start:]
+
+        if len(ready):
+            ready_ids = pd.unique(ready["parcel_id"])
+            again = seen.intersection(ready_ids)
+            if again:
+                raise ValueError(
+                    f"Girdi parcel_id'ye göre gruplu değil (tekrar görülen: {sorted(again)[:5]}). "
+                    "Önce parcel_id, date ile sıralayın."
+                )
+            seen.update(ready_ids)
+            yield ready
+
+    if carry is not None and len(carry):
+        if carry["parcel_id"].iloc[0] in seen:
+            raise ValueError("Girdi parcel_id'ye göre gruplu değil. Önce parcel_id, date ile sıralayın.")
+        yield carry
+
+
+def score_parcels(df_chunk: pd.DataFrame, mode: str, reference: dict = None):
+    """
+    Worker: parsel chunk'ını feature'la ve skorla (mode=latest: parsel başına son geçerli gün).
+    (işlenen ham satır, skorlar, drift sayaçları veya None) döner.
+    """
+    model, feature_cols = worker_model()
+    df = build_features(df_chunk).dropna(subset=feature_cols)
+    if mode == "latest":
+        df = df.groupby("parcel_id").tail(1)
+    if df.empty:
+        return len(df_chunk), pd.DataFrame(columns=["parcel_id", "date", "predicted_anomaly_7d", "risk_score"]), None
+
+    pred = np.asarray(model.predict(df[feature_cols]), dtype=float)
+    scored = pd.DataFrame({
+        "parcel_id": df["parcel_id"].astype(str).to_numpy(),
+        "date": pd.to_datetime(df["date"]).to_numpy(),
+        "predicted_anomaly_7d": pred,
+        # anomaly_to_risk'in vektörize hali
+        "risk_score": np.minimum(100, np.abs(pred) * 30).astype(np.int64),
+    })
+    counts = None
+    if reference is not None:
+        columns = {c: df[c].to_numpy(dtype=float) for c in feature_cols}
+        columns["predicted_anomaly_7d"] = pred
+        columns["risk_score"] = scored["risk_score"].to_numpy(dtype=float)
+        counts = drift.count_columns(reference, columns)
+    return len(df_chunk), scored, counts
+
+
+def write_partitioned(scored: pd.DataFrame, out_dir: Path, part_idx: int) -> int:
+    months = scored["date"].dt.strftime("%Y-%m")
+    for month, rows in scored.groupby(months):
+        part_dir = out_dir / f"month={month}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        rows.to_parquet(part_dir / f"part-{part_idx:06d}.parquet", index=False)
+    return len(scored)
+
+
+def previous_outputs(out_dir: Path) -> list:
+    """Önceki koşudan kalan part dosyaları ve drift raporu."""
+    return sorted(out_dir.glob("month=*/part-*.parquet")) + sorted(out_dir.glob("drift.json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AquaGuard offline toplu skorlama")
+    parser.add_argument("input", help="CSV veya parquet (parcel_id'ye göre gruplu)")
+    parser.add_argument("--out", default="scores", help="Bölümlenmiş parquet çıktı klasörü")
+    parser.add_argument("--mode", choices=["all", "latest"], default="all")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=200_000)
+    parser.add_argument("--overwrite", action="store_true", help="--out'taki önceki skorları sil")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        raise FileNotFoundError(f"Girdi bulunamadı: {args.input}")
+    out_dir = Path(args.out)
+    old = previous_outputs(out_dir) if out_dir.exists() else []
+    if old and not args.overwrite:
+        raise SystemExit(
+            f"{out_dir} önceki bir koşunun {len(old)} dosyasını içeriyor; "
+            "karışmaması için --overwrite verin ya da boş bir --out seçin."
+        )
+    for p in old:
+        p.unlink()
+    for d in out_dir.glob("month=*") if old else []:
+        if d.is_dir() and not any(d.iterdir()):
+            d.rmdir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    ref_path = drift.reference_path(MODEL_PATH)
+    reference = drift.load_reference(ref_path) if ref_path.exists() else None
+    drift_counts = None
+
+    t0 = time.perf_counter()
+    rows_in = rows_out = 0
+    work = partial(score_parcels, mode=args.mode, reference=reference)
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as pool:
+        chunks = parcel_aligned(read_chunks(args.input, args.chunk_rows))
+        for i, (n_in, scored, counts) in enumerate(bounded_map(pool, work, chunks, 2 * args.workers)):
+            # Sadece skorlanmış chunk'lar sayılır (kuyrukta bekleyenler değil)
+            rows_in += n_in
+            if len(scored):
+                rows_out += write_partitioned(scored, out_dir, i)
+            if counts is not None:
+                drift_counts = counts if drift_counts is None else drift_counts + counts
+            elapsed = time.perf_counter() - t0
+            print(
+                f"[{elapsed:7.1f}s] chunk {i + 1}: okunan {rows_in} satır, "
+                f"yazılan {rows_out} tahmin ({rows_in / elapsed:.0f} satır/sn)",
+                file=sys.stderr,
+            )
+
+    elapsed = time.perf_counter() - t0
+    print(f"✅ Scoring done. {rows_in} satır -> {rows_out} tahmin, {elapsed:.2f} sn -> {out_dir}")
+    if drift_counts is not None:
+        rep = drift.report(reference, drift_counts)
+        (out_dir / "drift.json").write_text(json.dumps(rep, ensure_ascii=False, indent=2), encoding="utf-8")
+        worst = sorted(rep["columns"].items(), key=lambda kv: -kv[1]["psi"])[:3]
+        print(f"📈 Drift: {rep['status']} (" + ", ".join(f"{k} PSI {v['psi']:.3f}" for k, v in worst) + ")")
+
+
+if __name__ == "__main__":
+    main()
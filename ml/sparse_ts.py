@@ -0,0 +1,59 @@
+"""
+Yoğun günlük zaman serisini seyrek depoya çeviren CLI; format, yazıcı ve
+okuyucu backend ile ortak (../aquaguard/sparse_ts.py).
+
+  python sparse_ts.py data/parcels_timeseries.csv    # -> data/parcels_timeseries.sparse/
+
+Yazdıktan sonra depo geri açılıp orijinalle bit bit karşılaştırılır.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # ortak aquaguard/ paketi
+
+from aquaguard.sparse_ts import (  # noqa: E402,F401
+    FORMAT,
+    FORMAT_VERSION,
+    MAX_KNOT_FRACTION,
+    SPARSE_SUFFIX,
+    STRIDE,
+    SparseTimeseries,
+    is_sparse,
+    read_timeseries,
+    sparse_path,
+    write_sparse,
+)
+
+
+def _size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.iterdir()) if path.is_dir() else path.stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yoğun günlük zaman serisini seyrek depoya çevir")
+    parser.add_argument("path", help="Yoğun CSV / parquet (date, parcel_id, ndvi, ...)")
+    parser.add_argument("--out", help="Varsayılan: <dosya>.sparse/")
+    args = parser.parse_args()
+
+    out = Path(args.out) if args.out else sparse_path(args.path)
+    dense = read_timeseries(args.path)
+    report = write_sparse(dense, out)
+
+    # Birebir geri açılıyor mu? (tarihler gün olarak, diğer kolonlar bit bit)
+    back = SparseTimeseries(out).read()
+    pd.testing.assert_frame_equal(back.drop(columns="date"), dense.drop(columns="date"), check_exact=True)
+    if not np.array_equal(back["date"].to_numpy(dtype="datetime64[ns]"),
+                          pd.to_datetime(dense["date"]).to_numpy(dtype="datetime64[ns]")):
+        raise AssertionError("Geri açılan tarihler orijinalle aynı değil")
+
+    for col, r in report.items():
+        print(f"  {col}: {r['mode']}, {r['knots']}/{r['rows']} düğüm")
+    print(f"✅ {len(dense)} satır -> {out} ({_size(Path(args.path)) / 1024:.0f} KB -> {_size(out) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
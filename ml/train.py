@@ -1,31 +1,76 @@
+"""
+7 günlük NDVI anomaly modeli eğitimi.
+
+  python train.py                   # tüm veriyle sıfırdan (400 ağaç)
+  python train.py --incremental     # önceki modelin üstüne sadece yeni satırlarla ağaç ekle
+  python train.py --data data/parcels_timeseries.sparse   # seyrek depo (bkz. sparse_ts.py)
+
+Incremental mod:
+  - model_7d.meta.json'daki last_feature_date'ten sonraki satırlar "yeni"dir
+    (--since ile ezilebilir),
+  - feature'lar sadece yeni satırlar + pencerelerinin ihtiyaç duyduğu geçmiş
+    (HISTORY_DAYS) için hesaplanır,
+  - son --holdout-days gün early stopping için ayrılır (zaman bazlı),
+  - önceki booster init_model olarak verilir, en fazla --add-trees ağaç eklenir.
+Her eğitim models/ altına yeni bir versiyon yazar ve servis edilen modeli günceller:
+model_7d.txt + model_7d.manifest.json (native, inference bunu yükler) ve
+model_7d.joblib (incremental eğitim hiperparametreleri için).
+"""
+import argparse
+import hashlib
+import json
 import os
+import shutil
+import time
+from pathlib import Path
+
 import joblib
+import lightgbm as lgb
+import numpy as np
 import pandas as pd
 from lightgbm import LGBMRegressor
 
+import artifact
+import drift
+import sparse_ts
 from features import build_features, FEATURE_COLUMNS
 
 
 DATA_PATH = os.path.join("data", "parcels_timeseries.csv")
 MODEL_PATH = "model_7d.joblib"
 FEATURES_PATH = "feature_columns.joblib"
+META_PATH = "model_7d.meta.json"
+VERSIONS_DIR = "models"
 
+HORIZON_DAYS = 7
+# rolling(30) ile hesaplanan anomaly'nin 21 gün lag'i: bir satırın feature'ı için gereken geçmiş
+HISTORY_DAYS = 30 + 21
+
+
+def load_meta() -> dict:
+    if not os.path.exists(META_PATH):
+        return {}
+    with open(META_PATH, encoding="utf-8") as f:
+        return json.load(f)
 
-def main():
-    if not os.path.exists(DATA_PATH):
-        raise FileNotFoundError(
-            f"CSV bulunamadı: {DATA_PATH}\n"
-            "Dosyayı şuraya koy: aquaguard/ml/data/parcels_timeseries.csv"
-        )
 
-    df = pd.read_csv(DATA_PATH)
+def make_training_frame(df: pd.DataFrame) -> pd.DataFrame:
     df = build_features(df)
 
     # Target: 7 gün sonraki ndvi_anomaly
-    df["target_7d"] = df.groupby("parcel_id")["ndvi_anomaly"].shift(-7)
+    df["target_7d"] = df.groupby("parcel_id")["ndvi_anomaly"].shift(-HORIZON_DAYS)
 
     # Model dataframe
-    df_model = df.dropna(subset=FEATURE_COLUMNS + ["target_7d"]).reset_index(drop=True)
+    return df.dropna(subset=FEATURE_COLUMNS + ["target_7d"]).reset_index(drop=True)
+
+
+def rmse(model, X, y) -> float:
+    preds = model.predict(X)
+    return float(((preds - y) ** 2).mean() ** 0.5)
+
+
+def full_train(raw: pd.DataFrame):
+    df_model = make_training_frame(raw)
 
     if len(df_model) < 200:
         print(f"⚠️ Uyarı: Eğitim verisi az görünüyor (n={len(df_model)}). Yine de devam ediyorum.")
@@ -50,13 +95,172 @@ def main():
     model.fit(X_train, y_train)
 
     # Basit değerlendirme
-    preds = model.predict(X_test)
-    rmse = ((preds - y_test) ** 2).mean() ** 0.5
-    print(f"✅ Train done. Test RMSE: {rmse:.4f}")
+    score = rmse(model, X_test, y_test)
+    print(f"✅ Train done. Test RMSE: {score:.4f}")
+    return model, df_model, {"rmse": score, "rows": len(df_model)}
+
+
+def incremental_train(raw: pd.DataFrame, since: pd.Timestamp, holdout_days: int, add_trees: int,
+                      early_stopping: int):
+    prev = joblib.load(MODEL_PATH)
+
+    raw = raw.copy()
+    raw["date"] = pd.to_datetime(raw["date"])
+    is_new = raw["date"] > since
+    n_new = int(is_new.sum())
+    new_first = raw[is_new].groupby("parcel_id")["date"].min()
+    if new_first.empty:
+        raise SystemExit(f"Yeni satır yok ({since.date()} sonrası). Incremental eğitime gerek yok.")
+
+    # Sadece yeni satırı olan parseller, pencere geçmişiyle birlikte
+    first = raw["parcel_id"].map(new_first)
+    window = raw[first.notna() & (raw["date"] >= first - pd.Timedelta(days=HISTORY_DAYS))]
+    df_model = make_training_frame(window)
+    df_model = df_model[df_model["date"] > since].reset_index(drop=True)
+    if df_model.empty:
+        raise SystemExit("Yeni satırların hiçbiri henüz hedefe (7 gün sonrası) sahip değil.")
+
+    cutoff = df_model["date"].max() - pd.Timedelta(days=holdout_days)
+    fit, valid = df_model[df_model["date"] <= cutoff], df_model[df_model["date"] > cutoff]
+    if fit.empty or valid.empty:
+        raise SystemExit(
+            f"Yeni veri ({df_model['date'].min().date()} - {df_model['date'].max().date()}) "
+            f"{holdout_days} günlük holdout için yetersiz."
+        )
+
+    rmse_before = rmse(prev, valid[FEATURE_COLUMNS], valid["target_7d"])
+    model = LGBMRegressor(**{**prev.get_params(), "n_estimators": add_trees})
+    model.fit(
+        fit[FEATURE_COLUMNS], fit["target_7d"],
+        init_model=prev.booster_,
+        eval_set=[(valid[FEATURE_COLUMNS], valid["target_7d"])],
+        callbacks=[lgb.early_stopping(early_stopping, verbose=False)],
+    )
+    score = rmse(model, valid[FEATURE_COLUMNS], valid["target_7d"])
+    added = model.booster_.num_trees() - prev.booster_.num_trees()
+    print(
+        f"✅ Incremental train done. +{added} ağaç, {n_new} yeni ham satır "
+        f"({len(fit)} eğitim + {len(valid)} holdout hedefli satır); "
+        f"holdout RMSE {rmse_before:.4f} -> {score:.4f}"
+    )
+    return model, df_model, {"rmse": score, "rmse_before": rmse_before, "rows": len(df_model), "new_rows": n_new,
+                              "trees_added": added}
+
+
+def drift_reference(model, df_model: pd.DataFrame, training_fingerprint: str, previous: dict = None) -> dict:
+    """
+    Eğitim satırlarının feature + tahmin dağılımı (bkz. drift.py).
+    previous verilirse (incremental: df_model sadece yeni satırlar) sayılar önceki
+    referansa eklenir, kenarlar korunur. Eski satırların tahmin kolonları önceki
+    modelden gelir; yeni ağaçlar küçük düzeltme olduğu için yaklaşık kabul edilir.
+    """
+    pred = model.predict(df_model[FEATURE_COLUMNS])
+    columns = {c: df_model[c].to_numpy(dtype=float) for c in FEATURE_COLUMNS}
+    columns["predicted_anomaly_7d"] = pred
+    columns["risk_score"] = np.minimum(100, np.abs(pred) * 30)  # anomaly_to_risk
+    if previous is not None:
+        return drift.merge_reference(previous, columns, rows=len(df_model), training_data_fingerprint=training_fingerprint)
+    return drift.build_reference(columns, rows=len(df_model), training_data_fingerprint=training_fingerprint)
+
+
+def save_artifact(model, meta: dict, training_fingerprint: str, reference: dict = None) -> str:
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    version = f"v{meta['version']}"
+    versioned = os.path.join(VERSIONS_DIR, f"model_7d-{version}.joblib")
+
+    joblib.dump(model, versioned)
+    with open(os.path.join(VERSIONS_DIR, f"model_7d-{version}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    artifact.save(model, versioned, FEATURE_COLUMNS, HORIZON_DAYS, meta["metrics"], training_fingerprint)
+    if reference is not None:
+        drift.save_reference(reference, drift.reference_path(versioned))
 
-    joblib.dump(model, MODEL_PATH)
+    # Servis edilen "güncel" model
+    shutil.copyfile(versioned, MODEL_PATH)
     joblib.dump(FEATURE_COLUMNS, FEATURES_PATH)
-    print(f"✅ Saved: {MODEL_PATH}, {FEATURES_PATH}")
+    artifact.save(model, MODEL_PATH, FEATURE_COLUMNS, HORIZON_DAYS, meta["metrics"], training_fingerprint)
+    if reference is not None:
+        drift.save_reference(reference, drift.reference_path(MODEL_PATH))
+    with open(META_PATH, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return versioned
+
+
+def data_fingerprint(path: str) -> str:
+    """Eğitim verisinin sha256'sı; seyrek depoda dizindeki dosyaların özetlerinin özeti."""
+    if not sparse_ts.is_sparse(path):
+        return artifact.sha256_file(path)
+    h = hashlib.sha256()
+    for p in sorted(Path(path).iterdir()):
+        h.update(f"{p.name}:{artifact.sha256_file(p)}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AquaGuard 7 günlük model eğitimi")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--incremental", action="store_true", help="Önceki modelin üstüne ağaç ekle")
+    parser.add_argument("--since", help="Bu tarihten SONRAKİ satırlar yeni sayılır (varsayılan: meta)")
+    parser.add_argument("--holdout-days", type=int, default=14)
+    parser.add_argument("--add-trees", type=int, default=200)
+    parser.add_argument("--early-stopping", type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        raise FileNotFoundError(
+            f"CSV bulunamadı: {args.data}\n"
+            "Dosyayı şuraya koy: aquaguard/ml/data/parcels_timeseries.csv"
+        )
+
+    prev_meta = load_meta()
+    raw = sparse_ts.read_timeseries(args.data)
+    t0 = time.perf_counter()
+
+    if args.incremental:
+        if not os.path.exists(MODEL_PATH):
+            raise FileNotFoundError(f"Incremental eğitim için önceki model gerekli: {MODEL_PATH}")
+        since = args.since or prev_meta.get("last_feature_date")
+        if since is None:
+            raise SystemExit(f"{META_PATH} yok; yeni satırların başlangıcını --since ile verin.")
+        model, df_model, metrics = incremental_train(
+            raw, pd.Timestamp(since), args.holdout_days, args.add_trees, args.early_stopping
+        )
+    else:
+        model, df_model, metrics = full_train(raw)
+
+    seconds = time.perf_counter() - t0
+    meta = {
+        "version": prev_meta.get("version", 0) + 1,
+        "parent_version": prev_meta.get("version") if args.incremental else None,
+        "mode": "incremental" if args.incremental else "full",
+        "trained_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "last_feature_date": str(df_model["date"].max().date()),
+        "n_trees": model.booster_.num_trees(),
+        "train_seconds": seconds,
+        "metrics": metrics,
+        # Son tam eğitimin süresi/boyutu: incremental'ın kazancını tahmin etmek için taşınır
+        "full_train": (
+            {"seconds": seconds, "raw_rows": len(raw)} if not args.incremental
+            else prev_meta.get("full_train")
+        ),
+    }
+
+    if args.incremental:
+        full = meta["full_train"]
+        if full:
+            # Tam eğitim süresi ham satır sayısıyla yaklaşık doğrusal
+            estimate = full["seconds"] * len(raw) / full["raw_rows"]
+            print(f"⏱️ {seconds:.2f} sn (tam eğitim tahmini {estimate:.2f} sn, kazanç {estimate - seconds:.2f} sn)")
+        else:
+            print(f"⏱️ {seconds:.2f} sn (karşılaştırma için kayıtlı tam eğitim süresi yok)")
+
+    fingerprint = data_fingerprint(args.data)[:16]
+    # Incremental: df_model sadece yeni satırlar; referans önceki modelinkiyle birleşir
+    previous = None
+    if args.incremental and drift.reference_path(MODEL_PATH).exists():
+        previous = drift.load_reference(drift.reference_path(MODEL_PATH))
+    path = save_artifact(model, meta, fingerprint, drift_reference(model, df_model, fingerprint, previous))
+    print(f"✅ Saved: {path} -> {artifact.manifest_path(MODEL_PATH)}, {MODEL_PATH}, {FEATURES_PATH}, {META_PATH}")
 
 
 if __name__ == "__main__":
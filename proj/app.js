@@ -1,9 +1,21 @@
 /* AquaGuard AI - Interactive App (Leaflet + Chart.js) - Backend Integrated */
 
+// Parsel listesi sayfa sayfa yüklenir (100k parselde tüm listeyi çekmiyoruz)
+const CATALOG_PAGE = 200;
+
 const API = {
   parcels: "/parcels",
+  catalog: (q, cursor) =>
+    `/parcels/catalog?limit=${CATALOG_PAGE}&include=risk` +
+    (q ? `&q=${encodeURIComponent(q)}` : "") +
+    (cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""),
+  parcelsBbox: (b) =>
+    `/parcels/bbox?min_lat=${b.getSouth()}&min_lon=${b.getWest()}&max_lat=${b.getNorth()}&max_lon=${b.getEast()}`,
+  riskTiles: (z, b) =>
+    `/risk-tiles/${z}?min_lat=${b.getSouth()}&min_lon=${b.getWest()}&max_lat=${b.getNorth()}&max_lon=${b.getEast()}`,
   timeseries: (parcelId) => `/timeseries?parcel_id=${encodeURIComponent(parcelId)}`,
   predict: "/predict",
+  events: "/events",
   recommend: "/recommend",
 };
 
@@ -48,7 +60,8 @@ function clamp(n, a, b) {
 }
 
 const state = {
-  parcels: [], // backend'den dolacak: [{id, name}]
+  parcels: [], // backend'den sayfa sayfa dolacak: [{id, name, risk, date}]
+  catalog: { q: "", nextCursor: null },
   filters: {
     province: "all", // UI'da duruyor ama backend bu alanları döndürmüyor (şimdilik)
     stress: "all",   // UI'da duruyor ama risk bilgisi toplu gelmiyor (şimdilik)
@@ -67,6 +80,7 @@ const elTo = document.getElementById("filterTo");
 const elSource = document.getElementById("filterSource");
 const elApply = document.getElementById("applyFilters");
 const elTable = document.getElementById("parcelTableBody");
+const elSearch = document.getElementById("parcelSearch");
 const elMapLoading = document.getElementById("mapLoading");
 const elRainSim = document.getElementById("rainSim");
 const elRainSimLabel = document.getElementById("rainSimLabel");
@@ -85,6 +99,9 @@ const form = document.getElementById("parcelForm");
 
 // Map
 let map;
+let parcelLayer;
+let viewportTimer;
+let searchTimer;
 
 // Charts
 let chartNdvi;
@@ -105,14 +122,97 @@ function ensureMap() {
     maxZoom: 19,
     attribution: "&copy; OpenStreetMap",
   }).addTo(map);
+
+  parcelLayer = L.layerGroup().addTo(map);
+  // Sadece görünür alandaki parselleri çek (100k parselde tüm listeyi çizmiyoruz)
+  map.on("moveend", () => {
+    clearTimeout(viewportTimer);
+    viewportTimer = setTimeout(loadVisibleParcels, 200);
+  });
+}
+
+// Bu zoom'un altında parsel yerine agrege risk karoları çizilir
+const PARCEL_MIN_ZOOM = 11;
+
+async function loadVisibleParcels() {
+  if (!map || !parcelLayer) return;
+  if (map.getZoom() < PARCEL_MIN_ZOOM) return loadRiskTiles();
+
+  let visible;
+  try {
+    visible = await apiGet(API.parcelsBbox(map.getBounds()));
+  } catch (e) {
+    return;
+  }
+
+  parcelLayer.clearLayers();
+  visible.forEach((p) => {
+    const bucket = typeof p.risk_7d === "number" ? stressBucket(p.risk_7d) : null;
+    const style = bucket ? STRESS[bucket] : { color: "#64748b", fill: "rgba(100,116,139,0.22)" };
+    L.circleMarker([p.lat, p.lon], {
+      radius: 7,
+      color: style.color,
+      fillColor: style.color,
+      fillOpacity: 0.45,
+      weight: 2,
+    })
+      .bindTooltip(`${p.name}${p.risk_7d != null ? ` · risk ${Math.round(p.risk_7d)}/100` : ""}`)
+      .on("click", () => selectParcel(p.parcel_id))
+      .addTo(parcelLayer);
+  });
+}
+
+async function loadRiskTiles() {
+  let tiles;
+  try {
+    tiles = await apiGet(API.riskTiles(map.getZoom(), map.getBounds()));
+  } catch (e) {
+    return;
+  }
+
+  parcelLayer.clearLayers();
+  tiles.cells.forEach((c) => {
+    const style = STRESS[stressBucket(c.mean)];
+    const [s, w, n, e] = c.bounds;
+    L.rectangle(
+      [
+        [s, w],
+        [n, e],
+      ],
+      { color: style.color, fillColor: style.color, fillOpacity: 0.3, weight: 1 }
+    )
+      .bindTooltip(`${c.count} parsel · ort. risk ${Math.round(c.mean)} · maks. ${Math.round(c.max)}`)
+      .addTo(parcelLayer);
+  });
+}
+
+/**
+ * Katalog sayfası: reset=true ise (yeni arama) listeyi baştan kurar,
+ * değilse next_cursor ile sonraki sayfayı ekler.
+ */
+async function loadCatalog(reset) {
+  const cursor = reset ? null : state.catalog.nextCursor;
+  const page = await apiGet(API.catalog(state.catalog.q, cursor));
+  const items = (page.items || []).map((x) => ({
+    id: x.parcel_id,
+    name: x.name || x.parcel_id,
+    risk: x.risk_7d,
+    date: x.date,
+  }));
+  state.parcels = reset ? items : state.parcels.concat(items);
+  state.catalog.nextCursor = page.next_cursor;
+  renderTable();
 }
 
 /**
- * Backend /parcels sadece id veriyor -> filtreleri şimdilik uygulamıyoruz.
- * UI bozulmasın diye fonksiyon duruyor.
+ * Stres filtresi katalogdan gelen cache'lenmiş risk ile uygulanır;
+ * il/kaynak alanlarını backend döndürmüyor.
  */
 function filterParcels() {
-  return state.parcels;
+  if (state.filters.stress === "all") return state.parcels;
+  return state.parcels.filter(
+    (p) => typeof p.risk === "number" && stressBucket(p.risk) === state.filters.stress
+  );
 }
 
 function populateProvinceOptions() {
@@ -164,7 +264,7 @@ function ensureCharts() {
       animation: false,
       indexAxis: "y",
       plugins: { legend: { display: false } },
-      scales: { x: { suggestedMin: 0, suggestedMax: 0.5 } },
+      scales: { x: { suggestedMin: 0 } },
     },
   });
 }
@@ -205,16 +305,26 @@ function renderTable() {
 
   elTable.innerHTML = visible
     .map((p) => {
+      const bucket = typeof p.risk === "number" ? stressBucket(p.risk) : null;
+      const stress = bucket
+        ? `<span class="dot-sm" style="background:${STRESS[bucket].color}"></span>${STRESS[bucket].label} (${Math.round(p.risk)})`
+        : "—";
       return `
         <div class="map-table-row" data-id="${p.id}" role="button" tabindex="0">
           <span>${p.name || p.id}</span>
-          <span>—</span>
-          <span>—</span>
+          <span>${stress}</span>
+          <span>${p.date ? fmtDate(p.date) : "—"}</span>
           <span>—</span>
         </div>
       `;
     })
-    .join("");
+    .join("") +
+    (state.catalog.nextCursor
+      ? '<div class="map-table-row" data-more="1" role="button" tabindex="0"><span>Daha fazla yükle…</span></div>'
+      : "");
+
+  const more = elTable.querySelector(".map-table-row[data-more]");
+  if (more) more.addEventListener("click", () => loadCatalog(false));
 
   elTable.querySelectorAll(".map-table-row[data-id]").forEach((row) => {
     row.addEventListener("click", () => selectParcel(row.dataset.id));
@@ -231,8 +341,8 @@ function renderTable() {
  * - POST /recommend
  */
 async function selectParcel(id) {
-  const parcel = state.parcels.find((p) => p.id === id);
-  if (!parcel) return;
+  // Haritadan seçilen parsel henüz yüklenmemiş bir sayfada olabilir
+  const parcel = state.parcels.find((p) => p.id === id) || { id, name: id };
   state.selectedId = id;
 
   // UI initial
@@ -329,12 +439,13 @@ async function selectParcel(id) {
       </div>
     `;
 
-    // shap demo chart from factors
+    // Parsel bazlı katkılar (risk puanı); yoksa sıraya göre demo değer
+    const contrib = pred.contributions || null;
     chartShap.data.labels = factors.slice(0, 5);
     chartShap.data.datasets = [
       {
-        label: "Etki (demo)",
-        data: factors.slice(0, 5).map((_, i) => 0.35 - i * 0.05),
+        label: contrib ? "Risk katkısı" : "Etki (demo)",
+        data: factors.slice(0, 5).map((f, i) => (contrib ? contrib[f] : 0.35 - i * 0.05)),
         backgroundColor: "rgba(34,197,94,0.35)",
         borderColor: "rgba(34,197,94,0.9)",
         borderWidth: 1,
@@ -387,6 +498,17 @@ function bindFilters() {
     });
   }
 
+  if (elSearch) {
+    // Type-ahead: yazmayı bitirince prefix araması (ilk sayfa)
+    elSearch.addEventListener("input", () => {
+      clearTimeout(searchTimer);
+      searchTimer = setTimeout(() => {
+        state.catalog.q = elSearch.value.trim();
+        loadCatalog(true).catch(() => {});
+      }, 200);
+    });
+  }
+
   if (elRainSim && elRainSimLabel) {
     elRainSim.addEventListener("input", () => {
       const val = Number(elRainSim.value || "100");
@@ -407,6 +529,37 @@ function bindForm() {
   });
 }
 
+/**
+ * Canlı güncellemeler (SSE): backend risk farklarını iter.
+ * - risk: sadece değişen parsellerin riskini güncelle, seçili parsel değiştiyse yeniden yükle
+ * - reload / resync: çok fazla değişiklik ya da geride kaldık -> listeyi baştan çek
+ * EventSource bağlantı koparsa kendisi yeniden bağlanır.
+ */
+function subscribeEvents() {
+  if (!window.EventSource) return;
+  const es = new EventSource(API.events);
+
+  es.addEventListener("risk", (e) => {
+    const diff = JSON.parse(e.data);
+    const changed = diff.changed || {};
+    const removed = new Set(diff.removed || []);
+    state.parcels = state.parcels
+      .filter((p) => !removed.has(p.id))
+      .map((p) => (p.id in changed ? { ...p, risk: changed[p.id] } : p));
+    renderTable();
+    loadVisibleParcels();
+    if (state.selectedId && state.selectedId in changed) selectParcel(state.selectedId);
+  });
+
+  const refresh = () => {
+    loadCatalog(true).catch(() => {});
+    loadVisibleParcels();
+    if (state.selectedId) selectParcel(state.selectedId);
+  };
+  es.addEventListener("reload", refresh);
+  es.addEventListener("resync", refresh);
+}
+
 async function init() {
   ensureMap();
   setMapLoading(true);
@@ -416,18 +569,15 @@ async function init() {
   bindForm();
   ensureCharts();
 
-  // Backend parcels
-  const list = await apiGet(API.parcels); // [{parcel_id,name}]
-  state.parcels = (list || []).map((x) => ({
-    id: x.parcel_id,
-    name: x.name || x.parcel_id,
-  }));
-
-  renderTable();
+  // Backend parcels (ilk sayfa)
+  await loadCatalog(true);
+  loadVisibleParcels();
 
   const first = state.parcels[0];
   if (first) await selectParcel(first.id);
 
+  subscribeEvents();
+
   setMapLoading(false);
 }
 
@@ -0,0 +1,39 @@
+import pytest
+
+import script_paths
+
+script_paths.use("backend")
+
+
+@pytest.fixture(autouse=True)
+def _backend_scripts():
+    # Tüm conftest'ler toplama anında yüklenir: testte geç import edilen modüller de backend/'den gelsin
+    script_paths.use("backend")
+
+# main'in modül seviyesindeki önbellekleri: her API testi repo verisinden temiz başlar
+_MAIN_CACHES = (
+    "_ml_df_cache", "_ml_df_stamp", "_ml_ingest_cursor", "_ml_ingest_marker",
+    "_df_cache", "_df_stamp", "_df_ingest_cursor", "_df_ingest_marker",
+    "_risk_state", "_risk_batch_seen", "_parcel_spatial", "_parcel_meta_src",
+    "_catalog", "_catalog_src", "_risk_pyramid", "_risk_pyramid_key",
+    "_parcel_weather", "_parcel_weather_key",
+)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """
+    backend/data ile main.app. Ingest log'u geçici dizinde; startup hook'ları
+    çalışmaz (inference havuzu, shadow, SSE izleyicisi yok: model process içinde).
+    """
+    from fastapi.testclient import TestClient
+
+    import ingest
+    import main
+
+    monkeypatch.setattr(main, "_ingest_log", ingest.IngestLog(tmp_path / "ingest"))
+    monkeypatch.setattr(main, "_ml_latest_dates", {})
+    for name in _MAIN_CACHES:
+        monkeypatch.setattr(main, name, None)
+    main._predict_cache.clear()
+    return TestClient(main.app)
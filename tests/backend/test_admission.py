@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import pytest
+
+from admission import AdmissionMiddleware, RouteLimiter, default_limiters
+
+
+def _scope(path):
+    return {"type": "http", "path": path, "method": "POST", "headers": []}
+
+
+async def _call(app, path):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    await app(_scope(path), receive, send)
+    return sent
+
+
+class _SlowApp:
+    """release set edilene kadar cevap vermeyen uygulama (slotu tutar)."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+def test_limiter_rejects_invalid_concurrency():
+    with pytest.raises(ValueError, match="max_concurrency"):
+        RouteLimiter("predict", max_concurrency=0, max_queue=1, queue_timeout_s=0.1)
+
+
+def test_limiter_env_override(monkeypatch):
+    monkeypatch.setenv("AQUAGUARD_PREDICT_MAX_CONCURRENCY", "3")
+    monkeypatch.setenv("AQUAGUARD_PREDICT_QUEUE_TIMEOUT_S", "0.05")
+    lim = RouteLimiter.from_env("predict", max_concurrency=8, max_queue=4, queue_timeout_s=1.0)
+    assert (lim.max_concurrency, lim.max_queue, lim.queue_timeout_s) == (3, 4, 0.05)
+
+
+def test_default_limiters_cover_batch_and_short_queue():
+    limiters = default_limiters()
+    mw = AdmissionMiddleware(None, limiters)
+    assert mw.match("/predict") is limiters["/predict"]
+    assert mw.match("/predict/batch") is limiters["/predict/batch"]
+    assert mw.match("/predict/other") is limiters["/predict"]
+    assert mw.match("/timeseries/P1") is limiters["/timeseries"]
+    assert mw.match("/predictions") is None  # segment öneki, düz string öneki değil
+    assert mw.match("/health") is None
+    assert all(lim.queue_timeout_s <= 0.5 for lim in limiters.values())
+
+
+def test_full_queue_sheds_with_503():
+    async def run():
+        app = _SlowApp()
+        lim = RouteLimiter("predict", max_concurrency=1, max_queue=0, queue_timeout_s=5.0)
+        mw = AdmissionMiddleware(app, {"/predict": lim})
+
+        first = asyncio.create_task(_call(mw, "/predict"))
+        await asyncio.sleep(0)
+        shed = await _call(mw, "/predict/batch")  # aynı limitere sayılır
+        unlimited = asyncio.create_task(_call(mw, "/health"))
+        await asyncio.sleep(0)
+        app.release.set()
+        await first
+        await unlimited
+        return app, lim, shed
+
+    app, lim, shed = asyncio.run(run())
+    start, body = shed
+    assert start["status"] == 503
+    assert dict(start["headers"])[b"retry-after"] == b"5"
+    assert json.loads(body["body"]) == {"error": "overloaded", "route": "predict"}
+    assert app.calls == 2  # reddedilen istek uygulamaya ulaşmadı
+    assert lim.stats()["shed_queue_full"] == 1 and lim.stats()["in_flight"] == 0
+
+
+def test_queue_wait_times_out():
+    async def run():
+        app = _SlowApp()
+        lim = RouteLimiter("predict", max_concurrency=1, max_queue=4, queue_timeout_s=0.01)
+        mw = AdmissionMiddleware(app, {"/predict": lim})
+        first = asyncio.create_task(_call(mw, "/predict"))
+        await asyncio.sleep(0)
+        shed = await _call(mw, "/predict")
+        app.release.set()
+        await first
+        return lim, shed
+
+    lim, shed = asyncio.run(run())
+    assert shed[0]["status"] == 503
+    assert dict(shed[0]["headers"])[b"retry-after"] == b"1"
+    stats = lim.stats()
+    assert (stats["shed_timeout"], stats["waiting"], stats["admitted"]) == (1, 0, 1)
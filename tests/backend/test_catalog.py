@@ -0,0 +1,33 @@
+from catalog import ParcelCatalog
+
+
+def _ids(cat, pos):
+    return [str(p) for p in cat.ids[pos]]
+
+
+def test_pages_follow_cursor_case_insensitively():
+    cat = ParcelCatalog(["b2", "A1", "a2", "B1", "c1"], names={"A1": "Tarla"})
+    pos, cursor, total = cat.page(limit=2)
+    assert _ids(cat, pos) == ["A1", "a2"] and total == 5
+    pos, cursor, _ = cat.page(cursor=cursor, limit=2)
+    assert _ids(cat, pos) == ["B1", "b2"]
+    pos, cursor, _ = cat.page(cursor=cursor, limit=2)
+    assert _ids(cat, pos) == ["c1"] and cursor is None
+    assert cat.all()[0] == {"parcel_id": "A1", "name": "Tarla"}
+
+
+def test_prefix_search_and_unknown_cursor():
+    cat = ParcelCatalog(["KONYA_1", "konya_2", "IZMIR_1"])
+    pos, cursor, total = cat.page("Kon", limit=10)
+    assert _ids(cat, pos) == ["KONYA_1", "konya_2"] and total == 2 and cursor is None
+    # Silinmiş parselin id'si cursor olarak gelse de sıralı konumdan devam edilir
+    pos, _, _ = cat.page(cursor="KONYA_15", limit=10)
+    assert _ids(cat, pos) == ["konya_2"]
+    pos, cursor, total = cat.page("x", limit=10)
+    assert len(pos) == 0 and cursor is None and total == 0
+
+
+def test_zero_limit_returns_no_cursor():
+    cat = ParcelCatalog(["a", "b"])
+    pos, cursor, _ = cat.page(limit=0)
+    assert len(pos) == 0 and cursor is None
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from aquaguard import drift as sketch
+from drift import DriftMonitor
+
+
+@pytest.fixture
+def reference():
+    rng = np.random.default_rng(0)
+    return sketch.build_reference({"ndvi": rng.normal(0.5, 0.1, 5000), "risk_7d": rng.uniform(0, 100, 5000)},
+                                  rows=5000)
+
+
+def test_reference_bins_and_format(reference, tmp_path):
+    assert len(reference["columns"]["ndvi"]["edges"]) == sketch.BINS - 1
+    assert sum(reference["columns"]["ndvi"]["counts"]) == 5000
+    path = sketch.save_reference(reference, tmp_path / "m.drift.json")
+    assert sketch.load_reference(path)["rows"] == 5000
+
+    (tmp_path / "other.json").write_text('{"format": "something-else"}')
+    with pytest.raises(ValueError, match="drift referansı değil"):
+        sketch.load_reference(tmp_path / "other.json")
+    assert sketch.reference_path("model_7d.manifest.json").name == "model_7d.drift.json"
+
+
+def test_merge_reference_adds_counts_on_same_edges(reference):
+    new = {"ndvi": np.array([0.1, 0.5, 0.9, np.nan]), "risk_7d": np.array([10.0, 20.0, 30.0, 40.0])}
+    merged = sketch.merge_reference(reference, new, rows=4, mode="incremental")
+    ndvi = merged["columns"]["ndvi"]
+    assert ndvi["edges"] == reference["columns"]["ndvi"]["edges"]
+    expected = np.add(reference["columns"]["ndvi"]["counts"], sketch.bin_counts(new["ndvi"], np.asarray(ndvi["edges"])))
+    assert ndvi["counts"] == expected.tolist()
+    assert ndvi["counts"][-1] == 1  # NaN sayacı
+    assert (merged["rows"], merged["mode"]) == (5004, "incremental")
+
+
+def test_monitor_flags_shift_and_needs_min_rows(reference):
+    rng = np.random.default_rng(1)
+    monitor = DriftMonitor(reference, window_rows=1000, windows=3)
+    monitor.observe(rng.normal(0.5, 0.1, (10, 1)), ["ndvi"])
+    assert monitor.report()["columns"]["ndvi"]["status"] == "insufficient_data"
+
+    monitor.observe(rng.normal(0.5, 0.1, (2000, 1)), ["ndvi"], risk_7d=rng.uniform(0, 100, 2000))
+    assert monitor.report()["status"] == "ok"
+
+    shifted = DriftMonitor(reference, window_rows=1000, windows=3)
+    shifted.observe(rng.normal(0.2, 0.1, (2000, 1)), ["ndvi"])
+    rep = shifted.report()
+    assert rep["columns"]["ndvi"]["status"] == "drift" and rep["status"] == "drift"
+    assert rep["columns"]["ndvi"]["median"]["live"] < rep["columns"]["ndvi"]["median"]["reference"]
+
+
+def test_monitor_memory_is_bounded_by_windows(reference):
+    monitor = DriftMonitor(reference, window_rows=100, windows=2)
+    for _ in range(10):
+        monitor.observe(np.full((100, 2), 0.5), ["ndvi", "unknown"])  # referansta olmayan kolon yok sayılır
+    rep = monitor.report()
+    assert rep["rows_seen"] == 1000
+    assert rep["rows_in_windows"] == 200 and rep["columns"]["ndvi"]["rows"] == 200
+    assert monitor.stats()["rotations"] == 9
+    monitor.observe(np.empty((0, 1)), ["ndvi"])  # boş batch sayılmaz
+    assert monitor.report()["rows_seen"] == 1000
+
+
+def test_batch_counts_each_table_row_once(client, monkeypatch, reference):
+    import main
+
+    monitor = DriftMonitor(reference)
+    monkeypatch.setattr(main, "load_drift", lambda: monitor)
+    n = len(client.post("/predict/batch", json={}).json())
+    assert monitor.rows == n > 0
+    client.post("/predict/batch", json={})
+    assert monitor.rows == n  # aynı veri/model sürümünde tekrar sayılmaz
+    client.post("/predict", json={"parcel_id": "Parsel_A"})
+    assert monitor.rows == n + 1
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+
+import events
+
+
+def _decode(payload: bytes):
+    event, data = payload.decode("utf-8").strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_risk_diff_changes_additions_and_removals():
+    old = pd.Series([10.0, 50.0, np.nan, 70.0, 1.0], index=["A", "B", "C", "D", "X"])
+    new = pd.Series([10.04, 55.0, 20.0, np.nan, 5.0], index=["A", "B", "C", "D", "E"])
+    changed, removed = events.risk_diff(old, new)
+    assert changed == {"B": 55.0, "C": 20.0, "D": None, "E": 5.0}  # A eşik altında
+    assert removed == ["X"]
+
+    first, removed = events.risk_diff(None, new)
+    assert set(first) == set(new.index) and removed == []
+
+
+def test_slow_client_gets_single_resync():
+    async def run():
+        hub = events.Broadcaster(client_queue_size=2)
+        fast, slow = hub.subscribe(), hub.subscribe()
+        for i in range(3):
+            hub.publish(events.encode("risk", {"i": i}))
+            if i < 2:
+                await fast.get()
+        return hub, fast, slow
+
+    hub, fast, slow = asyncio.run(run())
+    assert _decode(fast.get_nowait()) == ("risk", {"i": 2})
+    assert slow.qsize() == 1 and _decode(slow.get_nowait())[0] == "resync"
+    assert hub.stats()["resyncs"] == 1 and hub.stats()["published"] == 3
+
+
+def test_notify_wakes_waiter_from_another_thread():
+    async def run():
+        hub = events.Broadcaster()
+        hub.bind(asyncio.get_running_loop())
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(None, hub.notify)
+        start = loop.time()
+        await hub.wait(5.0)
+        return loop.time() - start
+
+    assert asyncio.run(run()) < 1.0
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import explain
+from aquaguard.explain import top_factors
+
+
+def test_top_factors_orders_by_absolute_contribution():
+    contrib = np.array([[0.1, -0.5, 0.3], [0.2, 0.2, -0.1]])
+    assert top_factors(contrib, ["a", "b", "c"], k=2) == [["b", "c"], ["a", "b"]]  # eşitlikte kolon sırası
+    assert top_factors(contrib, ["a", "b", "c"], k=10) == [["b", "c", "a"], ["a", "b", "c"]]
+    assert top_factors(np.empty((0, 3)), ["a", "b", "c"]) == []
+
+
+def test_contributions_sum_to_prediction():
+    import main
+
+    model = main.load_model()
+    X = main.load_risk_state()[2][:4]
+    contrib, bias = explain.contributions(model, X, main.FEATURES)
+    assert contrib.shape == (len(X), len(main.FEATURES))
+    np.testing.assert_allclose(contrib.sum(axis=1) + bias, main.predict_ndvi(X), rtol=0, atol=1e-5)
+    assert explain.contributions(object(), X, main.FEATURES) is None
+
+
+def test_risk_contributions_flip_sign():
+    np.testing.assert_allclose(explain.risk_contributions(np.array([[0.01, -0.02]])), [[-1.0, 2.0]])
+
+
+def test_batch_returns_contributions_for_requested_parcels(client):
+    import main
+
+    res = client.post("/predict/batch", json={"parcel_ids": ["Parsel_B", "NO_SUCH_PARCEL"]})
+    assert res.status_code == 200
+    (item,) = res.json()
+    assert item["parcel_id"] == "Parsel_B"
+    assert list(item["contributions"]) == main.FEATURES
+    top = max(item["contributions"], key=lambda f: abs(item["contributions"][f]))
+    assert item["top_factors"][0] == top
+
+    single = client.post("/predict", json={"parcel_id": "Parsel_B"}).json()
+    assert single["contributions"] == item["contributions"]
+
+
+@pytest.mark.parametrize("parcel_ids", ["Parsel_A", ["Parsel_A", 3], {"id": "Parsel_A"}])
+def test_batch_rejects_invalid_parcel_ids(client, parcel_ids):
+    res = client.post("/predict/batch", json={"parcel_ids": parcel_ids})
+    assert res.status_code == 400
+    assert "parcel_ids" in res.json()["error"]
@@ -0,0 +1,149 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest
+
+
+def _row(parcel_id="P1", date="2025-06-01", **kw):
+    row = {
+        "date": date, "parcel_id": parcel_id, "ndvi": 0.5,
+        "precipitation_sum": 1.0, "temperature_2m_max": 30.0, "et0_fao_evapotranspiration": 5.0,
+    }
+    row.update(kw)
+    return row
+
+
+def test_validate_rows_requires_all_raw_columns_without_grid():
+    row = _row()
+    del row["et0_fao_evapotranspiration"]
+    with pytest.raises(ValueError, match="Eksik kolon"):
+        ingest.validate_rows([row])
+
+
+def test_validate_rows_rejects_non_list_payload():
+    with pytest.raises(ValueError, match="nesne listesi"):
+        ingest.validate_rows({"parcel_id": "P1"})
+    with pytest.raises(ValueError, match="nesne listesi"):
+        ingest.validate_rows(["P1"])
+
+
+def test_validate_rows_rejects_bad_values():
+    with pytest.raises(ValueError, match="Geçersiz date"):
+        ingest.validate_rows([_row(date="not-a-date")])
+    with pytest.raises(ValueError, match="ndvi sayısal olmalı"):
+        ingest.validate_rows([_row(ndvi="high")])
+    with pytest.raises(ValueError, match="parcel_id boş olamaz"):
+        ingest.validate_rows([_row(parcel_id=None)])
+
+
+def test_validate_rows_rejects_duplicates_within_batch():
+    with pytest.raises(ValueError, match="birden fazla"):
+        ingest.validate_rows([_row(ndvi=0.4), _row(ndvi=0.6)])
+
+
+def test_validate_rows_rejects_nan_meteo_without_grid():
+    with pytest.raises(ValueError, match="doldurulamadı"):
+        ingest.validate_rows([_row(precipitation_sum=None)])
+
+
+def test_ingest_log_reads_only_new_rows(tmp_path):
+    log = ingest.IngestLog(tmp_path)
+    assert log.append(ingest.validate_rows([_row("P1"), _row("P2")])) == 2
+    rows, cursor = log.read_since()
+    assert rows["parcel_id"].tolist() == ["P1", "P2"]
+
+    # Sıkıştırma satır sırasını korur: cursor geçerli kalır
+    log.append(ingest.validate_rows([_row("P1", "2025-06-02")]))
+    assert log.compact() == 1
+    assert sorted(p.name for p in tmp_path.glob("part-*.parquet")) == ["part-0.parquet"]
+    rows, cursor = log.read_since(cursor)
+    assert rows["date"].tolist() == [pd.Timestamp("2025-06-02")]
+    rows, _ = log.read_since(cursor)
+    assert rows.empty
+
+
+def test_ingest_log_skips_partial_last_line(tmp_path):
+    log = ingest.IngestLog(tmp_path)
+    log.append(ingest.validate_rows([_row("P1")]))
+    with open(tmp_path / "log-0.jsonl", "a") as f:
+        f.write(json.dumps(_row("P2"))[:20])  # yazılmakta olan satır
+    rows, cursor = log.read_since()
+    assert rows["parcel_id"].tolist() == ["P1"]
+    assert cursor[1] == 1
+
+
+def test_build_ml_features_lags_by_calendar_day():
+    days = pd.to_datetime(["2025-06-01", "2025-06-02", "2025-06-04", "2025-06-09", "2025-06-11"])
+    df = pd.DataFrame({
+        "date": days, "parcel_id": "P1", "ndvi": [0.1, 0.2, 0.4, 0.9, 1.1],
+        "precipitation_sum": 1.0, "temperature_2m_max": 30.0, "et0_fao_evapotranspiration": 5.0,
+    })
+    feat = ingest.build_ml_features(df).set_index("date")
+
+    assert list(feat.index) == list(days)  # sadece gözlenen günler döner
+    assert feat.loc["2025-06-09", "ndvi_lag_7"] == 0.2  # 7 gün önce, 7 satır önce değil
+    assert np.isnan(feat.loc["2025-06-04", "ndvi_lag_1"])  # 3 Haziran gözlenmedi
+    assert feat.loc["2025-06-02", "target_ndvi_7d"] == 0.9
+    assert np.isnan(feat.loc["2025-06-09", "rain_sum_7d"])  # pencerede boş gün var
+
+
+def test_build_ml_features_empty():
+    out = ingest.build_ml_features(pd.DataFrame(columns=ingest.RAW_COLUMNS))
+    assert out.empty and set(ingest.ML_FEATURE_COLUMNS) <= set(out.columns)
+
+
+def _daily_rows(parcel_id, start, n, ndvi0=0.0):
+    dates = pd.date_range(start, periods=n)
+    return pd.DataFrame({
+        "date": dates, "parcel_id": parcel_id, "ndvi": ndvi0 + np.arange(n) / 100.0,
+        "precipitation_sum": np.arange(n, dtype=float), "temperature_2m_max": 30.0,
+        "et0_fao_evapotranspiration": 5.0,
+    })
+
+
+def test_merge_ml_matches_full_recompute():
+    history = pd.concat([_daily_rows("P1", "2025-05-01", 30), _daily_rows("P2", "2025-05-01", 30, 0.5)])
+    store = ingest.build_ml_features(history)
+    batch = ingest.validate_rows(_daily_rows("P1", "2025-05-31", 3, 0.9))
+
+    merged = ingest.merge_ml(store, batch)
+    expected = ingest.build_ml_features(pd.concat([history, batch[ingest.RAW_COLUMNS]]))
+    pd.testing.assert_frame_equal(
+        merged.reset_index(drop=True), expected[store.columns].reset_index(drop=True), check_dtype=False,
+    )
+
+
+def test_merge_ml_keeps_stored_target_without_future():
+    history = _daily_rows("P1", "2025-05-01", 30)
+    store = ingest.build_ml_features(history)
+    store["target_ndvi_7d"] = 0.42  # saklı hedef (geçmiş dışı bir kaynaktan)
+    batch = ingest.validate_rows(_daily_rows("P1", "2025-05-31", 1, 0.9))
+
+    merged = ingest.merge_ml(store, batch).set_index("date")
+    # 7 gün sonrası geldi: yeniden hesaplanır; gelmedi: saklı hedef korunur
+    assert merged.loc["2025-05-24", "target_ndvi_7d"] == pytest.approx(0.9)
+    assert merged.loc["2025-05-28", "target_ndvi_7d"] == 0.42
+    assert np.isnan(merged.loc["2025-05-31", "target_ndvi_7d"])
+
+
+@pytest.mark.parametrize("rows, message", [
+    ([{"date": "2025-06-01", "parcel_id": "Parsel_A", "ndvi": 0.4}], "Eksik kolon"),
+    ("Parsel_A", "nesne listesi"),
+    ([_row("Parsel_A"), _row("Parsel_A")], "birden fazla"),
+])
+def test_ingest_endpoint_rejects_invalid_rows(client, tmp_path, rows, message):
+    res = client.post("/ingest", json={"rows": rows})
+    assert res.status_code == 400
+    assert message in res.json()["error"]
+    assert not (tmp_path / "ingest").exists()  # log'a hiçbir şey yazılmadı
+
+
+def test_ingest_endpoint_updates_timeseries(client):
+    res = client.post("/ingest", json={"rows": [_row("NEW_PARCEL", "2025-06-01"), _row("NEW_PARCEL", "2025-06-02")]})
+    assert res.status_code == 200
+    assert res.json()["ingested"] == 2 and res.json()["parcels"] == ["NEW_PARCEL"]
+    series = client.get("/timeseries", params={"parcel_id": "NEW_PARCEL"}).json()
+    assert [p["date"] for p in series["ndvi"]] == ["2025-06-01", "2025-06-02"]
@@ -0,0 +1,53 @@
+import json
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+
+import model_artifact
+from main import FEATURES, MODEL_PATH
+from model_artifact import ArtifactError
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    pkl = tmp_path / "aquaguard_model.pkl"
+    shutil.copy(MODEL_PATH, pkl)
+    manifest = model_artifact.save(joblib.load(pkl), pkl, FEATURES, 7, {"rmse": 0.1}, "abc")
+    return pkl, manifest
+
+
+def test_native_artifact_predicts_like_pickle(artifact):
+    pkl, manifest = artifact
+    X = np.random.default_rng(0).uniform(0.0, 1.0, (20, len(FEATURES)))
+    native = model_artifact.load_model_file(manifest, FEATURES)
+    np.testing.assert_allclose(native.predict(X), joblib.load(pkl).predict(X), rtol=1e-6)
+
+    meta = model_artifact.read_manifest(manifest)
+    assert (meta["horizon_days"], meta["training_data_fingerprint"], meta["model_file"]) == (7, "abc", "aquaguard_model.ubj")
+    assert model_artifact.fingerprint(manifest) == model_artifact.sha256_file(pkl.with_suffix(".ubj"))
+
+
+def test_feature_order_mismatch_is_rejected(artifact):
+    pkl, manifest = artifact
+    with pytest.raises(ArtifactError, match="Feature sırası"):
+        model_artifact.load_model_file(manifest, FEATURES[::-1])
+    with pytest.raises(ArtifactError, match="Feature sırası"):
+        model_artifact.load_model_file(pkl, FEATURES[::-1])
+
+
+def test_tampered_model_file_is_rejected(artifact):
+    pkl, manifest = artifact
+    with open(pkl.with_suffix(".ubj"), "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ArtifactError, match="Checksum"):
+        model_artifact.load_model_file(manifest, FEATURES)
+
+
+def test_foreign_manifest_is_rejected(artifact):
+    _, manifest = artifact
+    meta = json.loads(manifest.read_text())
+    manifest.write_text(json.dumps({**meta, "framework": "lightgbm"}))
+    with pytest.raises(ArtifactError, match="Desteklenmeyen artifact"):
+        model_artifact.load_model_file(manifest, FEATURES)
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+import explain
+import model_artifact
+from main import FEATURES, MODEL_PATH
+from model_server import ModelServer
+
+
+def _shm_segments() -> set:
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = ModelServer(MODEL_PATH, n_workers=1, max_wait_ms=1.0, chunk_rows=64, feature_names=FEATURES)
+    yield srv
+    srv.shutdown()
+
+
+@pytest.fixture(scope="module")
+def X():
+    rng = np.random.default_rng(0)
+    return rng.uniform(0.0, 1.0, (150, len(FEATURES))) * [35, 10, 6, 1, 1, 10, 40, 35, 40]
+
+
+def test_from_env_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("AQUAGUARD_INFERENCE_WORKERS", raising=False)
+    assert ModelServer.from_env(MODEL_PATH, FEATURES) is None
+
+
+def test_pool_matches_in_process_model(server, X):
+    model = model_artifact.load_model_file(MODEL_PATH, FEATURES)
+    expected = np.asarray(model.predict(X), dtype=float)
+    np.testing.assert_allclose(server.predict(X[:3]), expected[:3], rtol=1e-6)
+    np.testing.assert_allclose(server.predict(X), expected, rtol=1e-6)  # chunk_rows üstü: paralel parçalar
+    np.testing.assert_allclose(server.predict_file(MODEL_PATH, X[:5]), expected[:5], rtol=1e-6)
+
+    contrib, bias = server.contributions(X)
+    own = explain.contributions(model, X, FEATURES)
+    np.testing.assert_allclose(contrib, own[0], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(bias, own[1], rtol=1e-5, atol=1e-6)
+
+
+def test_failed_submit_releases_shared_memory(server, X, tmp_path):
+    before = _shm_segments()
+    with pytest.raises(FileNotFoundError):
+        server.predict_file(tmp_path / "missing.pkl", X[:2])
+    assert _shm_segments() == before
+
+
+def test_model_path_is_resolved_per_submit(tmp_path, X):
+    current = [tmp_path / "missing.pkl"]
+    srv = ModelServer(lambda: current[0], n_workers=1, feature_names=FEATURES)
+    try:
+        with pytest.raises(FileNotFoundError):
+            srv.predict(X[:1])
+        current[0] = MODEL_PATH  # manifest / yeni model yazıldı: havuz yeniden başlamadan geçer
+        assert srv.predict(X[:1]).shape == (1,)
+    finally:
+        srv.shutdown()
+    with pytest.raises(RuntimeError, match="kapandı"):
+        srv.predict(X[:1])
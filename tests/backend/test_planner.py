@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+import planner
+
+
+def test_demand_bands_match_recommend_thresholds():
+    mm, window = planner.demand_mm([0, 39.9, 40, 59.9, 60, 100])
+    assert mm.tolist() == [0, 0, 10, 10, 18, 18]
+    assert window.tolist() == ["izlemede kal"] * 2 + ["5–7 gün içinde"] * 2 + ["3 gün içinde"] * 2
+
+
+def test_allocate_serves_highest_risk_first():
+    order, alloc = planner.allocate([10, 90, 50], [5.0, 5.0, 5.0], total=7.0)
+    assert order.tolist() == [1, 2, 0]
+    assert alloc.tolist() == [5.0, 2.0, 0.0]
+
+
+def test_plan_budget_and_partial_service():
+    result = planner.plan(np.array(["A", "B", "C", "D"]), np.array([70.0, 50.0, 95.0, 10.0]),
+                          np.array([1.0, 2.0, 1.0, 5.0]), total_m3=300.0)
+    # A ve C 18 mm * 1 ha = 180 m³, B 10 mm * 2 ha = 200 m³, D ihtiyaçsız
+    assert [s["parcel_id"] for s in result["schedule"]] == ["C", "A", "B"]
+    assert [s["allocated_m3"] for s in result["schedule"]] == [180.0, 120.0, 0.0]
+    assert result["requested_m3"] == 560.0
+    assert result["unallocated_m3"] == 0.0
+    assert (result["parcels_fully_served"], result["parcels_partially_served"]) == (1, 1)
+    assert result["schedule"][1]["amount_mm"] == pytest.approx(12.0)
+
+
+def test_plan_zero_area_does_not_divide_by_zero():
+    result = planner.plan(np.array(["A"]), np.array([80.0]), np.array([0.0]), total_m3=100.0)
+    assert result["parcels_needing_water"] == 0
+    assert result["unallocated_m3"] == 100.0
+
+
+@pytest.mark.parametrize("risk, window, amount", [(20, "izlemede kal", 0), (75.5, "3 gün içinde", 18)])
+def test_recommend_uses_planner_bands(client, risk, window, amount):
+    res = client.post("/recommend", json={"parcel_id": "P1", "risk_7d": risk})
+    assert res.status_code == 200
+    assert (res.json()["window"], res.json()["amount_mm"]) == (window, amount)
+
+
+@pytest.mark.parametrize("risk", ["abc", "NaN", "Infinity", None, [50]])
+def test_recommend_rejects_non_finite_risk(client, risk):
+    res = client.post("/recommend", json={"parcel_id": "P1", "risk_7d": risk})
+    assert res.status_code == 400
+
+
+@pytest.mark.parametrize("payload", [
+    {},
+    {"total_volume_m3": "lots"},
+    {"total_volume_m3": 100, "areas_ha": [1.0, 2.0]},
+    {"total_volume_m3": "Infinity"},
+    {"total_volume_m3": 100, "areas_ha": {"Parsel_A": "NaN"}},
+    {"total_volume_m3": -5},
+    {"total_volume_m3": 100, "default_area_ha": -1},
+    {"total_volume_m3": 100, "parcel_ids": "Parsel_A"},
+    {"total_volume_m3": 100, "parcel_ids": ["Parsel_A", 3]},
+])
+def test_plan_rejects_invalid_payload(client, payload):
+    res = client.post("/plan", json=payload)
+    assert res.status_code == 400
+    assert "error" in res.json()
+
+
+def test_plan_limits_to_parcel_ids(client):
+    res = client.post("/plan", json={"total_volume_m3": 1e6, "default_area_ha": 2.0, "parcel_ids": ["Parsel_B"]})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["parcels"] == 1
+    assert {s["parcel_id"] for s in body["schedule"]} <= {"Parsel_B"}
@@ -0,0 +1,57 @@
+import pandas as pd
+
+import result_cache
+from result_cache import ResultCache
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    cache = ResultCache(maxsize=2, ttl_s=10.0)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a en son kullanılan
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("c") == 3
+
+    now[0] += 11.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 2, 1, 1)
+
+
+def test_predict_requires_parcel_id(client):
+    assert client.post("/predict", json={}).json() == {"error": "parcel_id required"}
+
+
+def test_predict_is_cached_per_data_and_model(client):
+    import main
+
+    first = client.post("/predict", json={"parcel_id": "Parsel_A"}).json()
+    hits = main._predict_cache.stats()["hits"]
+    second = client.post("/predict", json={"parcel_id": "Parsel_A"}).json()
+    assert second == first
+    assert main._predict_cache.stats()["hits"] == hits + 1
+    assert "model_fallback" not in first["top_factors"]
+
+
+def test_unknown_parcel_falls_back(client):
+    res = client.post("/predict", json={"parcel_id": "NO_SUCH_PARCEL"}).json()
+    assert res["top_factors"] == ["no_ml_data_for_parcel"]
+
+
+def test_ingest_invalidates_cached_prediction(client):
+    import main
+
+    client.post("/predict", json={"parcel_id": "Parsel_A"})
+    latest = main._ml_latest_dates["Parsel_A"]
+    day = pd.Timestamp(latest) + pd.Timedelta(days=1)
+    res = client.post("/ingest", json={"rows": [{
+        "date": day.strftime("%Y-%m-%d"), "parcel_id": "Parsel_A", "ndvi": 0.3,
+        "precipitation_sum": 0.0, "temperature_2m_max": 35.0, "et0_fao_evapotranspiration": 6.0,
+    }]})
+    assert res.status_code == 200 and res.json()["ingested"] == 1
+
+    client.post("/predict", json={"parcel_id": "Parsel_A"})
+    assert main._ml_latest_dates["Parsel_A"] == day.strftime("%Y-%m-%d")
+    assert main._predict_cache.stats()["size"] == 1  # eski anahtar temizlendi
@@ -0,0 +1,72 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+import model_artifact
+from main import FEATURES, MODEL_PATH
+from shadow import ShadowScorer
+
+
+def _wait(scorer, key, n, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while scorer.stats()[key] < n and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return scorer.stats()[key]
+
+
+@pytest.fixture
+def X():
+    rng = np.random.default_rng(0)
+    return rng.uniform(0.0, 1.0, (4, len(FEATURES))) * [35, 10, 6, 1, 1, 10, 40, 35, 40]
+
+
+def test_from_env_disabled_without_model(monkeypatch, tmp_path):
+    monkeypatch.delenv("AQUAGUARD_SHADOW_MODEL", raising=False)
+    assert ShadowScorer.from_env(FEATURES, tmp_path / "p.jsonl") is None
+
+
+def test_same_model_logs_zero_diff(tmp_path, X):
+    live = np.asarray(model_artifact.load_model_file(MODEL_PATH, FEATURES).predict(X), dtype=float)
+    scorer = ShadowScorer(MODEL_PATH, FEATURES, tmp_path / "shadow.jsonl")
+    try:
+        for i, (x, p) in enumerate(zip(X, live)):
+            assert scorer.submit(f"P{i}", x, float(p), "live")
+        assert _wait(scorer, "scored", len(X)) == len(X)
+    finally:
+        scorer.shutdown()
+
+    rows = [json.loads(line) for line in (tmp_path / "shadow.jsonl").read_text().splitlines()]
+    assert [r["parcel_id"] for r in rows] == ["P0", "P1", "P2", "P3"]
+    assert all(abs(r["diff"]) < 1e-5 for r in rows)
+    assert scorer.stats()["model_fingerprint"] == model_artifact.fingerprint(MODEL_PATH)[:12]
+
+
+def test_broken_candidate_is_counted_not_raised(tmp_path, X):
+    scorer = ShadowScorer(tmp_path / "missing.pkl", FEATURES, tmp_path / "shadow.jsonl")
+    try:
+        scorer.submit("P1", X[0], 0.5)
+        assert _wait(scorer, "errors", 1) == 1
+    finally:
+        scorer.shutdown()
+    assert not (tmp_path / "shadow.jsonl").exists()
+
+
+def test_full_queue_drops_without_blocking(tmp_path, X):
+    scorer = ShadowScorer(MODEL_PATH, FEATURES, tmp_path / "shadow.jsonl", max_queue=1)
+    scorer.shutdown()  # worker durdu: kuyruk boşalmaz
+    assert scorer.submit("P1", X[0], 0.5) is True
+    assert scorer.submit("P2", X[1], 0.5) is False
+    assert (scorer.stats()["enqueued"], scorer.stats()["dropped"]) == (1, 1)
+
+
+def test_log_rotation_keeps_bounded_backups(tmp_path, X):
+    log = tmp_path / "shadow.jsonl"
+    scorer = ShadowScorer(MODEL_PATH, FEATURES, log, max_log_bytes=300, log_backups=2)
+    scorer.shutdown()
+    for i in range(6):
+        scorer._score([(0.0, f"P{i}", X[0], 0.5, "live")])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["shadow.jsonl", "shadow.jsonl.1", "shadow.jsonl.2"]
+    assert all(p.stat().st_size <= 300 for p in tmp_path.iterdir())
+    assert json.loads(log.read_text().splitlines()[-1])["parcel_id"] == "P5"
@@ -0,0 +1,89 @@
+import fcntl
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import shared_data
+
+
+@pytest.fixture
+def shared_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_data, "SHARED_DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _frame():
+    return pd.DataFrame({
+        "parcel_id": ["B", "A", "B"],
+        "date": pd.to_datetime(["2025-06-01", "2025-06-02", "2025-06-03"]).astype("datetime64[ns]"),
+        "ndvi": [0.1, np.nan, 0.3],
+        "weather_cell": np.array([-1, 4, 4], dtype=np.int64),
+    })
+
+
+def _is_mapped(arr) -> bool:
+    while arr is not None:
+        if isinstance(arr, np.memmap):
+            return True
+        arr = getattr(arr, "base", None)
+    return False
+
+
+def test_round_trip_is_memmap_backed(shared_dir):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return _frame(), {"cursor": [0, 3, 120]}
+
+    df, extra = shared_data.load_shared_state("ts", (1, 2, 0, 120), build)
+    again, extra2 = shared_data.load_shared_state("ts", (1, 2, 0, 120), build)
+    assert len(calls) == 1  # ikinci worker yayınlananı map eder
+    assert extra == extra2 == {"cursor": [0, 3, 120]}
+
+    expected = _frame()
+    assert again["parcel_id"].astype(str).tolist() == expected["parcel_id"].tolist()
+    assert again["date"].dtype == "datetime64[ns]"
+    for col in ("date", "ndvi", "weather_cell"):
+        np.testing.assert_array_equal(np.asarray(again[col]), expected[col].to_numpy())
+    # Kolonlar worker başına kopya değil, yayınlanan dosyanın map'i
+    assert _is_mapped(again["weather_cell"].to_numpy())
+
+
+def test_new_stamp_republishes_and_prunes(shared_dir):
+    shared_data.load_shared_state("ts", (1, 2, 0, 0), lambda: (_frame(), {}))
+    df, _ = shared_data.load_shared_state("ts", (1, 2, 0, 64), lambda: (_frame().iloc[:2], {"cursor": [0, 2, 64]}))
+    assert len(df) == 2
+    assert sorted(p.name for p in (shared_dir / "ts").iterdir() if p.is_dir()) == ["1-2-0-64"]
+
+
+def test_stuck_writer_falls_back_to_local_build(shared_dir, monkeypatch):
+    monkeypatch.setattr(shared_data, "_WAIT_TIMEOUT_S", 0.0)
+    (shared_dir / "ts").mkdir()
+    with open(shared_dir / "ts" / "1-2.lock", "a+") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)  # başka bir yazıcı kilidi tutuyor
+        df, extra = shared_data.load_shared_state("ts", (1, 2), lambda: (_frame(), {"local": True}))
+    assert extra == {"local": True} and len(df) == 3
+    assert not (shared_dir / "ts" / "1-2").exists()
+
+
+def test_load_shared_without_state(shared_dir):
+    df = shared_data.load_shared("ml", (5, 6), _frame)
+    assert df["parcel_id"].astype(str).tolist() == ["B", "A", "B"]
+
+
+def test_ingest_republishes_shared_tables(client, shared_dir):
+    import main
+
+    before = main.load_ml_df()
+    res = client.post("/ingest", json={"rows": [{
+        "date": "2026-02-01", "parcel_id": "Parsel_A", "ndvi": 0.4, "precipitation_sum": 1.0,
+        "temperature_2m_max": 12.0, "et0_fao_evapotranspiration": 2.0,
+    }]})
+    assert res.status_code == 200
+    after = main.load_ml_df()
+    assert len(after) == len(before) + 1
+    # Ingest sonrası da özel kopya değil, yeni damgayla yayınlanan map
+    assert _is_mapped(after["ndvi"].to_numpy()) and _is_mapped(main.load_df()["ndvi"].to_numpy())
+    assert len([p for p in (shared_dir / "ml_ready_data").iterdir() if p.is_dir()]) == 1
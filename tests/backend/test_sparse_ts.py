@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sparse_ts
+from aquaguard.sparse_ts import write_sparse
+
+
+@pytest.fixture
+def dense():
+    import main
+
+    df = pd.read_csv(main.CSV_PATH)
+    df["date"] = pd.to_datetime(df["date"]).astype("datetime64[ns]")
+    return df.sort_values(["parcel_id", "date"]).reset_index(drop=True)
+
+
+@pytest.fixture
+def store(tmp_path, dense):
+    report = write_sparse(dense, tmp_path / "ts.sparse")
+    return tmp_path / "ts.sparse", report
+
+
+def test_round_trip_is_exact(store, dense):
+    path, report = store
+    assert report["latitude"]["mode"] == "ffill" and report["temperature_2m_max"]["mode"] == "dense"
+    out = sparse_ts.SparseTimeseries(path).read().sort_values(["parcel_id", "date"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(out, dense)
+    assert out["date"].dtype == "datetime64[ns]"
+
+
+def test_subset_and_batches_match_full_read(store, dense):
+    path, _ = store
+    ts = sparse_ts.SparseTimeseries(path)
+    some = dense["parcel_id"].unique()[:1]
+    sub = ts.read(some).sort_values(["parcel_id", "date"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(sub, dense[dense["parcel_id"].isin(some)].reset_index(drop=True))
+
+    batches = pd.concat(ts.iter_batches(97), ignore_index=True)
+    pd.testing.assert_frame_equal(batches, ts.read())
+
+
+def test_nan_column_falls_back_to_ffill(tmp_path):
+    days = pd.date_range("2025-01-01", periods=10).append(pd.date_range("2025-01-15", periods=10))
+    df = pd.DataFrame({
+        "date": days.astype("datetime64[ns]"),
+        "parcel_id": ["A"] * 10 + ["B"] * 10,
+        "ndvi": [0.1] * 4 + [np.nan] * 6 + [0.5] * 10,
+        "rain": np.arange(20, dtype=float),
+    })
+    report = write_sparse(df, tmp_path / "s.sparse")
+    assert report["ndvi"]["mode"] == "ffill"  # NaN varsa doğrusal doldurma denenmez
+    assert report["rain"]["mode"] == "linear"
+    pd.testing.assert_frame_equal(sparse_ts.SparseTimeseries(tmp_path / "s.sparse").read(), df)
+
+
+def test_rejects_duplicate_days_and_foreign_dirs(tmp_path):
+    df = pd.DataFrame({"date": pd.to_datetime(["2025-01-01"] * 2), "parcel_id": ["A", "A"], "ndvi": [0.1, 0.2]})
+    with pytest.raises(ValueError, match="birden fazla satır"):
+        write_sparse(df, tmp_path / "dup.sparse")
+
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "meta.json").write_text(json.dumps({"format": "x"}))
+    with pytest.raises(ValueError, match="seyrek zaman serisi deposu değil"):
+        sparse_ts.SparseTimeseries(tmp_path / "other")
+
+
+def test_service_reads_sparse_store_like_csv(store, dense, monkeypatch):
+    import main
+
+    path, _ = store
+    monkeypatch.setattr(main, "SPARSE_TS_PATH", path)
+    from_sparse = main._read_df()
+    monkeypatch.setattr(main, "SPARSE_TS_PATH", path.with_name("missing.sparse"))
+    pd.testing.assert_frame_equal(from_sparse, main._read_df())
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import spatial
+from spatial import GridIndex, haversine_km
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    return rng.uniform(38.0, 39.0, 500), rng.uniform(32.0, 33.0, 500)
+
+
+def _brute_bbox(lats, lons, box):
+    min_lat, min_lon, max_lat, max_lon = box
+    return np.flatnonzero((lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon))
+
+
+@pytest.mark.parametrize("box", [(38.2, 32.2, 38.45, 32.6), (37.0, 31.0, 40.0, 34.0), (10.0, 10.0, 11.0, 11.0)])
+def test_bbox_matches_brute_force(points, box):
+    lats, lons = points
+    got = GridIndex(lats, lons).bbox(*box)
+    assert sorted(got.tolist()) == _brute_bbox(lats, lons, box).tolist()
+
+
+def test_radius_and_nearest_match_brute_force(points):
+    lats, lons = points
+    index = GridIndex(lats, lons)
+    dist = haversine_km(38.5, 32.5, lats, lons)
+
+    idx, d = index.radius(38.5, 32.5, 15.0)
+    assert sorted(idx.tolist()) == np.flatnonzero(dist <= 15.0).tolist()
+    assert np.all(np.diff(d) >= 0)
+
+    idx, d = index.nearest(38.5, 32.5, 7)
+    assert idx.tolist() == np.argsort(dist, kind="stable")[:7].tolist()
+    assert len(index.nearest(38.5, 32.5, 0)[0]) == 0
+    assert len(GridIndex([], []).nearest(38.5, 32.5, 3)[0]) == 0
+
+
+@pytest.mark.parametrize("n_new", [10, 200])  # ek liste / EXTRA_FRACTION üstü tam kurulum
+def test_extended_matches_full_build(points, n_new):
+    lats, lons = points
+    rng = np.random.default_rng(1)
+    new_lats, new_lons = rng.uniform(38.0, 39.0, n_new), rng.uniform(32.0, 33.0, n_new)
+
+    base = GridIndex(lats, lons)
+    ext = base.extended(new_lats, new_lons)
+    full = GridIndex(np.concatenate([lats, new_lats]), np.concatenate([lons, new_lons]))
+    assert (ext.n_sorted == len(lats)) == (n_new <= spatial.EXTRA_FRACTION * len(lats))
+    assert len(base) == len(lats)  # orijinal değişmedi
+
+    box = (38.3, 32.3, 38.7, 32.7)
+    assert sorted(ext.bbox(*box).tolist()) == sorted(full.bbox(*box).tolist())
+    assert ext.nearest(38.5, 32.5, 5)[0].tolist() == full.nearest(38.5, 32.5, 5)[0].tolist()
+
+
+def test_bbox_endpoint(client):
+    res = client.get("/parcels/bbox", params={"min_lat": -90, "min_lon": -180, "max_lat": 90, "max_lon": 180})
+    assert res.status_code == 200
+    items = res.json()
+    assert items and {"parcel_id", "lat", "lon", "risk_7d"} <= set(items[0])
+    assert client.get("/parcels/bbox", params={"min_lat": "x", "min_lon": 0, "max_lat": 1, "max_lon": 1}).status_code == 422
@@ -0,0 +1,78 @@
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+
+import build_assets
+from static_assets import IMMUTABLE, REVALIDATE, NegotiatedGZipMiddleware, PrecompressedStaticFiles, accepted_encodings
+
+APP_JS = b"console.log('aquaguard');\n" * 100
+
+
+@pytest.fixture
+def dist(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "app.js").write_bytes(APP_JS)
+    (src / "styles.css").write_bytes(b"body { margin: 0; }\n")
+    (src / "index.html").write_text(
+        '<link href="./styles.css"><script src="app.js"></script><script src="https://cdn.example/app.js"></script>'
+    )
+    mapping = build_assets.build(src, tmp_path / "dist")
+    return tmp_path / "dist", mapping
+
+
+@pytest.fixture
+def static_client(dist):
+    out, _ = dist
+
+    async def big(request):
+        return JSONResponse({"items": list(range(2000))})
+
+    app = Starlette(routes=[
+        Route("/api", big),
+        Mount("/", PrecompressedStaticFiles(directory=str(out), html=True), name="frontend"),
+    ])
+    app.add_middleware(NegotiatedGZipMiddleware, router=app.router, minimum_size=500)
+    return TestClient(app)
+
+
+def test_accepted_encodings_honors_q_zero():
+    assert accepted_encodings("gzip, br;q=0.8, deflate;q=0") == {"gzip", "br"}
+    assert accepted_encodings("gzip;q=0") == set()
+    assert accepted_encodings("gzip;q=abc, br") == {"br"}
+
+
+def test_build_hashes_assets_and_rewrites_index(dist):
+    out, mapping = dist
+    assert mapping["app.js"] == build_assets.hashed_name("app.js", APP_JS)
+    html = (out / "index.html").read_text()
+    assert f'src="{mapping["app.js"]}"' in html and f'href="{mapping["styles.css"]}"' in html
+    assert 'src="https://cdn.example/app.js"' in html
+    assert gzip.decompress((out / (mapping["app.js"] + ".gz")).read_bytes()) == APP_JS
+
+
+def test_static_serves_precompressed_variant(static_client, dist):
+    _, mapping = dist
+    res = static_client.get("/" + mapping["app.js"], headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["cache-control"] == IMMUTABLE and res.headers["vary"] == "Accept-Encoding"
+    assert res.content == APP_JS  # istemci .gz'yi açar
+
+    res = static_client.get("/" + mapping["app.js"], headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in res.headers and res.content == APP_JS
+
+
+def test_index_revalidates_with_etag(static_client):
+    res = static_client.get("/", headers={"Accept-Encoding": "identity"})
+    assert res.headers["cache-control"] == REVALIDATE
+    again = static_client.get("/", headers={"Accept-Encoding": "identity", "If-None-Match": res.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_api_gzip_respects_q_zero(static_client):
+    assert static_client.get("/api", headers={"Accept-Encoding": "gzip"}).headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in static_client.get("/api", headers={"Accept-Encoding": "gzip;q=0"}).headers
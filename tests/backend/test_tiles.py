@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from tiles import RiskPyramid
+
+
+def _cells(pyramid, z, bbox=None):
+    return sorted((c["x"], c["y"], c["mean"], c["max"], c["count"]) for c in pyramid.cells(z, bbox))
+
+
+@pytest.fixture
+def parcels():
+    rng = np.random.default_rng(0)
+    lats, lons = rng.uniform(38.0, 39.0, 300), rng.uniform(32.0, 33.0, 300)
+    risk = rng.uniform(0, 100, 300)
+    risk[::17] = np.nan
+    return lats, lons, risk
+
+
+def _full(lats, lons, risk):
+    pyramid = RiskPyramid(lats, lons, max_zoom=8)
+    pyramid.build(risk)
+    return pyramid
+
+
+@pytest.mark.parametrize("n_changed", [5, 250])  # artımlı / REBUILD_FRACTION üstü tam build
+def test_update_matches_full_build(parcels, n_changed):
+    lats, lons, risk = parcels
+    pyramid = _full(lats, lons, risk)
+    new = risk.copy()
+    new[:n_changed] = np.where(np.arange(n_changed) % 3 == 0, np.nan, 99.0 - np.arange(n_changed) % 50)
+
+    assert pyramid.update(new) == np.count_nonzero(~((new == risk) | (np.isnan(new) & np.isnan(risk))))
+    assert pyramid.update(new) == 0
+    expected = _full(lats, lons, new)
+    for z in (0, 4, 8):
+        assert _cells(pyramid, z) == _cells(expected, z)
+
+
+def test_add_parcels_matches_full_build(parcels):
+    lats, lons, risk = parcels
+    pyramid = _full(lats[:250], lons[:250], risk[:250])
+    pyramid.add_parcels(lats[250:], lons[250:], risk[250:])
+    expected = _full(lats, lons, risk)
+    for z in (0, 6, 8):
+        assert _cells(pyramid, z) == _cells(expected, z)
+
+    # Eklemeden sonra artımlı güncelleme yeni parsellerde de çalışır
+    risk2 = risk.copy()
+    risk2[-3:] = 1.0
+    pyramid.update(risk2)
+    assert _cells(pyramid, 8) == _cells(_full(lats, lons, risk2), 8)
+
+
+def test_cells_bbox_and_zoom_clamp(parcels):
+    lats, lons, risk = parcels
+    pyramid = _full(lats, lons, risk)
+    assert _cells(pyramid, 99) == _cells(pyramid, 8)
+    inside = pyramid.cells(8, (38.4, 32.4, 38.6, 32.6))
+    assert 0 < len(inside) < len(pyramid.cells(8))
+    assert sum(c["count"] for c in pyramid.cells(0)) == np.count_nonzero(~np.isnan(risk))
+
+
+def test_risk_tiles_endpoint(client):
+    res = client.get("/risk-tiles/3")
+    assert res.status_code == 200
+    assert res.json()["z"] == 3 and res.json()["cells"]
+    assert client.get("/risk-tiles/abc").status_code == 422
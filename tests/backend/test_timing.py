@@ -0,0 +1,51 @@
+import timing
+from aquaguard.timing import measure
+from timing import RequestTimings, stage
+
+
+def test_measure_sinks():
+    d = {}
+    with measure(d, "load"):
+        pass
+    with measure(d, "load"):
+        pass
+    assert list(d) == ["load"] and d["load"] >= 0.0
+
+    t = RequestTimings()
+    with measure(t, "model"):
+        pass
+    assert [n for n, _ in t.stages] == ["model"]
+
+    with measure(None, "noop"):
+        pass
+
+
+def test_stage_outside_request_is_noop():
+    with stage("load"):
+        pass
+
+
+def test_server_timing_header(client):
+    res = client.get("/parcels/catalog", params={"limit": 2})
+    assert res.status_code == 200
+    names = [part.split(";")[0] for part in res.headers["server-timing"].split(", ")]
+    assert {"handler", "serialize", "total"} <= set(names)
+    assert "x-profile" not in res.headers
+
+
+def test_profile_requires_admin_and_is_written_by_handler(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(timing, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(timing, "PROFILE_DIR", tmp_path)
+
+    res = client.get("/parcels/catalog", params={"profile": "1"})
+    assert "x-profile" not in res.headers  # token yok: profil alınmaz
+
+    res = client.get("/parcels/catalog", params={"profile": "1"}, headers={"X-Admin-Token": "secret"})
+    name = res.headers["x-profile"]
+    assert (tmp_path / name).exists() and name.endswith("_parcels_catalog.prof")
+
+    assert client.get(f"/admin/profiles/{name}").status_code == 403
+    report = client.get(f"/admin/profiles/{name}", headers={"X-Admin-Token": "secret"})
+    assert report.status_code == 200 and "get_parcel_catalog" in report.text
+    missing = client.get("/admin/profiles/..%2Fmain.py", headers={"X-Admin-Token": "secret"})
+    assert missing.status_code == 404
@@ -0,0 +1,133 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest
+from weather import ParcelWeather, WeatherGrid, join_cells
+
+
+def _row(parcel_id="P1", date="2025-06-01", **kw):
+    row = {
+        "date": date, "parcel_id": parcel_id, "ndvi": 0.5,
+        "precipitation_sum": 1.0, "temperature_2m_max": 30.0, "et0_fao_evapotranspiration": 5.0,
+    }
+    row.update(kw)
+    return row
+
+
+def _ndvi_only(parcel_id="P1", date="2025-06-01"):
+    return {"date": date, "parcel_id": parcel_id, "ndvi": 0.5}
+
+
+def test_grid_normalizes_axes_and_rejects_bad_shape():
+    values = np.arange(2 * 2 * 3, dtype=float).reshape(2, 2, 3)
+    grid = WeatherGrid(["2025-06-02", "2025-06-01"], [39.1, 39.0], [32.0, 32.1, 32.2], {"precipitation_sum": values})
+    # Azalan tarih / enlem artan sıraya çevrilir, değerler eksenlerle birlikte döner
+    assert grid.lats.tolist() == [39.0, 39.1]
+    assert grid.values["precipitation_sum"][0, 0].tolist() == values[1, 1].tolist()
+
+    with pytest.raises(ValueError, match="beklenen şekil"):
+        WeatherGrid(["2025-06-01"], [39.0], [32.0, 32.1], {"precipitation_sum": np.zeros((1, 2, 2))})
+    with pytest.raises(ValueError, match="Desteklenmeyen grid formatı"):
+        WeatherGrid.load("grid.csv")
+
+
+def test_cell_index_marks_parcels_outside_grid(weather):
+    cells = weather.grid.cell_index([39.0, 39.1, 39.14, 39.3, np.nan], [32.0, 32.1, 32.1, 32.0, 32.0])
+    assert cells.tolist() == [0, 3, 3, -1, -1]
+    assert weather.cell_of(["P2", "P1", "P9"]).tolist() == [-1, 2, -1]
+
+
+def test_grid_npz_round_trip(tmp_path, weather):
+    weather.grid.save(tmp_path / "grid.npz")
+    loaded = WeatherGrid.load(tmp_path / "grid.npz")
+    assert loaded.n_cells == 4
+    np.testing.assert_array_equal(loaded.values["precipitation_sum"], weather.grid.values["precipitation_sum"])
+
+
+def test_join_cells_keeps_own_values_and_ignores_stale_cells(weather):
+    obs = pd.DataFrame({"date": pd.to_datetime(["2025-06-01"] * 3), "precipitation_sum": [np.nan, 9.0, np.nan]})
+    out = join_cells(weather.grid, obs, [1, 1, 99])  # 99: grid değişmiş, hücre artık yok
+    assert out["precipitation_sum"].iloc[:2].tolist() == [1.0, 9.0]
+    assert np.isnan(out["precipitation_sum"].iloc[2])
+
+
+@pytest.fixture
+def weather():
+    dates = pd.date_range("2025-06-01", periods=10)
+    shape = (len(dates), 2, 2)
+    grid = WeatherGrid(dates, [39.0, 39.1], [32.0, 32.1], {
+        "precipitation_sum": np.arange(np.prod(shape), dtype=float).reshape(shape),
+        "temperature_2m_max": np.full(shape, 25.0),
+        "et0_fao_evapotranspiration": np.full(shape, 4.0),
+    })
+    # P2 grid dışında
+    return ParcelWeather(grid, ["P1", "P2"], [39.1, 45.0], [32.0, 40.0])
+
+
+def test_validate_rows_rejects_meteo_the_grid_cannot_fill(weather):
+    with pytest.raises(ValueError, match="doldurulamadı"):
+        ingest.validate_rows([_ndvi_only("P2")], weather=weather)  # grid dışında
+    with pytest.raises(ValueError, match="doldurulamadı"):
+        ingest.validate_rows([_ndvi_only("P3")], weather=weather)  # bilinmeyen parsel
+    with pytest.raises(ValueError, match="doldurulamadı"):
+        ingest.validate_rows([_ndvi_only("P1", "2025-07-01")], weather=weather)  # grid tarihi dışında
+
+
+def test_validate_rows_stores_cell_not_values(weather):
+    batch = ingest.validate_rows([_ndvi_only("P1", "2025-06-03"), _row("P2")], weather=weather)
+    assert list(batch.columns) == ingest.LOG_COLUMNS
+    assert batch["weather_cell"].tolist() == [2, -1]  # P1: (y=1, x=0) -> 1 * 2 + 0
+    assert np.isnan(batch["precipitation_sum"].iloc[0])
+
+    joined = ingest.join_weather(batch, weather.grid)
+    assert list(joined.columns) == ingest.RAW_COLUMNS
+    assert joined["precipitation_sum"].tolist() == [2 * 4 + 2, 1.0]  # (gün 2, hücre 2); P2 kendi değeri
+    assert joined["temperature_2m_max"].tolist() == [25.0, 30.0]
+
+
+def test_ingest_log_stores_cells_not_meteo(tmp_path, weather):
+    log = ingest.IngestLog(tmp_path)
+    n = log.append(ingest.validate_rows([_ndvi_only("P1", "2025-06-02"), _row("P2")], weather=weather))
+    assert n == 2
+
+    stored = [json.loads(line) for line in (tmp_path / "log-0.jsonl").read_text().splitlines()]
+    assert "precipitation_sum" not in stored[0] and stored[0]["weather_cell"] == 2
+    assert "weather_cell" not in stored[1]
+
+    rows, _ = log.read_since()
+    assert rows["weather_cell"].tolist() == [2, -1]
+    assert np.isnan(rows["precipitation_sum"].iloc[0])
+    assert ingest.join_weather(rows, weather.grid)["precipitation_sum"].tolist() == [1 * 4 + 2, 1.0]
+
+
+def test_merge_ml_joins_grid_meteo(weather):
+    store = ingest.build_ml_features(pd.DataFrame([_row("P1", f"2025-06-0{d}") for d in (1, 2, 3)]).assign(
+        date=lambda d: pd.to_datetime(d["date"])))
+    batch = ingest.validate_rows([_ndvi_only("P1", "2025-06-04")], weather=weather)
+    merged = ingest.merge_ml(store, batch, weather.grid).set_index("date")
+    assert merged.loc["2025-06-04", "precipitation_sum"] == 3 * 4 + 2
+    assert merged.loc["2025-06-04", "temperature_2m_max"] == 25.0
+
+
+def test_timeseries_join_reads_grid_at_query_time(weather):
+    store = pd.DataFrame({
+        "date": pd.to_datetime(["2025-06-01"]), "parcel_id": ["P1"], "ndvi": [0.3], "rain_mm": [7.0], "temp_c": [20.0],
+    })
+    batch = ingest.validate_rows([_ndvi_only("P1", "2025-06-02")], weather=weather)
+    series = ingest.merge_timeseries(store, batch)
+    assert "weather_cell" in series.columns and np.isnan(series["rain_mm"].iloc[1])
+
+    joined = ingest.join_timeseries(series, weather.grid)
+    assert joined["rain_mm"].tolist() == [7.0, 1 * 4 + 2]
+    assert joined["temp_c"].tolist() == [20.0, 25.0]
+    assert ingest.join_timeseries(series, None) is series
+
+
+def test_ingest_endpoint_rejects_nan_meteo_without_grid(client, tmp_path):
+    res = client.post("/ingest", json={"rows": [_row("Parsel_A", temperature_2m_max=None)]})
+    assert res.status_code == 400
+    assert "doldurulamadı" in res.json()["error"]
+    assert not (tmp_path / "ingest").exists()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Ortak aquaguard/ paketi repo kökünden import edilir
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,50 @@
+import shutil
+import sys
+
+import pytest
+
+import script_paths
+
+script_paths.use("ml")
+
+DATA_CSV = script_paths.ROOT / "ml" / "data" / "parcels_timeseries.csv"
+
+
+@pytest.fixture(autouse=True)
+def _ml_scripts():
+    # Tüm conftest'ler toplama anında yüklenir: testte geç import edilen modüller de ml/'den gelsin
+    script_paths.use("ml")
+
+
+def _run_cli(monkeypatch, module, *args):
+    # python <modül>.py args... ile aynı: ml/ betikleri yolları çalışma dizinine göre çözer
+    monkeypatch.setattr(sys, "argv", [module.__name__ + ".py", *map(str, args)])
+    module.main()
+
+
+@pytest.fixture
+def cli(monkeypatch):
+    return lambda module, *args: _run_cli(monkeypatch, module, *args)
+
+
+@pytest.fixture(scope="session")
+def _trained_dir(tmp_path_factory):
+    """Depodaki veriyle bir kez tam eğitilmiş ml/ çalışma dizini (repo artifact'larına dokunmaz)."""
+    import train
+
+    work = tmp_path_factory.mktemp("ml")
+    (work / "data").mkdir()
+    shutil.copy(DATA_CSV, work / "data" / DATA_CSV.name)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(work)
+        _run_cli(mp, train)
+    return work
+
+
+@pytest.fixture
+def ml_dir(_trained_dir, tmp_path, monkeypatch):
+    """Eğitilmiş çalışma dizininin teste özel kopyası; cwd oraya alınır."""
+    work = tmp_path / "ml"
+    shutil.copytree(_trained_dir, work)
+    monkeypatch.chdir(work)
+    return work
@@ -0,0 +1,64 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import artifact
+import inference
+from artifact import ArtifactError
+from features import FEATURE_COLUMNS
+
+
+def _parcel(ml_dir, parcel_id="Parsel_A"):
+    df = pd.read_csv(ml_dir / "data" / "parcels_timeseries.csv")
+    return df[df["parcel_id"] == parcel_id]
+
+
+def test_native_booster_predicts_like_pickle(ml_dir):
+    booster, manifest = artifact.load(inference.MANIFEST_PATH, FEATURE_COLUMNS)
+    X = pd.DataFrame(np.random.default_rng(0).normal(size=(20, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    np.testing.assert_allclose(booster.predict(X), joblib.load(inference.MODEL_PATH).predict(X), rtol=1e-9)
+    assert (manifest["framework"], manifest["horizon_days"], manifest["model_file"]) == ("lightgbm", 7, "model_7d.txt")
+
+    model, cols = inference.load_artifacts()
+    assert type(model) is type(booster) and cols == FEATURE_COLUMNS  # manifest varsa pickle yüklenmez
+
+
+def test_save_rejects_booster_with_other_feature_order(ml_dir):
+    model = joblib.load(inference.MODEL_PATH)
+    with pytest.raises(ArtifactError, match="Booster feature sırası"):
+        artifact.save(model, ml_dir / "other.joblib", FEATURE_COLUMNS[::-1], 7)
+    assert not (ml_dir / "other.manifest.json").exists()
+
+
+def test_load_rejects_tampered_or_misordered_artifact(ml_dir):
+    with pytest.raises(ArtifactError, match="Feature sırası"):
+        artifact.load(inference.MANIFEST_PATH, FEATURE_COLUMNS[::-1])
+    with open(ml_dir / "model_7d.txt", "a") as f:
+        f.write("\n")
+    with pytest.raises(ArtifactError, match="Checksum"):
+        inference.load_artifacts()
+
+
+def test_prediction_explains_with_native_model(ml_dir):
+    timings = {}
+    out = inference.predict_7d_from_timeseries(_parcel(ml_dir), timings=timings)
+    assert out["ok"] and list(out["contributions"]) == FEATURE_COLUMNS
+    top = max(out["contributions"], key=lambda c: abs(out["contributions"][c]))
+    assert out["top_factors"][0] == top
+    assert {"load_artifacts", "build_features", "predict", "explain"} <= set(timings)
+
+
+def test_short_history_is_reported(ml_dir):
+    short = _parcel(ml_dir).head(20)
+    with pytest.raises(ValueError, match="yeterli feature"):
+        inference.predict_7d_from_timeseries(short)
+    out = inference.predict_7d_from_timeseries(short, debug=True)
+    assert not out["ok"] and out["debug"]["n_valid_rows"] == 0
+
+
+def test_missing_artifacts(ml_dir):
+    for name in ("model_7d.manifest.json", inference.MODEL_PATH):
+        (ml_dir / name).unlink()
+    with pytest.raises(FileNotFoundError, match="train.py"):
+        inference.load_artifacts()
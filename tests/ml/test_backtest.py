@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import backtest
+
+
+def test_risk_band_thresholds():
+    assert backtest.risk_band(np.array([0, 39.9, 40, 69.9, 70, 100])).tolist() == [
+        "low", "low", "medium", "medium", "high", "high",
+    ]
+
+
+def test_parcel_chunks_never_split_a_parcel():
+    df = pd.DataFrame({"parcel_id": ["A", "B", "A", "C", "B", "C", "D"], "x": range(7)})
+    chunks = list(backtest.parcel_chunks(df, 2))
+    assert [sorted(c["parcel_id"].unique()) for c in chunks] == [["A", "B"], ["C", "D"]]
+    assert chunks[0]["x"].tolist() == [0, 1, 2, 4]  # orijinal satır sırası korunur
+
+
+def test_bounded_map_limits_in_flight_work():
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def work(i):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.01)
+        with lock:
+            state["now"] -= 1
+        return i
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        out = list(backtest.bounded_map(pool, work, range(20), max_in_flight=3))
+    assert sorted(out) == list(range(20))
+    assert state["peak"] <= 3
+
+
+def test_run_backtest_report_levels_add_up(ml_dir):
+    df = pd.read_csv(ml_dir / "data" / "parcels_timeseries.csv")
+    stats = backtest.run_backtest(df, "report.parquet", workers=2, chunk_parcels=1)
+    report = pq.read_table("report.parquet").to_pandas()
+
+    assert stats["rows"] > 0
+    assert set(report["level"]) == {"parcel", "month", "risk_band"}
+    for _, level in report.groupby("level"):
+        assert level["n"].sum() == stats["rows"]  # her seviye tüm satırları bir kez sayar
+    parcels = report[report["level"] == "parcel"]
+    assert sorted(parcels["key"]) == sorted(df["parcel_id"].unique())
+    assert (report["rmse"] >= report["mae"]).all()
+
+
+def test_main_requires_data(ml_dir, cli):
+    with pytest.raises(FileNotFoundError, match="Veri bulunamadı"):
+        cli(backtest, "--data", "missing.csv")
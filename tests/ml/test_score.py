@@ -0,0 +1,62 @@
+import json
+
+import pandas as pd
+import pytest
+
+import score
+
+
+def _frame(ids):
+    return pd.DataFrame({"parcel_id": ids, "x": range(len(ids))})
+
+
+def test_parcel_aligned_carries_tail_to_next_chunk():
+    chunks = [_frame(["A", "A", "B"]), _frame(["B", "B", "C"]), _frame(["C"])]
+    out = [c["parcel_id"].tolist() for c in score.parcel_aligned(iter(chunks))]
+    assert out == [["A", "A"], ["B", "B", "B"], ["C", "C"]]
+
+
+def test_parcel_aligned_rejects_ungrouped_input():
+    with pytest.raises(ValueError, match="gruplu değil"):
+        list(score.parcel_aligned(iter([_frame(["A", "B"]), _frame(["A", "C"])])))
+    with pytest.raises(ValueError, match="gruplu değil"):
+        list(score.parcel_aligned(iter([_frame(["A", "B"]), _frame(["A"])])))  # son parça
+
+
+def _scores(out):
+    return pd.concat(pd.read_parquet(p) for p in sorted(out.glob("month=*/part-*.parquet")))
+
+
+def test_scores_partitioned_with_drift_report(ml_dir, cli):
+    cli(score, "data/parcels_timeseries.csv", "--out", "scores", "--workers", "2", "--chunk-rows", "300")
+    out = ml_dir / "scores"
+    scores = _scores(out)
+    assert len(scores) > 0 and scores["risk_score"].between(0, 100).all()
+    for part in out.glob("month=*"):
+        months = pd.read_parquet(part)["date"].dt.strftime("%Y-%m")
+        assert set(months) == {part.name.split("=")[1]}
+    assert json.loads((out / "drift.json").read_text())["status"] in ("ok", "warn", "drift")
+
+    cli(score, "data/parcels_timeseries.csv", "--out", "scores", "--workers", "1", "--mode", "latest", "--overwrite")
+    latest = _scores(out)
+    assert latest["parcel_id"].is_unique and len(latest) == 3
+
+
+def test_refuses_stale_outputs_without_overwrite(ml_dir, cli):
+    cli(score, "data/parcels_timeseries.csv", "--out", "scores", "--workers", "1", "--chunk-rows", "100")
+    n_parts = len(list((ml_dir / "scores").glob("month=*/part-*.parquet")))
+    with pytest.raises(SystemExit, match="--overwrite"):
+        cli(score, "data/parcels_timeseries.csv", "--out", "scores", "--workers", "1")
+
+    cli(score, "data/parcels_timeseries.csv", "--out", "scores", "--workers", "1", "--overwrite")
+    parts = list((ml_dir / "scores").glob("month=*/part-*.parquet"))
+    assert 0 < len(parts) < n_parts  # eski chunk'ların part dosyaları kalmadı
+
+
+def test_missing_input_and_no_reference(ml_dir, cli):
+    with pytest.raises(FileNotFoundError, match="Girdi bulunamadı"):
+        cli(score, "missing.csv", "--out", "scores")
+
+    (ml_dir / "model_7d.drift.json").unlink()
+    cli(score, "data/parcels_timeseries.csv", "--out", "scores", "--workers", "1")
+    assert not (ml_dir / "scores" / "drift.json").exists()
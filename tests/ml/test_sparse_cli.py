@@ -0,0 +1,48 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import backtest
+import sparse_ts
+import train
+
+
+def test_cli_writes_store_that_reads_back_like_csv(ml_dir, cli, capsys):
+    cli(sparse_ts, "data/parcels_timeseries.csv")
+    store = ml_dir / "data" / "parcels_timeseries.sparse"
+    assert sparse_ts.is_sparse(store)
+    assert "precipitation_sum: ffill" in capsys.readouterr().out
+
+    dense = sparse_ts.read_timeseries("data/parcels_timeseries.csv")
+    back = sparse_ts.read_timeseries(store)
+    pd.testing.assert_frame_equal(back.drop(columns="date"), dense.drop(columns="date"), check_exact=True)
+    assert (back["date"] == pd.to_datetime(dense["date"])).all()
+
+
+def test_training_fingerprint_tracks_store_contents(ml_dir, cli):
+    cli(sparse_ts, "data/parcels_timeseries.csv", "--out", "ts.sparse")
+    first = train.data_fingerprint("ts.sparse")
+    assert first == train.data_fingerprint("ts.sparse")
+
+    df = sparse_ts.read_timeseries("ts.sparse")
+    df.loc[0, "ndvi"] += 0.01
+    sparse_ts.write_sparse(df, ml_dir / "ts.sparse")
+    assert train.data_fingerprint("ts.sparse") != first
+
+
+def test_backtest_reads_sparse_store(ml_dir, cli):
+    cli(sparse_ts, "data/parcels_timeseries.csv", "--out", "ts.sparse")
+    cli(backtest, "--data", "ts.sparse", "--out", "sparse.parquet", "--workers", "1")
+    cli(backtest, "--out", "dense.parquet", "--workers", "1")
+    pd.testing.assert_frame_equal(
+        pq.read_table("sparse.parquet").to_pandas().sort_values(["level", "key"], ignore_index=True),
+        pq.read_table("dense.parquet").to_pandas().sort_values(["level", "key"], ignore_index=True),
+    )
+
+
+def test_cli_rejects_duplicate_days(ml_dir, cli):
+    df = pd.read_csv("data/parcels_timeseries.csv")
+    pd.concat([df, df.head(1)]).to_csv("dup.csv", index=False)
+    with pytest.raises(ValueError, match="birden fazla satır"):
+        cli(sparse_ts, "dup.csv")
+    assert not (ml_dir / "dup.sparse" / "meta.json").exists()
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import artifact
+import drift
+import train
+
+
+def _meta(ml_dir):
+    return json.loads((ml_dir / train.META_PATH).read_text())
+
+
+def test_full_train_writes_versioned_artifacts(ml_dir):
+    meta = _meta(ml_dir)
+    assert (meta["version"], meta["mode"], meta["parent_version"]) == (1, "full", None)
+    assert (ml_dir / "models" / "model_7d-v1.joblib").exists()
+    manifest = artifact.read_manifest(artifact.manifest_path(train.MODEL_PATH))
+    assert manifest["feature_names"] == train.FEATURE_COLUMNS
+    reference = drift.load_reference(drift.reference_path(train.MODEL_PATH))
+    assert reference["rows"] == meta["metrics"]["rows"]
+    assert set(reference["columns"]) == set(train.FEATURE_COLUMNS) | {"predicted_anomaly_7d", "risk_score"}
+
+
+def test_incremental_adds_trees_and_merges_reference(ml_dir, cli):
+    before = _meta(ml_dir)
+    ref_before = drift.load_reference(drift.reference_path(train.MODEL_PATH))
+
+    cli(train, "--incremental", "--since", "2025-11-01", "--add-trees", "50")
+    meta = _meta(ml_dir)
+    assert (meta["version"], meta["parent_version"], meta["mode"]) == (2, 1, "incremental")
+    assert 0 < meta["metrics"]["trees_added"] <= 50
+    assert meta["n_trees"] == before["n_trees"] + meta["metrics"]["trees_added"]
+    assert meta["full_train"] == before["full_train"]  # son tam eğitimin süresi taşınır
+
+    ref = drift.load_reference(drift.reference_path(train.MODEL_PATH))
+    assert ref["rows"] == ref_before["rows"] + meta["metrics"]["rows"]
+    col = train.FEATURE_COLUMNS[0]
+    assert ref["columns"][col]["edges"] == ref_before["columns"][col]["edges"]
+    assert sum(ref["columns"][col]["counts"]) == ref["rows"]
+
+    booster, manifest = artifact.load(artifact.manifest_path(train.MODEL_PATH), train.FEATURE_COLUMNS)
+    assert booster.num_trees() == meta["n_trees"]
+    assert (ml_dir / "models" / "model_7d-v2.drift.json").exists()
+
+
+@pytest.mark.parametrize("args, message", [
+    ([], "holdout için yetersiz"),  # meta'daki son tarihten sonra birkaç hedefli gün var
+    (["--since", "2025-11-01", "--holdout-days", "400"], "holdout için yetersiz"),
+    (["--since", "2026-01-23"], "hiçbiri henüz hedefe"),  # sonrası 7 günden kısa
+    (["--since", "2026-02-01"], "Yeni satır yok"),
+])
+def test_incremental_rejects_insufficient_new_data(ml_dir, cli, args, message):
+    with pytest.raises(SystemExit, match=message):
+        cli(train, "--incremental", *args)
+    assert _meta(ml_dir)["version"] == 1  # hiçbir şey yazılmadı
+
+
+def test_incremental_requires_previous_model_and_start(ml_dir, cli):
+    (ml_dir / train.META_PATH).unlink()
+    with pytest.raises(SystemExit, match="--since"):
+        cli(train, "--incremental")
+
+    (ml_dir / train.MODEL_PATH).unlink()
+    with pytest.raises(FileNotFoundError, match="önceki model gerekli"):
+        cli(train, "--incremental", "--since", "2025-11-01")
@@ -0,0 +1,22 @@
+"""
+backend/ ve ml/ script dizinleri: modüller birbirini düz isimle import eder
+(python main.py / python train.py ile aynı). İki dizinde aynı isimli modüller
+var (drift, sparse_ts); diğer dizinden önbelleğe alınmış kopya atılır ki her
+test dizini kendi modülünü görsün.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SHARED_NAMES = ("drift", "sparse_ts")
+
+
+def use(name: str):
+    path = str(ROOT / name)
+    if path in sys.path:
+        sys.path.remove(path)
+    sys.path.insert(0, path)
+    for mod in SHARED_NAMES:
+        loaded = sys.modules.get(mod)
+        if loaded is not None and not str(getattr(loaded, "__file__", "")).startswith(path):
+            del sys.modules[mod]